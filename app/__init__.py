@@ -1,20 +1,85 @@
 import logging
+import os
+import time
+from typing import Any, Optional
+
 from flask import Flask
 from flask_cors import CORS
 from flask_login import LoginManager
 from flask_migrate import Migrate
 
 from app.models import db
-from app.models.books import Book
+
+# Imported for their side effect: registering the tables on db.metadata.
+from app.models.books import Book, BookImageVariant  # noqa: F401
+from app.models.outbox import EmailOutbox  # noqa: F401
+from app.models.search import BookSearchDocument, BookSearchPosting  # noqa: F401
 from app.models.user import User
+from app.models.versions import DataVersion  # noqa: F401
 from app.schemas import api
 from app.utils.auth_utils import init_jwt
+from app.utils.http_cache import init_http_cache
+from app.utils.metrics import init_metrics
+from app.utils.query_budget import init_query_budget
+from app.utils.db_routing import engine_options, replica_binds
 from app.routes import register_routes
+from app.commands import register_commands
+from app.utils.outbox import start_outbox_workers
+from app.utils.overdue import start_overdue_scheduler
+from app.config.auth import AUTH_RATE_LIMIT_ENABLED, JWT_STATELESS
 from app.config.database import (
+    DATABASE_REPLICA_LAG_CHECK_INTERVAL,
+    DATABASE_REPLICA_MAX_LAG,
+    DATABASE_REPLICA_URIS,
+    QUERY_BUDGET_MODE,
     SQLALCHEMY_DATABASE_URI,
     SECRET_KEY,
+    SQLALCHEMY_MAX_OVERFLOW,
+    SQLALCHEMY_POOL_PRE_PING,
+    SQLALCHEMY_POOL_RECYCLE,
+    SQLALCHEMY_POOL_SIZE,
+    SQLALCHEMY_POOL_TIMEOUT,
     SQLALCHEMY_TRACK_MODIFICATIONS,
 )
+from app.config.email import (
+    OUTBOX_BATCH_SIZE,
+    OUTBOX_LEASE,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_POLL_INTERVAL,
+    OUTBOX_RETRY_DELAY,
+    OUTBOX_WORKERS,
+)
+from app.config.http import (
+    COMPRESSION_BROTLI_QUALITY,
+    COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_MIN_SIZE,
+)
+from app.config.loans import (
+    OVERDUE_SWEEP_BATCH_SIZE,
+    OVERDUE_SWEEP_INTERVAL,
+    OVERDUE_SWEEP_PAUSE,
+)
+from app.config.metrics import (
+    METRICS_ENABLED,
+    METRICS_LATENCY_BUCKETS,
+    METRICS_TOKEN,
+)
+from app.config.seed import (
+    SEED_COVERS_DIR,
+    SEED_FETCH_TIMEOUT,
+    SEED_FETCH_WORKERS,
+    SEED_OFFLINE,
+)
+from app.config.server import BACKGROUND_WORKERS
+from app.config.uploads import (
+    BULK_IMPORT_BATCH_SIZE,
+    BULK_IMPORT_MAX_ERRORS,
+    IMAGE_CACHE_CONTROL,
+    IMAGE_VARIANT_FORMAT,
+    IMAGE_VARIANT_QUALITY,
+    IMAGE_VARIANT_WIDTHS,
+    IMAGE_VARIANT_WORKERS,
+)
 
 # Correct the logging level
 logging.basicConfig(level=logging.INFO)
@@ -22,8 +87,21 @@ logger = logging.getLogger(__name__)
 
 login_manager = LoginManager()
 
+MIGRATIONS_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations"
+)
+
 
-def create_app() -> Flask:
+def create_app(config: Optional[dict[str, Any]] = None) -> Flask:
+    """
+    Build the application.
+
+    `config` overrides the settings read from the environment, e.g. to point
+    tests or benchmarks at an in-memory SQLite database. Creating the app never
+    touches the database: schema creation and seed data live in the
+    `flask bootstrap` command.
+    """
+    started = time.perf_counter()
     app = Flask(__name__)
     # Allow all localhost and 127.0.0.1 origins
     CORS(app, supports_credentials=True, resources={r"/*": {"origins": "*"}})
@@ -31,24 +109,114 @@ def create_app() -> Flask:
     app.config["SQLALCHEMY_DATABASE_URI"] = SQLALCHEMY_DATABASE_URI
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = SQLALCHEMY_TRACK_MODIFICATIONS
     app.config["SECRET_KEY"] = SECRET_KEY
-
+    app.config["SQLALCHEMY_POOL_SIZE"] = SQLALCHEMY_POOL_SIZE
+    app.config["SQLALCHEMY_MAX_OVERFLOW"] = SQLALCHEMY_MAX_OVERFLOW
+    app.config["SQLALCHEMY_POOL_TIMEOUT"] = SQLALCHEMY_POOL_TIMEOUT
+    app.config["SQLALCHEMY_POOL_RECYCLE"] = SQLALCHEMY_POOL_RECYCLE
+    app.config["SQLALCHEMY_POOL_PRE_PING"] = SQLALCHEMY_POOL_PRE_PING
+    app.config["DATABASE_REPLICA_URIS"] = DATABASE_REPLICA_URIS
+    app.config["DATABASE_REPLICA_MAX_LAG"] = DATABASE_REPLICA_MAX_LAG
+    app.config["DATABASE_REPLICA_LAG_CHECK_INTERVAL"] = (
+        DATABASE_REPLICA_LAG_CHECK_INTERVAL
+    )
+    app.config["QUERY_BUDGET_MODE"] = QUERY_BUDGET_MODE
+    app.config["JWT_STATELESS"] = JWT_STATELESS
+    app.config["AUTH_RATE_LIMIT_ENABLED"] = AUTH_RATE_LIMIT_ENABLED
+    app.config["IMAGE_CACHE_CONTROL"] = IMAGE_CACHE_CONTROL
+    app.config["IMAGE_VARIANT_WIDTHS"] = IMAGE_VARIANT_WIDTHS
+    app.config["IMAGE_VARIANT_FORMAT"] = IMAGE_VARIANT_FORMAT
+    app.config["IMAGE_VARIANT_QUALITY"] = IMAGE_VARIANT_QUALITY
+    app.config["IMAGE_VARIANT_WORKERS"] = IMAGE_VARIANT_WORKERS
+    app.config["BULK_IMPORT_BATCH_SIZE"] = BULK_IMPORT_BATCH_SIZE
+    app.config["BULK_IMPORT_MAX_ERRORS"] = BULK_IMPORT_MAX_ERRORS
+    app.config["SEED_COVERS_DIR"] = SEED_COVERS_DIR
+    app.config["SEED_OFFLINE"] = SEED_OFFLINE
+    app.config["SEED_FETCH_WORKERS"] = SEED_FETCH_WORKERS
+    app.config["SEED_FETCH_TIMEOUT"] = SEED_FETCH_TIMEOUT
+    app.config["OVERDUE_SWEEP_BATCH_SIZE"] = OVERDUE_SWEEP_BATCH_SIZE
+    app.config["OVERDUE_SWEEP_PAUSE"] = OVERDUE_SWEEP_PAUSE
+    app.config["OVERDUE_SWEEP_INTERVAL"] = OVERDUE_SWEEP_INTERVAL
+    app.config["OUTBOX_WORKERS"] = OUTBOX_WORKERS
+    app.config["OUTBOX_BATCH_SIZE"] = OUTBOX_BATCH_SIZE
+    app.config["OUTBOX_POLL_INTERVAL"] = OUTBOX_POLL_INTERVAL
+    app.config["OUTBOX_MAX_ATTEMPTS"] = OUTBOX_MAX_ATTEMPTS
+    app.config["OUTBOX_RETRY_DELAY"] = OUTBOX_RETRY_DELAY
+    app.config["OUTBOX_LEASE"] = OUTBOX_LEASE
+    app.config["METRICS_ENABLED"] = METRICS_ENABLED
+    app.config["METRICS_LATENCY_BUCKETS"] = METRICS_LATENCY_BUCKETS
+    app.config["METRICS_TOKEN"] = METRICS_TOKEN
+    app.config["BACKGROUND_WORKERS"] = BACKGROUND_WORKERS
+    app.config["COMPRESSION_MIN_SIZE"] = COMPRESSION_MIN_SIZE
+    app.config["COMPRESSION_GZIP_LEVEL"] = COMPRESSION_GZIP_LEVEL
+    app.config["COMPRESSION_BROTLI_QUALITY"] = COMPRESSION_BROTLI_QUALITY
+    if config:
+        app.config.update(config)
+    # Derived from the (possibly overridden) URIs and pool settings unless
+    # given explicitly.
+    pool_options = {
+        "pool_size": app.config["SQLALCHEMY_POOL_SIZE"],
+        "max_overflow": app.config["SQLALCHEMY_MAX_OVERFLOW"],
+        "pool_timeout": app.config["SQLALCHEMY_POOL_TIMEOUT"],
+        "pool_recycle": app.config["SQLALCHEMY_POOL_RECYCLE"],
+        "pool_pre_ping": app.config["SQLALCHEMY_POOL_PRE_PING"],
+    }
+    app.config.setdefault(
+        "SQLALCHEMY_ENGINE_OPTIONS",
+        engine_options(app.config["SQLALCHEMY_DATABASE_URI"], **pool_options),
+    )
+    app.config.setdefault(
+        "SQLALCHEMY_BINDS",
+        replica_binds(app.config["DATABASE_REPLICA_URIS"], **pool_options),
+    )
+    timings = {"config": time.perf_counter() - started}
+
+    phase_started = time.perf_counter()
     db.init_app(app)
 
     init_jwt(app)
 
-    Migrate(app, db)
+    init_metrics(app)
+
+    init_query_budget(app)
+
+    init_http_cache(app)
+
+    Migrate(app, db, directory=MIGRATIONS_DIRECTORY)
+    timings["extensions"] = time.perf_counter() - phase_started
 
+    phase_started = time.perf_counter()
     register_routes(api, app)
 
     api.init_app(app)
 
+    register_commands(app)
+
     login_manager.init_app(app)
 
     login_manager.login_view = "auth.login"
 
     login_manager.user_loader(User.load_user)
+    timings["routes"] = time.perf_counter() - phase_started
+
+    if app.config["BACKGROUND_WORKERS"]:
+        start_background_workers(app)
 
-    User.create_initial_users(app)
-    Book.creat_inital_books(app)
+    timings["total"] = time.perf_counter() - started
+    app.extensions["startup_report"] = timings
+    logger.info(
+        "Application created in "
+        + ", ".join(
+            f"{phase} {seconds * 1000:.1f}ms" for phase, seconds in timings.items()
+        )
+    )
 
     return app
+
+
+def start_background_workers(app: Flask) -> None:
+    """
+    Start the outbox workers and the overdue scheduler of `app` in this
+    process, e.g. in a server worker forked from a master that preloaded it.
+    """
+    app.extensions["overdue_scheduler"] = start_overdue_scheduler(app)
+    app.extensions["outbox_workers"] = start_outbox_workers(app)
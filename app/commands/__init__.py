@@ -0,0 +1,19 @@
+from flask import Flask
+
+from app.commands.bootstrap import bootstrap
+from app.commands.images import images_cli
+from app.commands.loans import loans_cli
+from app.commands.outbox import outbox_cli
+from app.commands.replicas import replicas_cli
+from app.commands.search import search_cli
+from app.commands.serve import serve
+
+
+def register_commands(app: Flask) -> None:
+    app.cli.add_command(bootstrap)
+    app.cli.add_command(images_cli)
+    app.cli.add_command(loans_cli)
+    app.cli.add_command(outbox_cli)
+    app.cli.add_command(replicas_cli)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(serve)
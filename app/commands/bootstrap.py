@@ -0,0 +1,75 @@
+import time
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from flask_migrate import stamp, upgrade
+from sqlalchemy import inspect
+
+from app.models import db
+from app.models.books import Book
+from app.models.user import User
+from app.utils.db_lock import advisory_lock
+
+BOOTSTRAP_LOCK = "book_library_bootstrap"
+# The users and books tables as `db.create_all()` made them before migrations.
+BASELINE_REVISION = "0d4c6f8a2e31"
+
+
+def migrate_schema() -> None:
+    """
+    Upgrade the schema to the latest migration. A database created by
+    `db.create_all()` before there were migrations is stamped with the
+    baseline revision first, so only what it lacks gets added.
+    """
+    tables = inspect(db.engine).get_table_names()
+    if "alembic_version" not in tables and "users" in tables:
+        stamp(revision=BASELINE_REVISION)
+    upgrade()
+
+
+@click.command("bootstrap")
+@click.option("--skip-books", is_flag=True, help="Do not seed the book catalog.")
+@click.option(
+    "--offline", is_flag=True, help="Do not download covers (fixtures still apply)."
+)
+@click.option(
+    "--lock-timeout",
+    default=60,
+    show_default=True,
+    help="Seconds to wait for another bootstrap to finish.",
+)
+@with_appcontext
+def bootstrap(skip_books: bool, offline: bool, lock_timeout: int) -> None:
+    """Migrate the schema and create the initial users and books (idempotent)."""
+    app = current_app._get_current_object()
+    if offline:
+        app.config["SEED_OFFLINE"] = True
+
+    timings = {}
+    started = time.perf_counter()
+    with advisory_lock(BOOTSTRAP_LOCK, timeout=lock_timeout):
+        timings["lock"] = time.perf_counter() - started
+
+        phase_started = time.perf_counter()
+        migrate_schema()
+        timings["schema"] = time.perf_counter() - phase_started
+
+        phase_started = time.perf_counter()
+        added_users = User.create_initial_users(app)
+        timings["users"] = time.perf_counter() - phase_started
+
+        added_books = 0
+        if not skip_books:
+            phase_started = time.perf_counter()
+            added_books = Book.creat_inital_books(app).inserted
+            timings["books"] = time.perf_counter() - phase_started
+
+    timings["total"] = time.perf_counter() - started
+    click.echo(f"Added {added_users} users and {added_books} books")
+    click.echo(
+        "Bootstrap timings: "
+        + ", ".join(
+            f"{phase} {seconds * 1000:.0f}ms" for phase, seconds in timings.items()
+        )
+    )
@@ -0,0 +1,23 @@
+import time
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from app.utils.images import backfill_variants, shutdown_executor
+
+images_cli = AppGroup("images", help="Manage book cover image variants.")
+
+
+@images_cli.command("backfill")
+@click.option("--batch-size", default=50, show_default=True, help="Books per batch.")
+def backfill(batch_size: int) -> None:
+    """Render missing or stale cover variants for existing books."""
+    started = time.perf_counter()
+    try:
+        rendered = backfill_variants(current_app, batch_size=batch_size)
+    finally:
+        shutdown_executor()
+    click.echo(
+        f"Rendered variants for {rendered} books in {time.perf_counter() - started:.2f}s"
+    )
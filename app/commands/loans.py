@@ -0,0 +1,50 @@
+import time
+from typing import Optional
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from app.utils.db_lock import LockTimeoutError, advisory_lock
+from app.utils.overdue import OVERDUE_SWEEP_LOCK, sweep_overdue
+
+loans_cli = AppGroup("loans", help="Manage book loans.")
+
+
+@loans_cli.command("sweep-overdue")
+@click.option(
+    "--batch-size",
+    type=int,
+    help="Loans per batch [default: OVERDUE_SWEEP_BATCH_SIZE].",
+)
+@click.option(
+    "--pause",
+    type=float,
+    help="Seconds between batches [default: OVERDUE_SWEEP_PAUSE].",
+)
+@click.option("--dry-run", is_flag=True, help="Count the digests without sending.")
+@click.option(
+    "--lock-timeout",
+    default=0,
+    show_default=True,
+    help="Seconds to wait for a sweep running elsewhere.",
+)
+def sweep(
+    batch_size: Optional[int], pause: Optional[float], dry_run: bool, lock_timeout: int
+) -> None:
+    """Email every borrower one digest of their overdue books."""
+    started = time.perf_counter()
+    try:
+        with advisory_lock(OVERDUE_SWEEP_LOCK, timeout=lock_timeout):
+            report = sweep_overdue(
+                batch_size=batch_size or current_app.config["OVERDUE_SWEEP_BATCH_SIZE"],
+                pause=(
+                    current_app.config["OVERDUE_SWEEP_PAUSE"]
+                    if pause is None
+                    else pause
+                ),
+                dry_run=dry_run,
+            )
+    except LockTimeoutError:
+        raise click.ClickException("Another overdue sweep is already running")
+    click.echo(f"{report.summary()} in {time.perf_counter() - started:.2f}s")
@@ -0,0 +1,38 @@
+import time
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from app.utils.outbox import SmtpSender, outbox_counts, outbox_settings, process_outbox
+
+outbox_cli = AppGroup("outbox", help="Manage the outgoing email queue.")
+
+
+@outbox_cli.command("flush")
+def flush() -> None:
+    """Send every due email now, over a single SMTP connection."""
+    started = time.perf_counter()
+    sender = SmtpSender()
+    total_sent = total_failed = 0
+    try:
+        while True:
+            sent, failed = process_outbox(sender, **outbox_settings(current_app))
+            if not sent and not failed:
+                break
+            total_sent += sent
+            total_failed += failed
+    finally:
+        sender.close()
+    click.echo(
+        f"Sent {total_sent} emails, {total_failed} failed "
+        f"in {time.perf_counter() - started:.2f}s"
+    )
+
+
+@outbox_cli.command("status")
+def status() -> None:
+    """Show how many emails are pending, sent and failed."""
+    click.echo(
+        ", ".join(f"{status} {count}" for status, count in outbox_counts().items())
+    )
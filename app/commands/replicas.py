@@ -0,0 +1,30 @@
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from app.models import db
+from app.utils.db_routing import REPLICA_BIND_PREFIX, measure_replica_lag
+
+replicas_cli = AppGroup("replicas", help="Inspect the read replicas.")
+
+
+@replicas_cli.command("status")
+def status() -> None:
+    """Show the replication lag of every configured replica."""
+    max_lag = current_app.config["DATABASE_REPLICA_MAX_LAG"]
+    replicas = {
+        key: engine
+        for key, engine in db.engines.items()
+        if key and key.startswith(REPLICA_BIND_PREFIX)
+    }
+    if not replicas:
+        click.echo("No read replicas configured; all queries use the primary")
+        return
+    for key, engine in sorted(replicas.items()):
+        lag = measure_replica_lag(engine)
+        state = "unknown" if lag is None else f"{lag:.0f}s behind"
+        healthy = lag is not None and lag <= max_lag
+        click.echo(
+            f"{key} {engine.url.render_as_string(hide_password=True)}: {state} "
+            f"({'in use' if healthy else f'skipped, over {max_lag:.0f}s'})"
+        )
@@ -0,0 +1,127 @@
+import importlib.util
+import os
+import sys
+from typing import Optional
+
+import click
+
+from app.config.server import (
+    SERVER_BIND,
+    SERVER_GRACEFUL_TIMEOUT,
+    SERVER_KEEPALIVE,
+    SERVER_MAX_REQUESTS,
+    SERVER_MAX_REQUESTS_JITTER,
+    SERVER_THREADS,
+    SERVER_TIMEOUT,
+    SERVER_WORKERS,
+)
+
+PROJECT_ROOT = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+GUNICORN_CONFIG = os.path.join(PROJECT_ROOT, "gunicorn.conf.py")
+# The master preloads the app without its background threads; gunicorn.conf.py
+# starts them in every worker after the fork.
+APP_URI = 'app:create_app({"BACKGROUND_WORKERS": False})'
+
+
+@click.command("serve")
+@click.option(
+    "--bind", default=SERVER_BIND, show_default=True, help="Address to listen on."
+)
+@click.option(
+    "--workers", default=SERVER_WORKERS, show_default=True, help="Worker processes."
+)
+@click.option(
+    "--threads",
+    default=SERVER_THREADS,
+    show_default=True,
+    help="Request threads per worker.",
+)
+@click.option(
+    "--timeout",
+    default=SERVER_TIMEOUT,
+    show_default=True,
+    help="Seconds before a silent worker is replaced.",
+)
+@click.option(
+    "--graceful-timeout",
+    default=SERVER_GRACEFUL_TIMEOUT,
+    show_default=True,
+    help="Seconds workers get to finish requests on reload or shutdown.",
+)
+@click.option(
+    "--keep-alive",
+    default=SERVER_KEEPALIVE,
+    show_default=True,
+    help="Seconds to keep an idle client connection open.",
+)
+@click.option(
+    "--max-requests",
+    default=SERVER_MAX_REQUESTS,
+    show_default=True,
+    help="Recycle a worker after this many requests (0: never).",
+)
+@click.option(
+    "--max-requests-jitter",
+    default=SERVER_MAX_REQUESTS_JITTER,
+    show_default=True,
+    help="Random extra requests before recycling, to stagger restarts.",
+)
+@click.option("--pid", "pid_file", help="Write the master's PID here, for signals.")
+def serve(
+    bind: str,
+    workers: int,
+    threads: int,
+    timeout: int,
+    graceful_timeout: int,
+    keep_alive: int,
+    max_requests: int,
+    max_requests_jitter: int,
+    pid_file: Optional[str],
+) -> None:
+    """
+    Serve the app in production: gunicorn with pre-forked workers, each
+    running `--threads` request threads.
+
+    The app is created once in the master and shared copy-on-write with the
+    workers. Send HUP to the master to replace the workers gracefully.
+    """
+    if importlib.util.find_spec("gunicorn") is None:
+        raise click.ClickException("gunicorn is not installed (pip install gunicorn)")
+
+    argv = [
+        sys.executable,
+        "-m",
+        "gunicorn",
+        "--config",
+        GUNICORN_CONFIG,
+        "--chdir",
+        PROJECT_ROOT,
+        "--bind",
+        bind,
+        "--workers",
+        str(workers),
+        "--threads",
+        str(threads),
+        "--timeout",
+        str(timeout),
+        "--graceful-timeout",
+        str(graceful_timeout),
+        "--keep-alive",
+        str(keep_alive),
+        "--max-requests",
+        str(max_requests),
+        "--max-requests-jitter",
+        str(max_requests_jitter),
+    ]
+    if pid_file:
+        argv += ["--pid", pid_file]
+    argv.append(APP_URI)
+
+    click.echo(f"Serving on {bind}: {workers} workers x {threads} threads")
+    sys.stdout.flush()
+    sys.stderr.flush()
+    # gunicorn's master replaces this process: it preloads its own copy of
+    # the app and nothing of the CLI's stays around in the workers.
+    os.execv(sys.executable, argv)
@@ -0,0 +1,48 @@
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Verified HTTP Basic credentials are remembered for a while so repeat requests
+# skip the password KDF. A hit still loads the user by primary key to check the
+# stored hash, so it costs one SELECT. Set the size to 0 to disable the cache.
+BASIC_AUTH_CACHE_SIZE = int(os.environ.get("BASIC_AUTH_CACHE_SIZE", 1024))
+BASIC_AUTH_CACHE_TTL = float(os.environ.get("BASIC_AUTH_CACHE_TTL", 300))
+
+# Stateless JWT mode: the principal is rebuilt from the signed token claims and
+# only the user's token version is checked, against a short-lived in-process
+# cache, so a warm request needs no SQL. Role changes, password changes and
+# deactivation bump the version and revoke older tokens within the TTL.
+JWT_STATELESS = os.environ.get("JWT_STATELESS", "false").lower() in ("1", "true", "yes")
+JWT_TOKEN_VERSION_CACHE_SIZE = int(os.environ.get("JWT_TOKEN_VERSION_CACHE_SIZE", 4096))
+JWT_TOKEN_VERSION_TTL = float(os.environ.get("JWT_TOKEN_VERSION_TTL", 30))
+
+# Token buckets in front of every password check (POST /auth/login and HTTP
+# Basic requests the credential cache cannot answer), one per client IP and
+# one per username: BURST attempts at once, refilled at PER_MINUTE. Attempts
+# are charged before the KDF runs and refunded when the password was right,
+# so only failures use up a bucket. While a username's bucket is empty its
+# password cannot be checked, but its JWTs and cached Basic credentials keep
+# working. Set AUTH_RATE_LIMIT_STORAGE_URL to a redis:// URL (needs the
+# `redis` package) to share the buckets between workers; by default each
+# process keeps its own.
+AUTH_RATE_LIMIT_ENABLED = os.environ.get("AUTH_RATE_LIMIT_ENABLED", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+AUTH_RATE_LIMIT_IP_BURST = int(os.environ.get("AUTH_RATE_LIMIT_IP_BURST", 30))
+AUTH_RATE_LIMIT_IP_PER_MINUTE = float(
+    os.environ.get("AUTH_RATE_LIMIT_IP_PER_MINUTE", 60)
+)
+AUTH_RATE_LIMIT_USER_BURST = int(os.environ.get("AUTH_RATE_LIMIT_USER_BURST", 10))
+AUTH_RATE_LIMIT_USER_PER_MINUTE = float(
+    os.environ.get("AUTH_RATE_LIMIT_USER_PER_MINUTE", 10)
+)
+AUTH_RATE_LIMIT_STORAGE_URL = os.environ.get("AUTH_RATE_LIMIT_STORAGE_URL", "")
+# Number of trusted reverse proxies in front of the app: the client IP is taken
+# that many entries from the right of X-Forwarded-For (0: the socket address).
+AUTH_RATE_LIMIT_PROXY_HOPS = int(os.environ.get("AUTH_RATE_LIMIT_PROXY_HOPS", 0))
+# Buckets kept per process; the least recently used are dropped beyond this.
+AUTH_RATE_LIMIT_MAX_KEYS = int(os.environ.get("AUTH_RATE_LIMIT_MAX_KEYS", 100000))
@@ -0,0 +1,11 @@
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Server-side cache of GET /books/ responses, one per worker. Entries are keyed
+# on the catalog version, which lives in the database, so a write in any worker
+# invalidates them immediately; the TTL only bounds their memory.
+CATALOG_CACHE_SIZE = int(os.environ.get("CATALOG_CACHE_SIZE", 512))
+CATALOG_CACHE_TTL = float(os.environ.get("CATALOG_CACHE_TTL", 30))
@@ -7,3 +7,30 @@ load_dotenv()
 SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URI")
 SQLALCHEMY_TRACK_MODIFICATIONS = False
 SECRET_KEY = os.getenv("SECRET_KEY")
+
+# Connection pool of every engine (ignored for SQLite, which manages its own).
+SQLALCHEMY_POOL_SIZE = int(os.getenv("SQLALCHEMY_POOL_SIZE", 10))
+SQLALCHEMY_MAX_OVERFLOW = int(os.getenv("SQLALCHEMY_MAX_OVERFLOW", 20))
+SQLALCHEMY_POOL_TIMEOUT = float(os.getenv("SQLALCHEMY_POOL_TIMEOUT", 10))
+# Recycle connections before MySQL's wait_timeout closes them server side.
+SQLALCHEMY_POOL_RECYCLE = int(os.getenv("SQLALCHEMY_POOL_RECYCLE", 1800))
+# Test connections on checkout so dropped ones are replaced instead of failing.
+SQLALCHEMY_POOL_PRE_PING = os.getenv("SQLALCHEMY_POOL_PRE_PING", "true") == "true"
+
+# Comma-separated read replica URIs. Read-only endpoints query a replica whose
+# lag is at most DATABASE_REPLICA_MAX_LAG seconds (checked every
+# DATABASE_REPLICA_LAG_CHECK_INTERVAL seconds); everything else uses the primary.
+DATABASE_REPLICA_URIS = [
+    uri.strip()
+    for uri in os.getenv("DATABASE_REPLICA_URIS", "").split(",")
+    if uri.strip()
+]
+DATABASE_REPLICA_MAX_LAG = float(os.getenv("DATABASE_REPLICA_MAX_LAG", 5))
+DATABASE_REPLICA_LAG_CHECK_INTERVAL = float(
+    os.getenv("DATABASE_REPLICA_LAG_CHECK_INTERVAL", 10)
+)
+
+# Per-endpoint SQL statement budgets (see app/utils/query_budget.py): "off",
+# "warn" to log requests that exceed their budget with the stack of every
+# statement, or "raise" to fail them (development and the budget tests).
+QUERY_BUDGET_MODE = os.getenv("QUERY_BUDGET_MODE", "off").lower()
@@ -8,3 +8,20 @@ SMTP_SERVER = os.environ.get("SMTP_SERVER")
 SMTP_PORT = os.environ.get("SMTP_PORT")
 SMTP_PASSWORD = os.environ.get("SMTP_PASSWORD")
 SMTP_EMAIL = os.environ.get("SMTP_EMAIL")
+# Plain SMTP (e.g. a local stand-in) when false; login is skipped when
+# SMTP_PASSWORD is empty.
+SMTP_STARTTLS = os.environ.get("SMTP_STARTTLS", "true").lower() in ("1", "true", "yes")
+SMTP_TIMEOUT = float(os.environ.get("SMTP_TIMEOUT", 10))
+
+# Outgoing mail is written to the email_outbox table and delivered by
+# OUTBOX_WORKERS background threads per process (0 to only deliver through
+# `flask outbox flush`). Each worker keeps its SMTP connection open and sends up
+# to OUTBOX_BATCH_SIZE messages per claim; failed messages are retried with
+# exponential backoff starting at OUTBOX_RETRY_DELAY seconds, up to
+# OUTBOX_MAX_ATTEMPTS times.
+OUTBOX_WORKERS = int(os.environ.get("OUTBOX_WORKERS", 2))
+OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", 50))
+OUTBOX_POLL_INTERVAL = float(os.environ.get("OUTBOX_POLL_INTERVAL", 5))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", 8))
+OUTBOX_RETRY_DELAY = float(os.environ.get("OUTBOX_RETRY_DELAY", 30))
+OUTBOX_LEASE = float(os.environ.get("OUTBOX_LEASE", 300))
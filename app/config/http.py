@@ -0,0 +1,16 @@
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# JSON responses of at least this many bytes are compressed when the client
+# accepts it: brotli if the optional `brotli` package is installed and
+# preferred by the client, gzip otherwise.
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", 1024))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get("COMPRESSION_GZIP_LEVEL", 6))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get("COMPRESSION_BROTLI_QUALITY", 5))
+# Compressed bodies are cached by encoding and body digest, so repeated hits
+# on the same page are only compressed once.
+COMPRESSION_CACHE_SIZE = int(os.environ.get("COMPRESSION_CACHE_SIZE", 256))
+COMPRESSION_CACHE_TTL = float(os.environ.get("COMPRESSION_CACHE_TTL", 300))
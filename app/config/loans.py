@@ -0,0 +1,13 @@
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Overdue-loan sweeper: loans are scanned in batches of OVERDUE_SWEEP_BATCH_SIZE
+# with OVERDUE_SWEEP_PAUSE seconds between batches so a large sweep never
+# monopolises the database. OVERDUE_SWEEP_INTERVAL > 0 also runs the sweep every
+# that many seconds inside the web process (0 disables the scheduler).
+OVERDUE_SWEEP_BATCH_SIZE = int(os.environ.get("OVERDUE_SWEEP_BATCH_SIZE", 500))
+OVERDUE_SWEEP_PAUSE = float(os.environ.get("OVERDUE_SWEEP_PAUSE", 0.2))
+OVERDUE_SWEEP_INTERVAL = float(os.environ.get("OVERDUE_SWEEP_INTERVAL", 0))
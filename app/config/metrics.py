@@ -0,0 +1,26 @@
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Request, SQL and auth metrics, served in the Prometheus text format at
+# /metrics. Recording only touches per-thread state, so it costs a few
+# microseconds per request; set METRICS_ENABLED=false to remove it entirely.
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+# /metrics answers only requests with `Authorization: Bearer <METRICS_TOKEN>`;
+# without a token it is not served at all (404), so nothing is exposed by
+# default.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+# Upper bounds (seconds) of the latency histogram buckets.
+METRICS_LATENCY_BUCKETS = tuple(
+    float(bound)
+    for bound in os.environ.get(
+        "METRICS_LATENCY_BUCKETS",
+        "0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10",
+    ).split(",")
+)
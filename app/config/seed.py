@@ -0,0 +1,13 @@
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Directory with local cover fixtures named `<isbn>.<ext>`; when set, covers are
+# read from it first and only missing ones are downloaded.
+SEED_COVERS_DIR = os.environ.get("SEED_COVERS_DIR")
+# Skip cover downloads entirely (fixtures are still used when configured).
+SEED_OFFLINE = os.environ.get("SEED_OFFLINE", "false").lower() in ("1", "true", "yes")
+SEED_FETCH_WORKERS = int(os.environ.get("SEED_FETCH_WORKERS", 8))
+SEED_FETCH_TIMEOUT = float(os.environ.get("SEED_FETCH_TIMEOUT", 10))
@@ -0,0 +1,33 @@
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# `flask serve`: gunicorn with pre-forked worker processes, each running
+# SERVER_THREADS request threads. Processes scale CPU-bound work such as
+# password hashing past the GIL; threads overlap requests waiting on the
+# database. Keep SQLALCHEMY_POOL_SIZE + SQLALCHEMY_MAX_OVERFLOW at or above
+# the thread count, since every thread may hold a connection.
+SERVER_BIND = os.environ.get("SERVER_BIND", "0.0.0.0:5000")
+SERVER_WORKERS = int(os.environ.get("SERVER_WORKERS", os.cpu_count() or 1))
+SERVER_THREADS = int(os.environ.get("SERVER_THREADS", 4))
+# Seconds a worker may stay silent before it is killed and replaced, and how
+# long workers get to finish in-flight requests on reload or shutdown.
+SERVER_TIMEOUT = int(os.environ.get("SERVER_TIMEOUT", 30))
+SERVER_GRACEFUL_TIMEOUT = int(os.environ.get("SERVER_GRACEFUL_TIMEOUT", 30))
+SERVER_KEEPALIVE = int(os.environ.get("SERVER_KEEPALIVE", 5))
+# Recycle a worker after this many requests (0: never), plus a random jitter so
+# the workers do not all restart at once.
+SERVER_MAX_REQUESTS = int(os.environ.get("SERVER_MAX_REQUESTS", 10000))
+SERVER_MAX_REQUESTS_JITTER = int(os.environ.get("SERVER_MAX_REQUESTS_JITTER", 1000))
+
+# Whether create_app starts the outbox workers and the overdue scheduler.
+# `flask serve` turns this off for the preloaded app in the master process and
+# starts them in every worker after the fork instead, since threads do not
+# survive a fork.
+BACKGROUND_WORKERS = os.environ.get("BACKGROUND_WORKERS", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
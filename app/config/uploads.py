@@ -8,3 +8,24 @@ ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "gif"}
 UPLOAD_FOLDER = os.path.join(
     os.path.dirname(__file__), "..", os.environ.get("UPLOAD_FOLDER", "uploads")
 )
+
+# Cache-Control policy sent with book cover images. Covers are validated with a
+# content ETag, so a long max-age only delays picking up a replaced cover.
+IMAGE_CACHE_CONTROL = os.environ.get("IMAGE_CACHE_CONTROL", "public, max-age=86400")
+
+# Cover derivatives: widths (px) of the pre-rendered variants served through
+# `/books/<id>/image?size=`, their encoding, and the size of the process pool
+# that renders them.
+IMAGE_VARIANT_WIDTHS = tuple(
+    int(width)
+    for width in os.environ.get("IMAGE_VARIANT_WIDTHS", "64,256,800").split(",")
+    if width.strip()
+)
+IMAGE_VARIANT_FORMAT = os.environ.get("IMAGE_VARIANT_FORMAT", "WEBP")
+IMAGE_VARIANT_QUALITY = int(os.environ.get("IMAGE_VARIANT_QUALITY", 80))
+IMAGE_VARIANT_WORKERS = int(os.environ.get("IMAGE_VARIANT_WORKERS", 2))
+
+# POST /books/bulk: rows inserted (and committed) per batch, and the maximum
+# number of per-row errors echoed back in the import report.
+BULK_IMPORT_BATCH_SIZE = int(os.environ.get("BULK_IMPORT_BATCH_SIZE", 1000))
+BULK_IMPORT_MAX_ERRORS = int(os.environ.get("BULK_IMPORT_MAX_ERRORS", 1000))
@@ -1,3 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
 
-db = SQLAlchemy()
\ No newline at end of file
+from app.utils.db_routing import RoutingSession
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
@@ -1,9 +1,21 @@
+from datetime import datetime
+import hashlib
 import logging
-import requests
+from typing import TYPE_CHECKING, Optional
+
 from flask import Flask
+from flask_sqlalchemy.query import Query
 from app.models import db
+from app.models.search import BookSearchPosting
+from app.utils.files import sniff_image_mime_type
+from app.utils.filters import prefix_string, text_match
+from app.utils.request_memo import get_for_request
+from sqlalchemy import false, update
 from sqlalchemy.dialects.mysql import LONGBLOB
 
+if TYPE_CHECKING:
+    from app.utils.seeding import SeedReport
+
 
 # Correct the logging level
 logging.basicConfig(level=logging.INFO)
@@ -12,15 +24,32 @@ logger = logging.getLogger(__name__)
 
 class Book(db.Model):
     __tablename__ = "books"
+    # Overdue sweeps are a range scan: lent books ordered by due date.
+    __table_args__ = (
+        db.Index("ix_books_available_borrowed_until", "available", "borrowed_until"),
+    )
     id = db.Column(db.Integer, primary_key=True)
-    title = db.Column(db.String(120), nullable=False)
-    author = db.Column(db.String(80), nullable=False)
+    title = db.Column(prefix_string(120), nullable=False, index=True)
+    author = db.Column(prefix_string(80), nullable=False, index=True)
     description = db.Column(db.Text, nullable=False)
-    image = db.Column(LONGBLOB, nullable=True)  # Store image as binary data
+    # Store image as binary data. Deferred so catalog queries never pull the
+    # blob; only the image endpoint undefers it.
+    image = db.deferred(
+        db.Column(db.LargeBinary().with_variant(LONGBLOB, "mysql"), nullable=True)
+    )
+    image_size = db.Column(db.Integer, nullable=True)
+    image_mime_type = db.Column(db.String(64), nullable=True)
+    image_hash = db.Column(db.String(64), nullable=True)  # sha256 hex digest
+    has_image = db.Column(db.Boolean, nullable=False, default=False)
+    image_updated_at = db.Column(db.DateTime, nullable=True)
     isbn = db.Column(db.String(13), unique=True, nullable=False)
     available = db.Column(db.Boolean, default=True)
-    borrowed_by = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
+    borrowed_by = db.Column(
+        db.Integer, db.ForeignKey("users.id"), nullable=True, index=True
+    )
     borrowed_until = db.Column(db.DateTime, nullable=True)
+    # Set once the borrower was told the loan is overdue; cleared per loan.
+    overdue_notified_at = db.Column(db.DateTime, nullable=True)
 
     def to_dict(self):
         return {
@@ -39,7 +68,127 @@ class Book(db.Model):
         }
 
     @staticmethod
-    def creat_inital_books(app: Flask) -> None:
+    def load_book(book_id: int) -> Optional["Book"]:
+        return get_for_request(Book, int(book_id))
+
+    @staticmethod
+    def apply_filters(
+        query: Query,
+        title: Optional[str] = None,
+        author: Optional[str] = None,
+        description: Optional[str] = None,
+        match: str = "contains",
+    ) -> Query:
+        """
+        Apply the catalog listing filters shared by list and export.
+
+        Title and author match anywhere in the value, or only at its start (an
+        index range scan) with `match="prefix"`; description matches by words
+        through the full-text index. Raises ValueError for an unknown `match`.
+        """
+        from app.utils.search import tokenize
+
+        if title:
+            query = query.filter(text_match(Book.title, title, match))
+        if author:
+            query = query.filter(text_match(Book.author, author, match))
+        if description:
+            terms = tokenize(description)
+            # Only stop words (e.g. "the") match nothing rather than
+            # silently dropping the filter.
+            query = query.filter(
+                Book.id.in_(BookSearchPosting.books_matching_all(terms))
+                if terms
+                else false()
+            )
+        return query
+
+    @staticmethod
+    def borrow(book_id: int, user_id: int, borrowed_until: datetime) -> bool:
+        """
+        Lend a book with a single conditional UPDATE; the caller commits.
+
+        Returns False when the book is not available (or does not exist), so
+        of two concurrent borrowers exactly one wins without locking the row
+        beforehand.
+        """
+        result = db.session.execute(
+            update(Book)
+            .where(Book.id == book_id, Book.available.is_(True))
+            .values(
+                available=False,
+                borrowed_by=user_id,
+                borrowed_until=borrowed_until,
+                overdue_notified_at=None,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+
+    @staticmethod
+    def give_back(book_id: int, user_id: Optional[int] = None) -> bool:
+        """
+        Return a lent book with a single conditional UPDATE; the caller commits.
+
+        With `user_id` only that borrower may return it. Returns False when the
+        book is not lent out (to that user).
+        """
+        statement = (
+            update(Book)
+            .where(Book.id == book_id, Book.available.is_(False))
+            .values(
+                available=True,
+                borrowed_by=None,
+                borrowed_until=None,
+                overdue_notified_at=None,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if user_id is not None:
+            statement = statement.where(Book.borrowed_by == user_id)
+        result = db.session.execute(statement)
+        return result.rowcount == 1
+
+    def set_image(self, image_data: Optional[bytes]) -> None:
+        """Store the image bytes together with their metadata columns."""
+        self.image = image_data
+        if image_data:
+            self.image_size = len(image_data)
+            self.image_mime_type = (
+                sniff_image_mime_type(image_data) or "application/octet-stream"
+            )
+            self.image_hash = hashlib.sha256(image_data).hexdigest()
+            self.has_image = True
+            self.image_updated_at = datetime.utcnow().replace(microsecond=0)
+        else:
+            self.image_size = None
+            self.image_mime_type = None
+            self.image_hash = None
+            self.has_image = False
+            self.image_updated_at = None
+
+    @staticmethod
+    def read_image(
+        book_id: int, start: int = 0, length: Optional[int] = None
+    ) -> Optional[bytes]:
+        """
+        Read the image bytes of a book, or only `length` bytes from `start`.
+
+        Ranges are cut in the database with SUBSTR so a partial request never
+        transfers the whole blob.
+        """
+        if length is not None:
+            column = db.func.substr(Book.image, start + 1, length)
+        elif start:
+            column = db.func.substr(Book.image, start + 1)
+        else:
+            column = Book.image
+        return db.session.query(column).filter(Book.id == book_id).scalar()
+
+    @staticmethod
+    def creat_inital_books(app: Flask) -> "SeedReport":
+        from app.utils.seeding import seed_books
+
         books = [
             {
                 "title": "To Kill a Mockingbird",
@@ -177,30 +326,65 @@ class Book(db.Model):
         ]
 
         with app.app_context():
-            db.create_all()
-            for book_data in books:
-                existing_book = Book.query.filter_by(isbn=book_data["isbn"]).first()
-                if not existing_book:
-                    try:
-                        # Download the image and store it as binary
-                        headers = {
-                            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-                        }
-                        response = requests.get(book_data["image"], headers=headers)
-                        response.raise_for_status()
-                        image_binary = response.content
-
-                        new_book = Book(
-                            title=book_data["title"],
-                            author=book_data["author"],
-                            isbn=book_data["isbn"],
-                            description=book_data["description"],
-                            image=image_binary,
-                        )
-                        db.session.add(new_book)
-                        db.session.commit()
-                        logging.info(f"Added book: {book_data['title']}")
-                    except requests.RequestException as e:
-                        logging.info(
-                            f"Failed to download image for {book_data['title']}: {e}"
-                        )
+            return seed_books(
+                books,
+                covers_dir=app.config.get("SEED_COVERS_DIR"),
+                offline=app.config.get("SEED_OFFLINE", False),
+                max_workers=app.config.get("SEED_FETCH_WORKERS", 8),
+                timeout=app.config.get("SEED_FETCH_TIMEOUT", 10.0),
+            )
+
+
+class BookImageVariant(db.Model):
+    """A resized, re-encoded copy of a book cover at a fixed width."""
+
+    __tablename__ = "book_image_variants"
+    book_id = db.Column(
+        db.Integer, db.ForeignKey("books.id", ondelete="CASCADE"), primary_key=True
+    )
+    width = db.Column(db.Integer, primary_key=True)
+    image = db.deferred(
+        db.Column(db.LargeBinary().with_variant(LONGBLOB, "mysql"), nullable=False)
+    )
+    image_size = db.Column(db.Integer, nullable=False)
+    image_mime_type = db.Column(db.String(64), nullable=False)
+    image_hash = db.Column(db.String(64), nullable=False)
+    # `Book.image_hash` of the original this variant was rendered from; a
+    # variant whose source hash no longer matches the book is stale.
+    source_hash = db.Column(db.String(64), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
+
+    @staticmethod
+    def create_variant(
+        book_id: int, width: int, image_data: bytes, source_hash: str
+    ) -> "BookImageVariant":
+        return BookImageVariant(
+            book_id=book_id,
+            width=width,
+            image=image_data,
+            image_size=len(image_data),
+            image_mime_type=sniff_image_mime_type(image_data)
+            or "application/octet-stream",
+            image_hash=hashlib.sha256(image_data).hexdigest(),
+            source_hash=source_hash,
+            created_at=datetime.utcnow().replace(microsecond=0),
+        )
+
+    @staticmethod
+    def read_image(
+        book_id: int, width: int, start: int = 0, length: Optional[int] = None
+    ) -> Optional[bytes]:
+        """Read the bytes of a variant, or only `length` bytes from `start`."""
+        if length is not None:
+            column = db.func.substr(BookImageVariant.image, start + 1, length)
+        elif start:
+            column = db.func.substr(BookImageVariant.image, start + 1)
+        else:
+            column = BookImageVariant.image
+        return (
+            db.session.query(column)
+            .filter(
+                BookImageVariant.book_id == book_id, BookImageVariant.width == width
+            )
+            .scalar()
+        )
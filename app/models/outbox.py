@@ -0,0 +1,52 @@
+from datetime import datetime
+from enum import Enum
+
+from app.models import db
+
+
+class EmailStatus(Enum):
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+
+
+class EmailOutbox(db.Model):
+    """One outgoing email, delivered asynchronously by the outbox workers."""
+
+    __tablename__ = "email_outbox"
+    # Workers poll for due pending messages in one index range scan.
+    __table_args__ = (
+        db.Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    to_email = db.Column(db.String(255), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    # Rendered HTML; cleared once delivered or given up on, since it may carry
+    # credentials.
+    body = db.Column(db.Text, nullable=True)
+    status = db.Column(
+        db.Enum(EmailStatus), nullable=False, default=EmailStatus.PENDING
+    )
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # Random token of the worker currently holding the message; its claim
+    # expires when `next_attempt_at` passes.
+    claimed_by = db.Column(db.String(32), nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    @staticmethod
+    def enqueue(to_email: str, subject: str, body: str) -> "EmailOutbox":
+        """Add a message to the outbox in the current session; the caller commits."""
+        message = EmailOutbox(
+            to_email=to_email,
+            subject=subject,
+            body=body,
+            status=EmailStatus.PENDING,
+            attempts=0,
+            next_attempt_at=datetime.utcnow(),
+        )
+        db.session.add(message)
+        return message
@@ -0,0 +1,39 @@
+from sqlalchemy import Select, func, select
+
+from app.models import db
+
+
+class BookSearchDocument(db.Model):
+    """Per-book statistics of the full-text index (weighted document length)."""
+
+    __tablename__ = "book_search_documents"
+    book_id = db.Column(
+        db.Integer, db.ForeignKey("books.id", ondelete="CASCADE"), primary_key=True
+    )
+    length = db.Column(db.Float, nullable=False)
+
+
+class BookSearchPosting(db.Model):
+    """One inverted-index entry: `term` occurs in `book_id` with `frequency`."""
+
+    __tablename__ = "book_search_postings"
+    # (term, book_id) primary key: a term lookup is a single index range scan.
+    term = db.Column(db.String(64), primary_key=True)
+    book_id = db.Column(
+        db.Integer,
+        db.ForeignKey("books.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
+    )
+    frequency = db.Column(db.Float, nullable=False)  # field-weighted term frequency
+
+    @staticmethod
+    def books_matching_all(terms: list[str]) -> Select:
+        """Select the ids of the books whose index contains every one of `terms`."""
+        terms = list(dict.fromkeys(terms))
+        return (
+            select(BookSearchPosting.book_id)
+            .where(BookSearchPosting.term.in_(terms))
+            .group_by(BookSearchPosting.book_id)
+            .having(func.count() == len(terms))
+        )
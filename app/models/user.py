@@ -2,11 +2,19 @@ from enum import Enum
 import logging
 import secrets
 import string
+from typing import Optional
 
 from flask import Flask
 from flask_login import UserMixin
+from flask_sqlalchemy.query import Query
 
 from app.models import db
+from app.utils.credential_cache import invalidate_user_credentials
+from app.utils.filters import prefix_string, text_match
+from app.utils.metrics import timed
+from app.utils.request_memo import get_for_request
+from app.utils.token_versions import invalidate_token_version
+from app.utils.versions import USERS, bump_version
 from werkzeug.security import generate_password_hash, check_password_hash
 
 # Correct the logging level
@@ -25,11 +33,14 @@ class User(db.Model, UserMixin):
     __tablename__ = "users"
 
     id = db.Column(db.Integer, primary_key=True)
-    full_name = db.Column(db.String(255), nullable=False)
-    email = db.Column(db.String(255), nullable=False)
-    username = db.Column(db.String(80), unique=True, nullable=False)
+    full_name = db.Column(prefix_string(255), nullable=False, index=True)
+    email = db.Column(prefix_string(255), nullable=False, index=True)
+    username = db.Column(prefix_string(80), unique=True, nullable=False)
     password = db.Column(db.String(255), nullable=False)
-    role = db.Column(db.Enum(UserRole), nullable=False)
+    role = db.Column(db.Enum(UserRole), nullable=False, index=True)
+    is_active = db.Column(db.Boolean, nullable=False, default=True)
+    # Embedded in every issued JWT; bumping it revokes all older tokens.
+    token_version = db.Column(db.Integer, nullable=False, default=0)
 
     def to_dict(self):
         return {
@@ -39,6 +50,61 @@ class User(db.Model, UserMixin):
             "role": self.role.value,
         }
 
+    @staticmethod
+    def apply_filters(
+        query: Query,
+        username: Optional[str] = None,
+        email: Optional[str] = None,
+        role: Optional[str] = None,
+        full_name: Optional[str] = None,
+        match: str = "contains",
+    ) -> Query:
+        """
+        Apply the user listing filters: the text columns match anywhere in the
+        value, or only at its start (an index range scan) with
+        `match="prefix"`, and the role exactly. Raises ValueError for an
+        unknown role or `match`.
+        """
+        if username:
+            query = query.filter(text_match(User.username, username, match))
+        if email:
+            query = query.filter(text_match(User.email, email, match))
+        if role:
+            query = query.filter(User.role == UserRole(role.lower()))
+        if full_name:
+            query = query.filter(text_match(User.full_name, full_name, match))
+        return query
+
+    @staticmethod
+    def from_identity(identity: dict) -> "User":
+        """
+        Build a transient (never persisted) user from the `to_dict()` identity
+        carried in a JWT, for stateless request authentication.
+        """
+        return User(
+            id=identity["id"],
+            full_name=identity["full_name"],
+            username=identity["username"],
+            role=UserRole(identity["role"]),
+            is_active=True,
+        )
+
+    def revoke_tokens(self) -> None:
+        """
+        Invalidate every JWT issued to this user so far. The caller commits,
+        then calls `forget_cached_auth`.
+        """
+        self.token_version = (self.token_version or 0) + 1
+
+    @staticmethod
+    def forget_cached_auth(user_id: int) -> None:
+        """
+        Drop the cached credentials and token version of a user. Call after
+        the commit, or another request may cache the old state again.
+        """
+        invalidate_user_credentials(user_id)
+        invalidate_token_version(user_id)
+
     @staticmethod
     def generate_random_password(length: int = 8) -> str:
         characters = string.ascii_letters + string.digits + string.punctuation
@@ -46,13 +112,19 @@ class User(db.Model, UserMixin):
 
     @staticmethod
     def check_password(password_hash: str, password: str) -> bool:
-        return check_password_hash(password_hash, password)
+        with timed("password_hash_seconds", operation="verify"):
+            return check_password_hash(password_hash, password)
+
+    @staticmethod
+    def hash_password(password: str) -> str:
+        with timed("password_hash_seconds", operation="hash"):
+            return generate_password_hash(password)
 
     @staticmethod
     def create_user(
         full_name: str, username: str, email: str, password: str, role: UserRole
     ) -> "User":
-        hashed_password = generate_password_hash(password)
+        hashed_password = User.hash_password(password)
         return User(
             full_name=full_name,
             username=username,
@@ -63,10 +135,12 @@ class User(db.Model, UserMixin):
 
     @staticmethod
     def update_user_as_admin(user: "User", data: dict) -> "User":
+        if "password" in data or "role" in data:
+            user.revoke_tokens()
         if "password" in data:
-            data["password"] = generate_password_hash(data["password"])
+            user.password = User.hash_password(data["password"])
         if "role" in data:
-            data["role"] = UserRole(data["role"])
+            role = UserRole(data["role"])
         if "full_name" in data:
             user.full_name = data["full_name"]
         if "username" in data:
@@ -74,13 +148,14 @@ class User(db.Model, UserMixin):
         if "email" in data:
             user.email = data["email"]
         if "role" in data:
-            user.role = data["role"]
+            user.role = role
         return user
 
     @staticmethod
     def update_user_as_user(user: "User", data: dict) -> "User":
         if "password" in data:
-            data["password"] = generate_password_hash(data["password"])
+            user.revoke_tokens()
+            user.password = User.hash_password(data["password"])
         if "full_name" in data:
             user.full_name = data["full_name"]
         if "username" in data:
@@ -91,10 +166,10 @@ class User(db.Model, UserMixin):
 
     @staticmethod
     def load_user(user_id: int) -> "User":
-        return User.query.get(int(user_id))
+        return get_for_request(User, int(user_id))
 
     @staticmethod
-    def create_initial_users(app):
+    def create_initial_users(app: Flask) -> int:
         """Create initial users if they do not already exist."""
         users = [
             {
@@ -247,19 +322,31 @@ class User(db.Model, UserMixin):
         ]
 
         with app.app_context():
-            db.create_all()
+            # One query for all seed emails; only missing users pay for the
+            # (deliberately slow) password hashing.
+            existing_emails = {
+                email
+                for (email,) in db.session.query(User.email).filter(
+                    User.email.in_([user_data["email"] for user_data in users])
+                )
+            }
+            new_users = []
             for user_data in users:
-                existing_user = User.query.filter_by(email=user_data["email"]).first()
-                if not existing_user:
-                    new_user = User.create_user(
+                if user_data["email"] in existing_emails:
+                    logger.info(f"user '{user_data['full_name']}' already exists.")
+                    continue
+                new_users.append(
+                    User.create_user(
                         full_name=user_data["full_name"],
                         username=user_data["username"],
                         email=user_data["email"],
                         role=user_data["role"],
                         password=user_data["password"],
                     )
-                    db.session.add(new_user)
-                    db.session.commit()
-                    logger.info(f"Added user: {user_data['full_name']}")
-                else:
-                    logger.info(f"user '{user_data['full_name']}' already exists.")
+                )
+                logger.info(f"Added user: {user_data['full_name']}")
+            if new_users:
+                db.session.add_all(new_users)
+                bump_version(USERS)
+                db.session.commit()
+            return len(new_users)
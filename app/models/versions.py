@@ -0,0 +1,12 @@
+from app.models import db
+
+
+class DataVersion(db.Model):
+    """
+    Version counter of one kind of data ("catalog", ...), shared by every
+    worker. Write paths bump it in the transaction that changes the data.
+    """
+
+    __tablename__ = "data_versions"
+    name = db.Column(db.String(32), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
@@ -7,6 +7,11 @@ from app.routes.books import books_ns
 
 
 def register_routes(api: Api, app: Flask) -> None:
+    # `api` is shared by every app built in this process (tests, benchmarks):
+    # the namespaces are added once and `api.init_app` replays their resources
+    # onto each new app.
+    if auth_ns in api.namespaces:
+        return
     api.add_namespace(auth_ns, path="/auth")
     api.add_namespace(users_ns, path="/users")
     api.add_namespace(books_ns, path="/books")
@@ -6,7 +6,14 @@ from flask import request
 
 from app.models.user import UserRole
 from app.schemas.user_schema import user_login_response_schema, user_login_schema
-from app.utils.auth_utils import auth_required, generate_token, verify_user_basic
+from app.utils.auth_utils import (
+    auth_required,
+    generate_token,
+    too_many_attempts,
+    verify_user_basic,
+)
+from app.utils.query_budget import query_budget
+from app.utils.rate_limit import RateLimitExceeded
 
 # Correct the logging level
 logging.basicConfig(level=logging.INFO)
@@ -21,13 +28,18 @@ class Login(Resource):
     @auth_ns.response(HTTPStatus.OK, "Login successful", user_login_response_schema)
     @auth_ns.response(HTTPStatus.UNAUTHORIZED, "Unauthorized")
     @auth_ns.response(HTTPStatus.BAD_REQUEST, "Invalid input")
+    @auth_ns.response(HTTPStatus.TOO_MANY_REQUESTS, "Too many failed attempts")
+    @query_budget(1)
     def post(self) -> tuple[dict, int]:
         """Log in a user and generate an authentication token."""
         data = request.json
         username = data.get("username")
         password = data.get("password")
 
-        user = verify_user_basic(username, password)
+        try:
+            user = verify_user_basic(username, password)
+        except RateLimitExceeded as e:
+            return too_many_attempts(e)
         if not user:
             return {"message": "Invalid username or password"}, HTTPStatus.UNAUTHORIZED
 
@@ -1,14 +1,18 @@
+import csv
 from datetime import datetime
 from http import HTTPStatus
 import logging
 import mimetypes
 import os
+from functools import partial
+from typing import Callable, Optional
 from flask_restx import Namespace, Resource
-from flask import Response, g, request
+from flask import Response, current_app, g, request, stream_with_context
+from werkzeug.datastructures import ContentRange
+from werkzeug.http import is_resource_modified
 
-from app.models.books import Book
+from app.models.books import Book, BookImageVariant
 from app.models import db
-from app.models.user import User
 
 from app.schemas.book_schema import (
     book_list_schema,
@@ -18,11 +22,31 @@ from app.schemas.book_schema import (
     book_request_schema_parser,
     book_query_parser,
     book_borrow_model,
+    book_search_parser,
+    book_search_schema,
+    book_image_parser,
+    book_bulk_import_schema,
+    book_export_parser,
 )
 from app.models.user import UserRole
 
 from app.utils.auth_utils import auth_required
+from app.utils.bulk_import import import_books, iter_csv_rows, iter_ndjson_rows
+from app.utils.db_routing import read_only
+from app.utils.export import iter_csv, iter_export_rows, iter_ndjson
 from app.utils.files import is_allowed_file
+from app.utils.http_cache import (
+    is_not_modified,
+    not_modified_response,
+    version_etag,
+)
+from app.utils.images import remove_variants, schedule_variants
+from app.utils.pagination import InvalidCursorError, keyset_paginate
+from app.utils.query_budget import query_budget
+from app.utils.response_cache import catalog_cache_key, catalog_response_cache
+from app.utils.search import index_book, remove_book, search_books
+from app.utils.serializers import BOOK_COLUMNS, book_dicts, encode_json, json_response
+from app.utils.versions import CATALOG, bump_version
 
 # Correct the logging level
 logging.basicConfig(level=logging.INFO)
@@ -36,6 +60,9 @@ class BooksList(Resource):
 
     @books_ns.expect(book_query_parser, validate=True)
     @books_ns.response(HTTPStatus.OK, "Books retrieved", book_list_schema)
+    @books_ns.response(HTTPStatus.NOT_MODIFIED, "Cached page is still valid")
+    @read_only
+    @query_budget(3)
     def get(self) -> Response:
         """Retrieve a list of books with pagination and filtering."""
         page = request.args.get("page", 1, type=int)
@@ -43,26 +70,61 @@ class BooksList(Resource):
         title = request.args.get("title", type=str)
         author = request.args.get("author", type=str)
         description = request.args.get("description", type=str)
-
-        query = Book.query
-        if title:
-            query = query.filter(Book.title.ilike(f"%{title}%"))
-        if author:
-            query = query.filter(Book.author.ilike(f"%{author}%"))
-        if description:
-            query = query.filter(Book.genre.ilike(f"%{description}%"))
+        match = request.args.get("match", "contains", type=str)
+        after = request.args.get("after", type=str)
+
+        cache_key = catalog_cache_key(
+            page, per_page, title, author, description, match, after
+        )
+        # A client revalidating a page it already has is answered from the
+        # catalog version alone, before the cache or the database.
+        etag = version_etag(CATALOG, cache_key)
+        if is_not_modified(etag):
+            return not_modified_response(etag)
+        cached = catalog_response_cache.get(cache_key)
+        if cached is not None:
+            return json_response(cached, etag=etag)
+
+        # Only the response columns are selected, as plain rows: no Book is
+        # loaded and the encoded body is what gets cached.
+        try:
+            query = Book.apply_filters(Book.query, title, author, description, match)
+        except ValueError as e:
+            return {"success": False, "message": str(e)}, HTTPStatus.BAD_REQUEST
+        query = query.with_entities(*BOOK_COLUMNS)
+
+        # Cursor mode is opt-in: any request carrying `after` (empty for the
+        # first page) gets keyset pagination without OFFSET or COUNT.
+        if after is not None:
+            try:
+                rows, next_cursor = keyset_paginate(query, Book.id, after, per_page)
+            except InvalidCursorError as e:
+                return {"success": False, "message": str(e)}, HTTPStatus.BAD_REQUEST
+            body = encode_json(
+                {
+                    "success": True,
+                    "data": book_dicts(rows),
+                    "per_page": per_page,
+                    "next_cursor": next_cursor,
+                }
+            )
+            catalog_response_cache.set(cache_key, body)
+            return json_response(body, etag=etag)
 
         books_query = query.paginate(page=page, per_page=per_page, error_out=False)
-        books = books_query.items
 
-        return {
-            "success": True,
-            "data": [book.to_dict() for book in books],
-            "total": books_query.total,
-            "pages": books_query.pages,
-            "current_page": books_query.page,
-            "per_page": books_query.per_page,
-        }, HTTPStatus.OK
+        body = encode_json(
+            {
+                "success": True,
+                "data": book_dicts(books_query.items),
+                "total": books_query.total,
+                "pages": books_query.pages,
+                "current_page": books_query.page,
+                "per_page": books_query.per_page,
+            }
+        )
+        catalog_response_cache.set(cache_key, body)
+        return json_response(body, etag=etag)
 
     @books_ns.expect(book_schema_parser, validate=True)
     @books_ns.response(HTTPStatus.CREATED, "Book added", book_response_schema)
@@ -95,19 +157,142 @@ class BooksList(Resource):
                 author=author,
                 description=description,
                 isbn=isbn,
-                image=image_data,
             )
+            book.set_image(image_data)
             db.session.add(book)
+            db.session.flush()
+            index_book(book)
+            # Read before the commit expires the object, saving a reload.
+            created = book.to_dict()
+            has_image, image_hash = book.has_image, book.image_hash
+            bump_version(CATALOG)
             db.session.commit()
+            if has_image:
+                schedule_variants(
+                    current_app._get_current_object(),
+                    created["id"],
+                    image_data,
+                    image_hash,
+                )
+
+            return {"success": True, "data": created}, HTTPStatus.CREATED
+        except Exception as e:
+            logger.error(f"An error occurred: {str(e)}")
+            return {
+                "success": False,
+                "message": str(e),
+            }, HTTPStatus.INTERNAL_SERVER_ERROR
 
-            return {"success": True, "data": book.to_dict()}, HTTPStatus.CREATED
+
+@books_ns.route("/bulk")
+class BooksBulkImport(Resource):
+
+    @books_ns.doc(
+        security=["basic", "jwt"],
+        params={
+            "format": "Body format, `csv` or `ndjson` (default: from Content-Type)"
+        },
+    )
+    @books_ns.response(HTTPStatus.OK, "Import finished", book_bulk_import_schema)
+    @books_ns.response(HTTPStatus.BAD_REQUEST, "Invalid input")
+    @books_ns.response(HTTPStatus.UNAUTHORIZED, "Unauthorized")
+    @books_ns.response(HTTPStatus.INTERNAL_SERVER_ERROR, "Internal server issue")
+    @auth_required([UserRole.ADMIN])
+    def post(self) -> Response:
+        """Import books from a streamed CSV or NDJSON body (admin only)."""
+        body_format = request.args.get("format", type=str)
+        if body_format is None:
+            if request.mimetype == "text/csv":
+                body_format = "csv"
+            elif request.mimetype in ("application/x-ndjson", "application/jsonl"):
+                body_format = "ndjson"
+        if body_format not in ("csv", "ndjson"):
+            return {
+                "success": False,
+                "message": "Send text/csv or application/x-ndjson.",
+            }, HTTPStatus.BAD_REQUEST
+
+        # request.stream is read incrementally: the body is never buffered.
+        rows = (
+            iter_csv_rows(request.stream)
+            if body_format == "csv"
+            else iter_ndjson_rows(request.stream)
+        )
+        try:
+            report = import_books(
+                rows,
+                batch_size=current_app.config["BULK_IMPORT_BATCH_SIZE"],
+                max_errors=current_app.config["BULK_IMPORT_MAX_ERRORS"],
+            )
+        except (UnicodeDecodeError, csv.Error) as e:
+            db.session.rollback()
+            return {"success": False, "message": str(e)}, HTTPStatus.BAD_REQUEST
         except Exception as e:
+            db.session.rollback()
             logger.error(f"An error occurred: {str(e)}")
             return {
                 "success": False,
                 "message": str(e),
             }, HTTPStatus.INTERNAL_SERVER_ERROR
 
+        return {"success": True, **report.to_dict()}, HTTPStatus.OK
+
+
+@books_ns.route("/export")
+class BooksExport(Resource):
+
+    @books_ns.expect(book_export_parser, validate=True)
+    @books_ns.response(HTTPStatus.OK, "Catalog streamed as NDJSON or CSV")
+    @books_ns.response(HTTPStatus.BAD_REQUEST, "Invalid input")
+    @books_ns.produces(["application/x-ndjson", "text/csv"])
+    @read_only
+    def get(self) -> Response:
+        """Stream the (filtered) catalog as NDJSON or CSV, public like the list."""
+        args = book_export_parser.parse_args()
+        query = Book.apply_filters(
+            db.session.query(*BOOK_COLUMNS),
+            args["title"],
+            args["author"],
+            args["description"],
+            args["match"],
+        )
+        rows = iter_export_rows(query)
+
+        if args["format"] == "csv":
+            body, mime_type, extension = iter_csv(rows), "text/csv", "csv"
+        else:
+            body, mime_type, extension = (
+                iter_ndjson(rows),
+                "application/x-ndjson",
+                "ndjson",
+            )
+        response = Response(stream_with_context(body), mimetype=mime_type)
+        response.headers["Content-Disposition"] = (
+            f"attachment; filename=books.{extension}"
+        )
+        return response
+
+
+@books_ns.route("/search")
+class BooksSearch(Resource):
+
+    @books_ns.expect(book_search_parser, validate=True)
+    @books_ns.response(HTTPStatus.OK, "Books found", book_search_schema)
+    @books_ns.response(HTTPStatus.BAD_REQUEST, "Invalid input")
+    @read_only
+    @query_budget(3)
+    def get(self) -> Response:
+        """Full-text search over book titles, authors and descriptions."""
+        args = book_search_parser.parse_args()
+        limit = min(max(args["limit"], 1), 100)
+
+        results, total = search_books(args["q"], limit=limit)
+        return {
+            "success": True,
+            "data": [dict(book.to_dict(), score=score) for book, score in results],
+            "total": total,
+        }, HTTPStatus.OK
+
 
 @books_ns.route("/<int:book_id>")
 class BooksResource(Resource):
@@ -116,9 +301,11 @@ class BooksResource(Resource):
     @books_ns.response(HTTPStatus.UNAUTHORIZED, "Unauthorized")
     @books_ns.doc(security=["basic", "jwt"])
     @auth_required([UserRole.ADMIN, UserRole.USER])
+    @read_only
+    @query_budget(2)
     def get(self, book_id: int) -> Response:
         """Retrieve a specific book by ID."""
-        book = Book.query.get(book_id)
+        book = Book.load_book(book_id)
         if book:
             return {"success": True, "data": book.to_dict()}, HTTPStatus.OK
         return {"success": False, "message": "Book not found"}, HTTPStatus.NOT_FOUND
@@ -133,11 +320,13 @@ class BooksResource(Resource):
     def put(self, book_id: int) -> Response:
         """Update an existing book (admin only)."""
         args = book_request_schema_parser.parse_args()
-        book = Book.query.get(book_id)
+        book = Book.load_book(book_id)
         try:
             if book:
+                image_data = None
                 if image := args.get("image"):
-                    book.image = image.read()
+                    image_data = image.read()
+                    book.set_image(image_data)
                 if title := args.get("title"):
                     book.title = title
                 if author := args.get("author"):
@@ -148,8 +337,18 @@ class BooksResource(Resource):
                     book.isbn = isbn
                 if available := args.get("available"):
                     book.available = available
+                index_book(book)
+                updated, image_hash = book.to_dict(), book.image_hash
+                bump_version(CATALOG)
                 db.session.commit()
-                return {"success": True, "data": book.to_dict()}, HTTPStatus.OK
+                if image_data:
+                    schedule_variants(
+                        current_app._get_current_object(),
+                        book_id,
+                        image_data,
+                        image_hash,
+                    )
+                return {"success": True, "data": updated}, HTTPStatus.OK
         except Exception as e:
             logger.error(f"An error occurred: {str(e)}")
             return {
@@ -163,11 +362,16 @@ class BooksResource(Resource):
     @books_ns.response(HTTPStatus.INTERNAL_SERVER_ERROR, "Internal server issue")
     @books_ns.doc(security=["basic", "jwt"])
     @auth_required([UserRole.ADMIN])
-    def delete(self, id: int) -> Response:
+    def delete(self, book_id: int) -> Response:
         """Delete a book from the database (admin only)."""
-        book = Book.query.get(id)
+        book = Book.load_book(book_id)
         if book:
+            remove_book(book.id)
+            # Explicitly: the FK cascade is not enforced on every backend
+            # (SQLite without PRAGMA foreign_keys).
+            remove_variants(book.id)
             db.session.delete(book)
+            bump_version(CATALOG)
             db.session.commit()
             return {"success": True}, HTTPStatus.OK
         return {"success": False, "message": "Book not found"}, HTTPStatus.NOT_FOUND
@@ -175,21 +379,68 @@ class BooksResource(Resource):
 
 @books_ns.route("/<int:book_id>/image")
 class BookServeImage(Resource):
+    @books_ns.expect(book_image_parser, validate=True)
     @books_ns.response(
         HTTPStatus.OK, "Image retrieved as binary data (e.g., image/jpeg)"
     )
+    @books_ns.response(HTTPStatus.PARTIAL_CONTENT, "Requested byte range of the image")
+    @books_ns.response(HTTPStatus.NOT_MODIFIED, "Cached image is still valid")
+    @books_ns.response(HTTPStatus.BAD_REQUEST, "Unsupported image size")
     @books_ns.response(HTTPStatus.NOT_FOUND, "Image not found")
+    @books_ns.response(
+        HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE, "Invalid byte range requested"
+    )
     @books_ns.response(HTTPStatus.INTERNAL_SERVER_ERROR, "Internal server issue")
-    @books_ns.produces(["image/jpeg"])  # Specify the MIME type of the response
+    @books_ns.produces(["image/jpeg", "image/png", "image/gif", "image/webp"])
+    @read_only
+    @query_budget(3)
     def get(self, book_id: int) -> Response:
-        """Serve the image of a specific book."""
-        book = Book.query.get(book_id)
+        """Serve the image of a specific book, optionally as a resized variant."""
+        size = request.args.get("size", type=int)
+        if size is not None and size not in current_app.config["IMAGE_VARIANT_WIDTHS"]:
+            return {
+                "message": "Unsupported image size. Allowed sizes are: "
+                + ", ".join(map(str, current_app.config["IMAGE_VARIANT_WIDTHS"]))
+            }, HTTPStatus.BAD_REQUEST
+
+        # Only the metadata columns are loaded here; the blobs stay deferred
+        # until we know the client actually needs (part of) one.
+        book = Book.load_book(book_id)
         if not book:
             return {"message": "Book not found"}, HTTPStatus.NOT_FOUND
+        if not book.has_image:
+            return {"message": "Image not found"}, HTTPStatus.NOT_FOUND
 
         try:
-            mime_type = "image/jpeg"
-            return Response(book.image, mimetype=mime_type)
+            if size is not None:
+                variant = BookImageVariant.query.get((book_id, size))
+                if variant and variant.source_hash == book.image_hash:
+                    return _serve_image(
+                        etag=variant.image_hash,
+                        last_modified=variant.created_at,
+                        mime_type=variant.image_mime_type,
+                        length=variant.image_size,
+                        read=partial(BookImageVariant.read_image, book_id, size),
+                    )
+                # The variant is not rendered yet: fall back to the original,
+                # but do not let caches keep it under the variant's URL.
+                response = _serve_image(
+                    etag=book.image_hash,
+                    last_modified=book.image_updated_at,
+                    mime_type=book.image_mime_type,
+                    length=book.image_size,
+                    read=partial(Book.read_image, book_id),
+                )
+                response.headers["Cache-Control"] = "no-cache"
+                return response
+
+            return _serve_image(
+                etag=book.image_hash,
+                last_modified=book.image_updated_at,
+                mime_type=book.image_mime_type,
+                length=book.image_size,
+                read=partial(Book.read_image, book_id),
+            )
         except Exception as e:
             logger.error(f"An error occurred: {str(e)}")
             return {
@@ -197,6 +448,72 @@ class BookServeImage(Resource):
             }, HTTPStatus.INTERNAL_SERVER_ERROR
 
 
+def _serve_image(
+    etag: str,
+    last_modified: Optional[datetime],
+    mime_type: str,
+    length: int,
+    read: Callable[..., Optional[bytes]],
+) -> Response:
+    """
+    Build a cacheable image response, reading (part of) the blob via `read`
+    only when the client's cached copy is missing or outdated.
+    """
+    response = Response(mimetype=mime_type)
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.accept_ranges = "bytes"
+    response.headers["Cache-Control"] = current_app.config["IMAGE_CACHE_CONTROL"]
+
+    if not is_resource_modified(
+        request.environ, etag=etag, last_modified=last_modified
+    ):
+        response.status_code = HTTPStatus.NOT_MODIFIED
+        return response
+
+    byte_range = _requested_byte_range(etag, last_modified, length)
+    if byte_range is None:
+        response.set_data(read())
+        return response
+    if byte_range == ():
+        response.status_code = HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+        response.content_range = ContentRange("bytes", None, None, length)
+        return response
+
+    start, stop = byte_range
+    response.set_data(read(start, stop - start))
+    response.status_code = HTTPStatus.PARTIAL_CONTENT
+    response.content_range = ContentRange("bytes", start, stop, length)
+    return response
+
+
+def _requested_byte_range(
+    etag: str, last_modified: Optional[datetime], length: int
+) -> Optional[tuple]:
+    """
+    Resolve the `Range`/`If-Range` headers against the stored image.
+
+    Returns None to serve the whole image, `()` for an unsatisfiable range and
+    `(start, stop)` for a single satisfiable byte range.
+    """
+    byte_range = request.range
+    if byte_range is None or byte_range.units != "bytes":
+        return None
+    if "If-Range" in request.headers:
+        if_range = request.if_range
+        if if_range.etag is not None:
+            if if_range.etag != etag:
+                return None
+        elif if_range.date is None or last_modified is None:
+            return None
+        elif last_modified > if_range.date.replace(tzinfo=None):
+            return None
+    # Multiple ranges are allowed to be answered with the full representation.
+    if len(byte_range.ranges) != 1:
+        return None
+    return byte_range.range_for_length(length) or ()
+
+
 @books_ns.route("/<int:book_id>/barrow")
 class BookBorrowResrouce(Resource):
 
@@ -204,9 +521,12 @@ class BookBorrowResrouce(Resource):
     @books_ns.response(HTTPStatus.CREATED, "Book borrowed", book_borrow_schema)
     @books_ns.response(HTTPStatus.BAD_REQUEST, "Invalid input")
     @books_ns.response(HTTPStatus.UNAUTHORIZED, "Unauthorized")
+    @books_ns.response(HTTPStatus.NOT_FOUND, "Book not found")
+    @books_ns.response(HTTPStatus.CONFLICT, "Book is already borrowed")
     @books_ns.response(HTTPStatus.INTERNAL_SERVER_ERROR, "Internal server issue")
     @books_ns.doc(security=["basic", "jwt"])
     @auth_required([UserRole.ADMIN, UserRole.USER])
+    @query_budget(4)
     def put(self, book_id: int) -> Response:
         """Borrow a book from the library."""
         try:
@@ -223,27 +543,26 @@ class BookBorrowResrouce(Resource):
                     "message": "Invalid date format. Use YYYY-MM-DD."
                 }, HTTPStatus.BAD_REQUEST
 
-            book = Book.query.get(book_id)
-            user_id = g.current_user["user_id"]
-            user = User.query.get(user_id)
+            title = db.session.query(Book.title).filter(Book.id == book_id).scalar()
+            if title is None:
+                return {"message": "Book not found"}, HTTPStatus.NOT_FOUND
 
-            if book and user:
-                book.borrowed_by = user.id
-                book.borrowed_until = borrowed_until_date
-                book.available = False
-                db.session.commit()
-                return {
-                    "message": "Book borrowed",
-                    "user": user.username,
-                    "book": book.title,
-                    "borrowed_until": borrowed_until_date.isoformat(),
-                }, HTTPStatus.CREATED
+            if not Book.borrow(book_id, g.principal.user_id, borrowed_until_date):
+                db.session.rollback()
+                return {"message": "Book is already borrowed"}, HTTPStatus.CONFLICT
+            bump_version(CATALOG)
+            db.session.commit()
+            return {
+                "message": "Book borrowed",
+                "user": g.principal.username,
+                "book": title,
+                "borrowed_until": borrowed_until_date.isoformat(),
+            }, HTTPStatus.CREATED
         except Exception as e:
             logger.error(f"An error occurred: {str(e)}")
             return {
                 "message": f"An error occurred: {str(e)}"
             }, HTTPStatus.INTERNAL_SERVER_ERROR
-        return {"message": "Book not found"}, HTTPStatus.NOT_FOUND
 
 
 @books_ns.route("/<int:book_id>/return")
@@ -251,16 +570,31 @@ class BookReturnResrouce(Resource):
     @books_ns.response(HTTPStatus.CREATED, "Book returned")
     @books_ns.response(HTTPStatus.BAD_REQUEST, "Invalid input")
     @books_ns.response(HTTPStatus.UNAUTHORIZED, "Unauthorized")
+    @books_ns.response(HTTPStatus.NOT_FOUND, "Book not found")
+    @books_ns.response(HTTPStatus.CONFLICT, "Book is not borrowed by this user")
     @books_ns.response(HTTPStatus.INTERNAL_SERVER_ERROR, "Internal server issue")
-    @books_ns.doc(security=["basic, jwt"])
+    @books_ns.doc(security=["basic", "jwt"])
     @auth_required([UserRole.ADMIN, UserRole.USER])
-    def put(self, id: int) -> Response:
+    @query_budget(4)
+    def put(self, book_id: int) -> Response:
         """Return a borrowed book to the library."""
-        book = Book.query.get(id)
-        if book:
-            book.borrowed_by = None
-            book.borrowed_until = None
-            book.available = True
-            db.session.commit()
-            return {"message": "Book returned"}, HTTPStatus.CREATED
-        return {"message": "Book not found"}, HTTPStatus.NOT_FOUND
+        # Admins may check in any book; users only the ones they borrowed.
+        borrower_id = None
+        if g.principal.role != UserRole.ADMIN:
+            borrower_id = g.principal.user_id
+
+        try:
+            if Book.give_back(book_id, borrower_id):
+                bump_version(CATALOG)
+                db.session.commit()
+                return {"message": "Book returned"}, HTTPStatus.CREATED
+            db.session.rollback()
+        except Exception as e:
+            logger.error(f"An error occurred: {str(e)}")
+            return {
+                "message": f"An error occurred: {str(e)}"
+            }, HTTPStatus.INTERNAL_SERVER_ERROR
+
+        if db.session.query(Book.id).filter(Book.id == book_id).scalar() is None:
+            return {"message": "Book not found"}, HTTPStatus.NOT_FOUND
+        return {"message": "Book is not borrowed by this user"}, HTTPStatus.CONFLICT
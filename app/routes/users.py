@@ -12,8 +12,19 @@ from app.schemas.user_schema import (
 from app.models import db
 from app.models.user import User, UserRole
 
-from app.utils.auth_utils import auth_required
-from app.utils.emai import send_registration_email
+from app.utils.auth_utils import auth_required, current_user_record
+from app.utils.db_routing import read_only
+from app.utils.emai import queue_registration_email
+from app.utils.http_cache import (
+    is_not_modified,
+    not_modified_response,
+    version_etag,
+)
+from app.utils.outbox import wake_outbox_workers
+from app.utils.pagination import InvalidCursorError, keyset_paginate
+from app.utils.query_budget import query_budget
+from app.utils.serializers import USER_COLUMNS, encode_json, json_response, user_dicts
+from app.utils.versions import USERS, bump_version
 
 users_ns = Namespace("User", description="User management")
 
@@ -23,8 +34,11 @@ class UsersList(Resource):
 
     @users_ns.expect(user_query_parser, validate=True)
     @users_ns.response(HTTPStatus.OK, "List of users", user_response_schema)
+    @users_ns.response(HTTPStatus.NOT_MODIFIED, "Cached page is still valid")
     @users_ns.doc(security=["basic", "jwt"])
     @auth_required([UserRole.ADMIN, UserRole.USER])
+    @read_only
+    @query_budget(4)
     def get(self) -> Response:
         """Retrieve a list of users with pagination and filtering."""
         page = request.args.get("page", 1, type=int)
@@ -33,50 +47,67 @@ class UsersList(Resource):
         username = request.args.get("username", type=str)
         email = request.args.get("email", type=str)
         role = request.args.get("role", type=str)
+        match = request.args.get("match", "contains", type=str)
+        after = request.args.get("after", type=str)
+
+        # An empty filter is no filter at all, and roles are case-insensitive.
+        etag = version_etag(
+            USERS,
+            (
+                page,
+                per_page,
+                full_name or None,
+                username or None,
+                email or None,
+                role.lower() if role else None,
+                match,
+                after,
+            ),
+        )
+        if is_not_modified(etag):
+            return not_modified_response(etag)
+
+        try:
+            query = User.apply_filters(
+                User.query, username, email, role, full_name, match
+            )
+        except ValueError as e:
+            return {"success": False, "message": str(e)}, HTTPStatus.BAD_REQUEST
+
+        query = query.with_entities(*USER_COLUMNS)
+
+        if after is not None:
+            # Cursor mode: WHERE id > :last_id ORDER BY id LIMIT per_page + 1
+            try:
+                rows, next_cursor = keyset_paginate(query, User.id, after, per_page)
+            except InvalidCursorError as e:
+                return {"success": False, "message": str(e)}, HTTPStatus.BAD_REQUEST
+            return json_response(
+                encode_json(
+                    {
+                        "success": True,
+                        "data": user_dicts(rows),
+                        "per_page": per_page,
+                        "next_cursor": next_cursor,
+                    }
+                ),
+                etag=etag,
+            )
 
-        # SELECT * FROM users
-        query = User.query
-
-        if username:
-            # username = admin
-            # SELECT * FROM users WHERE username LIKE %admin%
-            query = query.filter(User.username.ilike(f"%{username}%"))
-
-        if email:
-            # email=admin@admin
-            # SELECT * FROM users WHERE username LIKE %admin% AND
-            #  email LIKE %admin@admin%
-            query = query.filter(User.email.ilike(f"%{email}%"))
-        if role:
-            # role=ADMIN
-            # SELECT * FROM users WHERE username LIKE %admin% AND
-            # email LIKE %admin@admin AND
-            # role LIKE %ADMIN%
-            query = query.filter(User.role.ilike(f"%{role}%"))
-        if full_name:
-            # full_name="adam"
-            # SELECT * FROM users WHERE username LIKE  %admin% AND
-            # email like  %admin@admin% AND
-            # role like %ADMIN% AND
-            # full_name  like %adam%
-            query = query.filter(User.role.ilike(f"%{full_name}%"))
-        # full_name="adam"
-        # SELECT * FROM users WHERE username LIKE  %admin% AND
-        # email like  %admin@admin% AND
-        # role like %ADMIN% AND
-        # full_name  like %adam%
-        # lMIT= per_page
-        # OFFSET =page
         users_query = query.paginate(page=page, per_page=per_page, error_out=False)
-        users = users_query.items
-        return {
-            "success": True,
-            "data": [user.to_dict() for user in users],
-            "total": users_query.total,
-            "pages": users_query.pages,
-            "current_page": users_query.page,
-            "per_page": users_query.per_page,
-        }, HTTPStatus.OK
+        return json_response(
+            encode_json(
+                {
+                    "success": True,
+                    "data": user_dicts(users_query.items),
+                    "total": users_query.total,
+                    "pages": users_query.pages,
+                    "current_page": users_query.page,
+                    "per_page": users_query.per_page,
+                }
+            ),
+            etag=etag,
+        )
 
     @users_ns.expect(user_request_model_schema, validate=True)
     @users_ns.response(HTTPStatus.CREATED, "User created", user_schema)
@@ -92,20 +123,30 @@ class UsersList(Resource):
         if "password" not in data:
             data["password"] = User.generate_random_password()
 
-        user = User(**data)
-        db.session.add(user)
-        db.session.commit()
         try:
-            send_registration_email(
-                user.email, user.full_name, user.username, data["password"]
+            user = User.create_user(
+                data["full_name"],
+                data["username"],
+                data["email"],
+                data["password"],
+                UserRole(data["role"]),
             )
-        except Exception as e:
-            return {
-                "success": False,
-                "message": str(e),
-            }, HTTPStatus.INTERNAL_SERVER_ERROR
+        except ValueError as e:
+            return {"success": False, "message": str(e)}, HTTPStatus.BAD_REQUEST
+        db.session.add(user)
+        # The welcome email is only queued, in the same transaction as the user;
+        # the outbox workers deliver it.
+        queue_registration_email(
+            user.email, user.full_name, user.username, data["password"]
+        )
+        db.session.flush()
+        # Serialized before the commit expires the object, saving a reload.
+        created = user.to_dict()
+        bump_version(USERS)
+        db.session.commit()
+        wake_outbox_workers()
 
-        return {"success": True, "data": user.to_dict()}, HTTPStatus.CREATED
+        return {"success": True, "data": created}, HTTPStatus.CREATED
 
 
 @users_ns.route("/me")
@@ -119,23 +160,28 @@ class MeResource(Resource):
     @users_ns.response(HTTPStatus.INTERNAL_SERVER_ERROR, "Internal server error")
     @users_ns.doc(security=["basic", "jwt"])
     @auth_required([UserRole.ADMIN, UserRole.USER])
+    @query_budget(3)
     def put(self) -> Response:
         """Update the currently authenticated user."""
-        user_id = g.current_user["user_id"]
-
-        user = User.load_user(user_id)
+        user = current_user_record()
         data = request.json
         if not user:
             return {"message": "User not found"}, HTTPStatus.NOT_FOUND
 
+        token_version = user.token_version
         if user.role == UserRole.ADMIN:
             user = User.update_user_as_admin(user, data)
-        if user.role == UserRole.USER:
+        elif user.role == UserRole.USER:
             user = User.update_user_as_user(user, data)
+        revoked = user.token_version != token_version
 
+        updated = user.to_dict()
+        bump_version(USERS)
         db.session.commit()
+        if revoked:
+            User.forget_cached_auth(g.principal.user_id)
 
-        return {"success": True, "data": user.to_dict()}, HTTPStatus.OK
+        return {"success": True, "data": updated}, HTTPStatus.OK
 
     @users_ns.response(HTTPStatus.NO_CONTENT, "User deleted")
     @users_ns.response(HTTPStatus.NOT_FOUND, "User not found")
@@ -144,15 +190,18 @@ class MeResource(Resource):
     @users_ns.response(HTTPStatus.INTERNAL_SERVER_ERROR, "Internal server error")
     @users_ns.doc(security=["basic", "jwt"])
     @auth_required([UserRole.ADMIN, UserRole.USER])
+    @query_budget(3)
     def delete(self) -> Response:
         """Delete the currently authenticated user."""
-        user_id = g.current_user["user_id"]
-        user = User.load_user(user_id)
+        user = current_user_record()
         if not user:
             return {"message": "User not found"}, HTTPStatus.NOT_FOUND
 
         user.is_active = False
+        user.revoke_tokens()
+        bump_version(USERS)
         db.session.commit()
+        User.forget_cached_auth(g.principal.user_id)
         return {"success": True}, HTTPStatus.NO_CONTENT
 
 
@@ -166,12 +215,15 @@ class UsersResource(Resource):
     @users_ns.response(HTTPStatus.INTERNAL_SERVER_ERROR, "Internal server error")
     @users_ns.doc(security=["basic", "jwt"])
     @auth_required([UserRole.ADMIN, UserRole.USER])
+    @query_budget(2)
     def get(self, user_id: int) -> Response:
-        """Retrieve a specific user by ID."""
-        user = User.load_user(user_id)
+        """Retrieve a specific user by ID (admins, or the user themselves)."""
+        if g.principal.role != UserRole.ADMIN and g.principal.user_id != user_id:
+            return {"message": "Forbidden"}, HTTPStatus.FORBIDDEN
 
-        if user.role != UserRole.ADMIN or user.id != id:
-            return {"message": "Unauthorized"}, HTTPStatus.UNAUTHORIZED
+        user = User.load_user(user_id)
+        if not user:
+            return {"message": "User not found"}, HTTPStatus.NOT_FOUND
 
         return {"success": True, "data": user.to_dict()}, HTTPStatus.OK
 
@@ -202,23 +254,33 @@ class UsersResource(Resource):
         if "email" in data:
             user.email = data["email"]
         if "role" in data:
-            if user.role == UserRole.ADMIN and data["role"] != UserRole.ADMIN:
+            try:
+                role = UserRole(data["role"])
+            except ValueError as e:
+                return {"message": str(e)}, HTTPStatus.BAD_REQUEST
+            if user.role == UserRole.ADMIN and role != UserRole.ADMIN:
                 return {
                     "message": "Cannot change role of an admin user"
                 }, HTTPStatus.FORBIDDEN
-            user.role = data["role"]
+            user.role = role
+            user.revoke_tokens()
         if "is_active" in data:
             user.is_active = data["is_active"]
+            user.revoke_tokens()
 
+        updated = user.to_dict()
         try:
+            bump_version(USERS)
             db.session.commit()
         except Exception as e:
             db.session.rollback()
             return {
                 "message": f"Failed to update user: {str(e)}"
             }, HTTPStatus.INTERNAL_SERVER_ERROR
+        if "role" in data or "is_active" in data:
+            User.forget_cached_auth(user_id)
 
-        return {"success": True, "data": user.to_dict()}, HTTPStatus.ACCEPTED
+        return {"success": True, "data": updated}, HTTPStatus.ACCEPTED
 
     @users_ns.response(HTTPStatus.NO_CONTENT, "User deleted")
     @users_ns.response(HTTPStatus.NOT_FOUND, "User not found")
@@ -236,6 +298,9 @@ class UsersResource(Resource):
         if user.role == UserRole.ADMIN:
             return {"message": "Forbidden"}, HTTPStatus.FORBIDDEN
         user.is_active = False
+        user.revoke_tokens()
         # db.session.delete(user)
+        bump_version(USERS)
         db.session.commit()
+        User.forget_cached_auth(user_id)
         return {"success": True}, HTTPStatus.NO_CONTENT
@@ -4,6 +4,7 @@ from datetime import datetime
 
 
 from app.schemas import api
+from app.utils.filters import MATCH_MODES
 
 
 # Define the schema parser for borrowing a book
@@ -23,6 +24,12 @@ book_query_parser.add_argument(
 book_query_parser.add_argument(
     "per_page", type=int, default=10, help="Number of items per page"
 )
+book_query_parser.add_argument(
+    "after",
+    type=str,
+    required=False,
+    help="Cursor from a previous `next_cursor`; send it empty to start cursor mode",
+)
 book_query_parser.add_argument(
     "title", type=str, required=False, help="Filter by book title"
 )
@@ -30,7 +37,55 @@ book_query_parser.add_argument(
     "author", type=str, required=False, help="Filter by book author"
 )
 book_query_parser.add_argument(
-    "description", type=str, required=False, help="Filter by book description"
+    "description", type=str, required=False, help="Filter by words in the book text"
+)
+book_query_parser.add_argument(
+    "match",
+    type=str,
+    choices=MATCH_MODES,
+    default="contains",
+    help="Match title and author anywhere (contains) or at the start (prefix)",
+)
+
+# Define the schema parser for full-text search
+book_search_parser = reqparse.RequestParser()
+book_search_parser.add_argument(
+    "q", type=str, required=True, help="Search terms are required"
+)
+book_search_parser.add_argument(
+    "limit", type=int, default=10, help="Maximum number of results (1-100)"
+)
+
+# Define the schema parser for the catalog export
+book_export_parser = reqparse.RequestParser()
+book_export_parser.add_argument(
+    "format",
+    type=str,
+    choices=("ndjson", "csv"),
+    default="ndjson",
+    help="Export format: ndjson or csv",
+)
+book_export_parser.add_argument(
+    "title", type=str, required=False, help="Filter by book title"
+)
+book_export_parser.add_argument(
+    "author", type=str, required=False, help="Filter by book author"
+)
+book_export_parser.add_argument(
+    "description", type=str, required=False, help="Filter by words in the book text"
+)
+book_export_parser.add_argument(
+    "match",
+    type=str,
+    choices=MATCH_MODES,
+    default="contains",
+    help="Match title and author anywhere (contains) or at the start (prefix)",
+)
+
+# Define the schema parser for serving cover images
+book_image_parser = reqparse.RequestParser()
+book_image_parser.add_argument(
+    "size", type=int, required=False, help="Width in px of a pre-rendered variant"
 )
 
 book_schema_parser = reqparse.RequestParser()  # form data schema
@@ -121,6 +176,48 @@ book_list_schema = api.model(
         "pages": fields.Integer(),
         "current_page": fields.Integer(),
         "per_page": fields.Integer(),
+        "next_cursor": fields.String(),
+    },
+)
+
+book_search_result_schema = api.inherit(
+    "BookSearchResultModel",
+    book_schema,
+    {
+        "score": fields.Float(readonly=True),
+    },
+)
+
+# json data schema
+book_search_schema = api.model(
+    "BookSearchResponseModel",
+    {
+        "success": fields.Boolean(),
+        "data": fields.List(fields.Nested(book_search_result_schema)),
+        "total": fields.Integer(),
+    },
+)
+
+book_bulk_import_error_schema = api.model(
+    "BookBulkImportErrorModel",
+    {
+        "line": fields.Integer(),
+        "isbn": fields.String(),
+        "message": fields.String(),
+    },
+)
+
+# json data schema
+book_bulk_import_schema = api.model(
+    "BookBulkImportResponseModel",
+    {
+        "success": fields.Boolean(),
+        "received": fields.Integer(),
+        "inserted": fields.Integer(),
+        "duplicates": fields.Integer(),
+        "failed": fields.Integer(),
+        "errors": fields.List(fields.Nested(book_bulk_import_error_schema)),
+        "errors_truncated": fields.Boolean(),
     },
 )
 
@@ -1,5 +1,6 @@
 from flask_restx import fields
 from app.schemas import api
+from app.utils.filters import MATCH_MODES
 
 from flask_restx import reqparse
 
@@ -11,6 +12,12 @@ user_query_parser.add_argument(
 user_query_parser.add_argument(
     "per_page", type=int, default=10, help="Number of items per page"
 )
+user_query_parser.add_argument(
+    "after",
+    type=str,
+    required=False,
+    help="Cursor from a previous `next_cursor`; send it empty to start cursor mode",
+)
 user_query_parser.add_argument(
     "full_name", type=str, required=False, help="Filter by full name"
 )
@@ -21,7 +28,14 @@ user_query_parser.add_argument(
     "email", type=str, required=False, help="Filter by email"
 )
 user_query_parser.add_argument(
-    "role", type=str, required=False, help="Filter by user role"
+    "role", type=str, required=False, help="Filter by user role (admin, user or guest)"
+)
+user_query_parser.add_argument(
+    "match",
+    type=str,
+    choices=MATCH_MODES,
+    default="contains",
+    help="Match the text filters anywhere (contains) or at the start (prefix)",
 )
 book_borrow_model = api.model(
     "BookBorrow",  # Model name
@@ -80,6 +94,7 @@ user_response_schema = api.model(
         "pages": fields.Integer(required=False),
         "current_page": fields.Integer(required=False),
         "per_page": fields.Integer(required=False),
+        "next_cursor": fields.String(required=False),
     },
 )
 user_login_schema = api.model(
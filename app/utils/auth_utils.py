@@ -1,4 +1,5 @@
 import base64
+from dataclasses import dataclass
 from datetime import timedelta
 from functools import wraps
 from http import HTTPStatus
@@ -6,18 +7,34 @@ import json
 import logging
 from typing import Any, Optional
 
-from flask import Flask, g, request
+from flask import Flask, current_app, g, request
 from flask_httpauth import HTTPBasicAuth
 from flask_jwt_extended import (
     JWTManager,
     create_access_token,
+    get_jwt,
     get_jwt_identity,
     verify_jwt_in_request,
 )
 from flask_login import login_user
+from sqlalchemy import inspect
 
 from app.models.user import User, UserRole
 from app.models import db
+from app.utils.credential_cache import (
+    cache_credentials,
+    credential_digest,
+    get_cached_credentials,
+    invalidate_user_credentials,
+)
+from app.utils.metrics import set_auth_scheme
+from app.utils.rate_limit import (
+    RateLimitExceeded,
+    charge_password_check,
+    refund_password_check,
+)
+from app.utils.request_memo import remember_for_request
+from app.utils.token_versions import token_version_cache
 
 # Correct the logging level
 logging.basicConfig(level=logging.INFO)
@@ -34,21 +51,105 @@ def init_jwt(app: Flask) -> None:
 
 def generate_token(user: User) -> str:
     user_data = json.dumps(user.to_dict())
-    expires = timedelta(day=1)
-    token = create_access_token(identity=user_data, expires_delta=expires)
+    expires = timedelta(days=1)
+    token = create_access_token(
+        identity=user_data,
+        expires_delta=expires,
+        additional_claims={"ver": user.token_version or 0},
+    )
 
     return token
 
 
+_UNKNOWN_VERSION = object()
+
+
+def get_token_version(user_id: int) -> Optional[int]:
+    """
+    Current token version of a user (None if inactive or gone), served from a
+    short-lived cache so warm JWT requests do not query the database.
+    """
+    version = token_version_cache.get(user_id, _UNKNOWN_VERSION)
+    if version is _UNKNOWN_VERSION:
+        row = (
+            db.session.query(User.token_version, User.is_active)
+            .filter(User.id == user_id)
+            .first()
+        )
+        version = row.token_version if row and row.is_active else None
+        token_version_cache.set(user_id, version)
+    return version
+
+
+@dataclass
+class Principal:
+    """
+    The user a request is authenticated as. `user` is the instance
+    authentication loaded, or a transient one rebuilt from the token claims
+    in stateless JWT mode; the other fields are copied at authentication so
+    reading them after a commit does not reload the user.
+    """
+
+    user: User
+    user_id: int
+    username: str
+    role: UserRole
+
+
+def set_principal(user: User) -> None:
+    g.principal = Principal(user, user.id, user.username, user.role)
+    if inspect(user).persistent:
+        # Handlers looking the user up again get this instance back.
+        remember_for_request(user)
+
+
+def current_user_record() -> Optional[User]:
+    """
+    The authenticated user as a persistent instance, e.g. to update it: the
+    one authentication loaded, or after stateless authentication, loaded once
+    for the rest of the request.
+    """
+    principal = g.principal
+    if inspect(principal.user).persistent:
+        return principal.user
+    return User.load_user(principal.user_id)
+
+
 def verify_user_basic(username: str, password: str) -> Optional[User]:
+    """
+    Authenticate HTTP Basic credentials. Credentials verified recently skip
+    the password KDF, but still cost one primary-key SELECT of the user.
+    """
+    digest = credential_digest(username, password)
+    cached = get_cached_credentials(digest)
+    if cached is not None:
+        # These exact credentials were verified recently: skip the KDF as long
+        # as the user's password hash has not changed since (e.g. in another
+        # worker, which this process' cache cannot hear about).
+        user_id, password_hash = cached
+        user = User.load_user(user_id)
+        if (
+            user
+            and user.is_active
+            and user.username == username
+            and user.password == password_hash
+        ):
+            login_user(user)
+            set_principal(user)
+
+            return user
+        invalidate_user_credentials(user_id)
+
+    # Anything past this point may run the KDF: limit it per IP and username
+    # (raises RateLimitExceeded) and give the token back if it was right.
+    charge_password_check(username)
     user = User.query.filter_by(username=username).first()  #  None | {usern....}
 
-    if user and User.check_password(user.password, password):
+    if user and user.is_active and User.check_password(user.password, password):
+        refund_password_check(username)
+        cache_credentials(digest, user.id, user.password)
         login_user(user)
-        g.current_user = {
-            "username": user.username,
-            "user_id": user.id,
-        }
+        set_principal(user)
 
         return user
 
@@ -59,21 +160,39 @@ def verify_user_jwt() -> Optional[User]:
     verify_jwt_in_request()
 
     user_identity = json.loads(get_jwt_identity())
-    user_id = user_identity["user_id"]
+    user_id = user_identity["id"]
+    token_version = get_jwt().get("ver", 0)
+
+    if current_app.config["JWT_STATELESS"]:
+        # The signed claims are the principal; only make sure the token has
+        # not been revoked since it was issued.
+        if get_token_version(user_id) != token_version:
+            return None
+
+        user = User.from_identity(user_identity)
+        set_principal(user)
+
+        return user
+
     user = User.load_user(user_id)
 
-    if user:
+    if user and user.is_active and user.token_version == token_version:
         login_user(user)
-        g.current_user = {
-            "username": user.username,
-            "user_id": user.id,
-        }
+        set_principal(user)
 
         return user
 
     return None
 
 
+def too_many_attempts(e: RateLimitExceeded) -> tuple[dict, int, dict]:
+    return (
+        {"message": str(e)},
+        HTTPStatus.TOO_MANY_REQUESTS,
+        {"Retry-After": e.retry_after_header()},
+    )
+
+
 def get_user_metadata(auth_header: str) -> tuple[str, str]:
     # `Basic dXNlcjpwYXNzd29yZA==` => [ 'Basic', 'dXNlcjpwYXNzd29yZA==']
     base64_credentials_meta = auth_header.split(" ")
@@ -94,14 +213,19 @@ def auth_required(allowed_roles: Optional[list[UserRole]] = None):
             auth_header = request.headers.get("Authorization")
 
             if auth_header and auth_header.startswith("Bearer "):
+                set_auth_scheme("jwt")
                 user = verify_user_jwt()  # User | None
 
                 if not user:
                     return {"message": "Invalid credentials"}, HTTPStatus.UNAUTHORIZED
 
             elif auth_header and auth_header.startswith("Basic "):
+                set_auth_scheme("basic")
                 username, password = get_user_metadata(auth_header)
-                user = verify_user_basic(username, password)  # User | None
+                try:
+                    user = verify_user_basic(username, password)  # User | None
+                except RateLimitExceeded as e:
+                    return too_many_attempts(e)
 
                 if not user:
                     return {"message": "Invalid credentials"}, HTTPStatus.UNAUTHORIZED
@@ -0,0 +1,37 @@
+import hashlib
+import hmac
+import secrets
+from typing import Optional
+
+from app.config.auth import BASIC_AUTH_CACHE_SIZE, BASIC_AUTH_CACHE_TTL
+from app.utils.cache import TTLCache
+
+# Per-process key: cache keys are useless outside this process and a memory
+# dump never exposes anything from which the password could be brute-forced
+# faster than from the stored KDF hash.
+_DIGEST_KEY = secrets.token_bytes(32)
+
+# credential digest -> (user id, password hash the credentials were checked against)
+basic_credential_cache = TTLCache(BASIC_AUTH_CACHE_SIZE, BASIC_AUTH_CACHE_TTL)
+
+
+def credential_digest(username: str, password: str) -> bytes:
+    message = username.encode("utf-8") + b"\0" + password.encode("utf-8")
+    return hmac.new(_DIGEST_KEY, message, hashlib.sha256).digest()
+
+
+def get_cached_credentials(digest: bytes) -> Optional[tuple[int, str]]:
+    return basic_credential_cache.get(digest)
+
+
+def cache_credentials(digest: bytes, user_id: int, password_hash: str) -> None:
+    basic_credential_cache.set(digest, (user_id, password_hash))
+
+
+def invalidate_user_credentials(user_id: int) -> None:
+    """Forget every cached credential of a user (password or role changed)."""
+    basic_credential_cache.discard_where(lambda entry: entry[0] == user_id)
+
+
+def credential_cache_stats() -> dict[str, int]:
+    return basic_credential_cache.stats()
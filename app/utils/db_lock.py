@@ -0,0 +1,65 @@
+from contextlib import contextmanager
+import logging
+import os
+import tempfile
+import time
+from typing import Iterator
+
+from sqlalchemy import text
+
+from app.models import db
+
+# Correct the logging level
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class LockTimeoutError(RuntimeError):
+    """Raised when an advisory lock could not be acquired in time."""
+
+
+@contextmanager
+def advisory_lock(name: str, timeout: int = 60) -> Iterator[None]:
+    """
+    Hold a cross-process lock called `name` for the duration of the block.
+
+    On MySQL this is `GET_LOCK`, held on a dedicated connection so it spans all
+    workers and hosts sharing the database. Other databases (SQLite in tests and
+    development) fall back to an exclusive lock file on the local host.
+    """
+    if db.engine.dialect.name == "mysql":
+        with db.engine.connect() as connection:
+            acquired = connection.execute(
+                text("SELECT GET_LOCK(:name, :timeout)"),
+                {"name": name, "timeout": timeout},
+            ).scalar()
+            if acquired != 1:
+                raise LockTimeoutError(f"Could not acquire lock '{name}'")
+            try:
+                yield
+            finally:
+                connection.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": name})
+        return
+
+    try:
+        import fcntl
+    except ImportError:  # pragma: no cover - Windows development machines
+        logger.warning(f"No advisory lock support; running '{name}' unlocked")
+        yield
+        return
+
+    path = os.path.join(tempfile.gettempdir(), f"{name}.lock")
+    deadline = time.monotonic() + timeout
+    with open(path, "w") as lock_file:
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise LockTimeoutError(f"Could not acquire lock '{name}'")
+                time.sleep(0.1)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -0,0 +1,158 @@
+from functools import wraps
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Optional
+
+import sqlalchemy as sa
+from flask import current_app, g, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql import Select
+
+# Correct the logging level
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+REPLICA_BIND_PREFIX = "replica_"
+
+_lag_lock = threading.Lock()
+_replica_lag: dict[str, tuple[float, Optional[float]]] = {}  # key: (checked, lag)
+
+# Monotonic time of this process' last write. For DATABASE_REPLICA_MAX_LAG
+# seconds afterwards all reads go to the primary, so neither the writer nor the
+# response caches refilled right after the write see a replica that is behind.
+_last_write = float("-inf")
+
+
+def engine_options(
+    uri: Optional[str],
+    pool_size: int,
+    max_overflow: int,
+    pool_timeout: float,
+    pool_recycle: int,
+    pool_pre_ping: bool,
+) -> dict[str, Any]:
+    """Engine options for `uri`; SQLite keeps the pool Flask-SQLAlchemy picks."""
+    options: dict[str, Any] = {"pool_pre_ping": pool_pre_ping}
+    if uri and not uri.startswith("sqlite"):
+        options.update(
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            pool_recycle=pool_recycle,
+        )
+    return options
+
+
+def replica_binds(uris: list[str], **pool_options: Any) -> dict[str, dict]:
+    """`SQLALCHEMY_BINDS` for the replicas, each with its own pool settings."""
+    return {
+        f"{REPLICA_BIND_PREFIX}{number}": {
+            "url": uri,
+            **engine_options(uri, **pool_options),
+        }
+        for number, uri in enumerate(uris)
+    }
+
+
+def measure_replica_lag(engine: sa.engine.Engine) -> Optional[float]:
+    """
+    Return how many seconds `engine`'s database is behind its source, 0 when it
+    is not replicating (e.g. a standalone copy), or None when unknown.
+    """
+    if engine.dialect.name != "mysql":
+        return 0.0
+    try:
+        with engine.connect() as connection:
+            try:
+                status = connection.execute(sa.text("SHOW REPLICA STATUS"))
+            except sa.exc.DBAPIError:
+                status = connection.execute(sa.text("SHOW SLAVE STATUS"))
+            row = status.mappings().first()
+    except sa.exc.DBAPIError as e:
+        logger.error(f"Could not check replica lag: {str(e)}")
+        return None
+    if row is None:
+        return 0.0
+    lag = row.get("Seconds_Behind_Source", row.get("Seconds_Behind_Master"))
+    return None if lag is None else float(lag)
+
+
+def replica_lag(key: str, engine: sa.engine.Engine, interval: float) -> Optional[float]:
+    """`measure_replica_lag`, re-measured at most every `interval` seconds."""
+    now = time.monotonic()
+    with _lag_lock:
+        cached = _replica_lag.get(key)
+    if cached and now - cached[0] < interval:
+        return cached[1]
+    lag = measure_replica_lag(engine)
+    with _lag_lock:
+        _replica_lag[key] = (now, lag)
+    return lag
+
+
+def healthy_replicas(engines: dict) -> list[sa.engine.Engine]:
+    max_lag = current_app.config["DATABASE_REPLICA_MAX_LAG"]
+    interval = current_app.config["DATABASE_REPLICA_LAG_CHECK_INTERVAL"]
+    healthy = []
+    for key, engine in engines.items():
+        if not (key and key.startswith(REPLICA_BIND_PREFIX)):
+            continue
+        lag = replica_lag(key, engine, interval)
+        if lag is not None and lag <= max_lag:
+            healthy.append(engine)
+    return healthy
+
+
+def _recently_written() -> bool:
+    return (
+        time.monotonic() - _last_write < current_app.config["DATABASE_REPLICA_MAX_LAG"]
+    )
+
+
+def _mark_write() -> None:
+    global _last_write
+    _last_write = time.monotonic()
+    if has_request_context():
+        g.db_wrote = True
+
+
+class RoutingSession(Session):
+    """
+    Session sending the SELECTs of `read_only` request handlers to a healthy
+    read replica and every other statement to the primary.
+
+    Once a handler writes, the rest of the request reads from the primary
+    (read-your-writes), as does the whole process for a little while.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or isinstance(clause, sa.sql.dml.UpdateBase):
+                _mark_write()
+            elif isinstance(clause, Select) and self._reads_from_replica():
+                replicas = healthy_replicas(self._db.engines)
+                if replicas:
+                    return random.choice(replicas)
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _reads_from_replica(self) -> bool:
+        return (
+            has_request_context()
+            and g.get("db_read_only", False)
+            and not g.get("db_wrote", False)
+            and not (self.new or self.dirty or self.deleted)
+            and not _recently_written()
+        )
+
+
+def read_only(func: Callable) -> Callable:
+    """Let the SELECTs of a request handler go to a read replica."""
+
+    @wraps(func)
+    def wrapper(*args, **kwargs) -> Any:
+        g.db_read_only = True
+        return func(*args, **kwargs)
+
+    return wrapper
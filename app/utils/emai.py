@@ -1,70 +1,132 @@
 from email.mime.text import MIMEText
+from functools import lru_cache
+import logging
 import os
 import smtplib
-from app.config.email import SMTP_SERVER, SMTP_PORT, SMTP_EMAIL, SMTP_PASSWORD
-from jinja2 import Environment, FileSystemLoader
+from app.config.email import (
+    SMTP_SERVER,
+    SMTP_PORT,
+    SMTP_EMAIL,
+    SMTP_PASSWORD,
+    SMTP_STARTTLS,
+    SMTP_TIMEOUT,
+)
+from app.models.outbox import EmailOutbox
+from jinja2 import Environment, FileSystemLoader, Template
+
+# Correct the logging level
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TEMPLATES_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "email_templates")
+)
+
+# One environment per process; templates are compiled on first use and never
+# re-read from disk afterwards.
+_template_env = Environment(loader=FileSystemLoader(TEMPLATES_PATH), auto_reload=False)
+
+
+@lru_cache(maxsize=None)
+def get_email_template(template_name: str) -> Template:
+    return _template_env.get_template(template_name)
 
 
 def render_email_template(template_name: str, context: dict) -> str:
-    templates_path = os.path.abspath(
-        os.path.join(os.path.dirname(__file__), "..", "email_templates")
-    )
-    env = Environment(loader=FileSystemLoader(templates_path))
     try:
-        template = env.get_template(template_name)
+        template = get_email_template(template_name)
         rendered = template.render(context)
         if not rendered or not isinstance(rendered, str):
             raise ValueError(
                 f"Template {template_name} rendered an invalid or empty result."
             )
         return rendered
-    except Exception as e:
-        print(f"Error rendering template {template_name}: {str(e)}")
+    except Exception:
+        logger.exception(f"Error rendering template {template_name}")
         return ""
 
 
-def send_registration_email(to_email, full_name, username, password):
+def open_smtp_connection() -> smtplib.SMTP:
+    """
+    Connect to the configured SMTP server, upgrade to TLS and log in.
+
+    STARTTLS and login are skipped when disabled/unset, e.g. for a local SMTP
+    stand-in during development.
+    """
+    if not all([SMTP_SERVER, SMTP_PORT, SMTP_EMAIL]):
+        raise ValueError("One or more required SMTP config variables are missing.")
+
+    server = smtplib.SMTP(SMTP_SERVER, int(SMTP_PORT), timeout=SMTP_TIMEOUT)
     try:
-        if not all(
-            [
-                to_email,
-                full_name,
-                username,
-                password,
-                SMTP_SERVER,
-                SMTP_PORT,
-                SMTP_EMAIL,
-                SMTP_PASSWORD,
-            ]
-        ):
-            raise ValueError(
-                "One or more required parameters or config variables are missing."
-            )
+        if SMTP_STARTTLS:
+            server.starttls()
+        if SMTP_PASSWORD:
+            server.login(SMTP_EMAIL, SMTP_PASSWORD)
+    except Exception:
+        server.close()
+        raise
+    return server
+
+
+def build_email_message(to_email: str, subject: str, body: str) -> MIMEText:
+    msg = MIMEText(body, "html", _charset="utf-8")
+    msg["From"] = SMTP_EMAIL
+    msg["To"] = to_email
+    msg["Subject"] = subject
+    return msg
+
 
-        email_body = render_email_template(
+def queue_email(to_email: str, subject: str, template_name: str, context: dict):
+    """
+    Render an email and add it to the outbox in the current session.
+
+    The caller commits; the message is then sent by the outbox workers.
+    """
+    if not to_email:
+        raise ValueError("The recipient address is missing.")
+
+    email_body = render_email_template(template_name, context)
+    if not isinstance(email_body, str) or not email_body.strip():
+        raise ValueError("Rendered email body is empty or invalid.")
+
+    return EmailOutbox.enqueue(to_email, subject, email_body)
+
+
+def queue_registration_email(to_email, full_name, username, password):
+    try:
+        if not all([to_email, full_name, username, password]):
+            raise ValueError("One or more required parameters are missing.")
+
+        queue_email(
+            to_email,
+            "Welcome to My Library",
             "registration_email_template.html",
             {"full_name": full_name, "username": username, "password": password},
         )
+        return True
 
-        if not isinstance(email_body, str) or not email_body.strip():
-            raise ValueError("Rendered email body is empty or invalid.")
+    except Exception:
+        logger.exception("Failed to queue email")
+        return False
 
-        msg = MIMEText(email_body, "html", _charset="utf-8")
-        msg["From"] = SMTP_EMAIL  # Updated to SMTP_EMAIL
-        msg["To"] = to_email
-        msg["Subject"] = "Welcome to My Library"
 
-        server = smtplib.SMTP(SMTP_SERVER, int(SMTP_PORT))
-        server.starttls()
-        server.login(
-            SMTP_EMAIL, SMTP_PASSWORD
-        )  # Updated to SMTP_EMAIL and SMTP_PASSWORD
-        server.send_message(msg)
-        server.quit()
+def queue_overdue_digest_email(to_email, full_name, books):
+    """
+    Queue one email listing all of a user's overdue `books` (dicts with
+    `title` and `borrowed_until`).
+    """
+    try:
+        if not books:
+            raise ValueError("No overdue books to report.")
 
-        print(f"Email sent to {to_email}")
+        queue_email(
+            to_email,
+            "Overdue books at My Library",
+            "overdue_digest_email_template.html",
+            {"full_name": full_name, "books": books},
+        )
         return True
 
-    except Exception as e:
-        print(f"Failed to send email: {str(e)}")
+    except Exception:
+        logger.exception("Failed to queue email")
         return False
@@ -0,0 +1,52 @@
+import csv
+import io
+import json
+from typing import Iterable, Iterator
+
+from flask_sqlalchemy.query import Query
+
+from app.models.books import Book
+from app.utils.serializers import BOOK_FIELDS
+
+EXPORT_FIELDS = BOOK_FIELDS
+EXPORT_BATCH_SIZE = 1000
+
+
+def iter_export_rows(
+    query: Query, batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[tuple]:
+    """
+    Stream the rows of a `BOOK_COLUMNS` query from a server-side cursor,
+    `batch_size` rows at a time, so memory stays flat for any catalog size.
+    """
+    for row in query.order_by(Book.id).yield_per(batch_size):
+        borrowed_until = row[-1]
+        yield (*row[:-1], borrowed_until.isoformat() if borrowed_until else "")
+
+
+def iter_ndjson(
+    rows: Iterable[tuple], batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[str]:
+    chunk = []
+    for row in rows:
+        chunk.append(json.dumps(dict(zip(EXPORT_FIELDS, row))))
+        if len(chunk) >= batch_size:
+            yield "\n".join(chunk) + "\n"
+            chunk = []
+    if chunk:
+        yield "\n".join(chunk) + "\n"
+
+
+def iter_csv(
+    rows: Iterable[tuple], batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
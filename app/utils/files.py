@@ -1,8 +1,30 @@
+from typing import Optional
+
 from app.config.uploads import ALLOWED_EXTENSIONS
 
+# Leading magic bytes of the image formats we accept as uploads.
+IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
 
 def is_allowed_file(filename: str) -> bool:
     """
     Check if the file has an allowed extension.
     """
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
+
+
+def sniff_image_mime_type(data: bytes) -> Optional[str]:
+    """
+    Detect the MIME type of an image from its content rather than its filename.
+    """
+    for signature, mime_type in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return mime_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return None
@@ -0,0 +1,49 @@
+from typing import Any
+
+from sqlalchemy import String
+
+# How the text filters of the list endpoints match: anywhere in the value
+# (the default) or only at its start, which an index can serve.
+MATCH_MODES = ("contains", "prefix")
+
+
+def prefix_string(length: int) -> String:
+    """
+    A String column whose index serves `starts_with`. MySQL's default `_ci`
+    collations already compare case-insensitively; SQLite only uses an index
+    for LIKE on a NOCASE column.
+    """
+    return String(length).with_variant(String(length, collation="NOCASE"), "sqlite")
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def contains(column: Any, value: str) -> Any:
+    """
+    Case-insensitive `column LIKE '%value%'` with the wildcards in `value`
+    escaped. No index can serve it; the table is scanned.
+    """
+    return column.ilike(f"%{_escape_like(value)}%", escape="\\")
+
+
+def starts_with(column: Any, value: str) -> Any:
+    """
+    `column LIKE 'value%'` with the wildcards in `value` escaped.
+
+    Unlike a `%value%` substring match this is an index range scan on a
+    `prefix_string` column, and case-insensitive like `contains`.
+    """
+    return column.like(f"{_escape_like(value)}%", escape="\\")
+
+
+def text_match(column: Any, value: str, match: str = "contains") -> Any:
+    """The filter of `column` on `value` for one of `MATCH_MODES`."""
+    if match == "prefix":
+        return starts_with(column, value)
+    if match == "contains":
+        return contains(column, value)
+    raise ValueError(
+        f"Unknown match mode {match!r}; use one of {', '.join(MATCH_MODES)}"
+    )
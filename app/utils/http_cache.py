@@ -0,0 +1,100 @@
+import gzip
+import hashlib
+from http import HTTPStatus
+from typing import Hashable, Optional
+
+from flask import Flask, Response, current_app, request
+from werkzeug.http import is_resource_modified
+
+from app.config.http import COMPRESSION_CACHE_SIZE, COMPRESSION_CACHE_TTL
+from app.utils.cache import TTLCache
+from app.utils.versions import get_version
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+# (encoding, body digest) -> compressed body
+compressed_body_cache = TTLCache(COMPRESSION_CACHE_SIZE, COMPRESSION_CACHE_TTL)
+
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def version_etag(name: str, key: Hashable) -> str:
+    """
+    Weak ETag of a response built from the `name` data version and `key`
+    (the normalized query arguments), without building or hashing the body.
+    The version is shared by all workers, so they all agree on the tag.
+    """
+    token = f"{name}:{get_version(name)}:{key!r}"
+    return hashlib.blake2b(token.encode("utf-8"), digest_size=12).hexdigest()
+
+
+def is_not_modified(etag: str) -> bool:
+    """Whether the client's If-None-Match already covers `etag`."""
+    return not is_resource_modified(request.environ, etag=etag)
+
+
+def not_modified_response(etag: str) -> Response:
+    response = current_app.response_class(status=HTTPStatus.NOT_MODIFIED)
+    response.set_etag(etag, weak=True)
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(
+            body, quality=current_app.config["COMPRESSION_BROTLI_QUALITY"]
+        )
+    # mtime=0 keeps the output (and so the cache) independent of the time.
+    return gzip.compress(
+        body, compresslevel=current_app.config["COMPRESSION_GZIP_LEVEL"], mtime=0
+    )
+
+
+def _after_request(response: Response) -> Response:
+    if (
+        request.method not in ("GET", "HEAD")
+        or response.status_code != HTTPStatus.OK
+        or response.mimetype != "application/json"
+        or response.is_streamed
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    body = response.get_data()
+    digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+
+    etag, _ = response.get_etag()
+    if etag is None:
+        # No cheaper validator from the handler: tag the body itself.
+        etag = digest
+        response.set_etag(etag, weak=True)
+        if is_not_modified(etag):
+            response.status_code = HTTPStatus.NOT_MODIFIED
+            response.set_data(b"")
+            del response.headers["Content-Length"]
+            return response
+
+    if len(body) < current_app.config["COMPRESSION_MIN_SIZE"]:
+        return response
+    encoding = request.accept_encodings.best_match(ENCODINGS)
+    if encoding is None:
+        return response
+
+    key = (encoding, digest)
+    compressed: Optional[bytes] = compressed_body_cache.get(key)
+    if compressed is None:
+        compressed = _compress(body, encoding)
+        compressed_body_cache.set(key, compressed)
+    response.set_data(compressed)
+    response.content_encoding = encoding
+    return response
+
+
+def init_http_cache(app: Flask) -> None:
+    app.after_request(_after_request)
@@ -0,0 +1,219 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+import io
+import logging
+import multiprocessing
+import queue
+import threading
+from typing import Optional
+
+from flask import Flask
+from PIL import Image, ImageOps
+from sqlalchemy import func
+
+from app.models import db
+from app.models.books import Book, BookImageVariant
+
+# Correct the logging level
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_executor_lock = threading.Lock()
+_executor: Optional[ProcessPoolExecutor] = None
+
+# Rendered variants waiting to be written, as (app, book_id, source_hash,
+# future), drained by one writer thread per process.
+_results: "queue.Queue[tuple[Flask, int, str, Future]]" = queue.Queue()
+_writer: Optional[threading.Thread] = None
+
+
+def render_variants(
+    image_data: bytes, widths: tuple[int, ...], image_format: str, quality: int
+) -> list[tuple[int, bytes]]:
+    """
+    Decode a cover once and encode one downscaled copy per requested width.
+
+    Runs in a worker process, so it must stay a plain top-level function that
+    only takes and returns picklable values.
+    """
+    with Image.open(io.BytesIO(image_data)) as original:
+        image = ImageOps.exif_transpose(original)
+        if image_format.upper() == "JPEG":
+            image = image.convert("RGB")
+        elif image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+
+        variants = []
+        for width in sorted(widths):
+            # Never upscale: small originals are only re-encoded.
+            target_width = min(width, image.width)
+            target_height = max(1, round(image.height * target_width / image.width))
+            resized = image.resize((target_width, target_height), Image.LANCZOS)
+            buffer = io.BytesIO()
+            resized.save(buffer, format=image_format, quality=quality, optimize=True)
+            variants.append((width, buffer.getvalue()))
+        return variants
+
+
+def get_executor(app: Flask) -> ProcessPoolExecutor:
+    """
+    Return the process pool of this worker, creating it on first use.
+
+    The pool uses the `spawn` start method so children never inherit the
+    parent's threads, sockets or database connections.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=app.config["IMAGE_VARIANT_WORKERS"],
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def shutdown_executor(wait: bool = True) -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
+
+
+def submit_variants(app: Flask, image_data: bytes) -> Future:
+    return get_executor(app).submit(
+        render_variants,
+        image_data,
+        tuple(app.config["IMAGE_VARIANT_WIDTHS"]),
+        app.config["IMAGE_VARIANT_FORMAT"],
+        app.config["IMAGE_VARIANT_QUALITY"],
+    )
+
+
+def store_variants(
+    book_id: int, source_hash: str, variants: list[tuple[int, bytes]]
+) -> bool:
+    """
+    Replace the stored variants of a book, unless its cover changed meanwhile.
+
+    The caller commits.
+    """
+    current_hash = db.session.query(Book.image_hash).filter(Book.id == book_id).scalar()
+    if current_hash != source_hash:
+        logger.info(f"Skipping stale image variants for book {book_id}")
+        return False
+
+    remove_variants(book_id)
+    db.session.add_all(
+        BookImageVariant.create_variant(book_id, width, data, source_hash)
+        for width, data in variants
+    )
+    return True
+
+
+def remove_variants(book_id: int) -> None:
+    """Drop the stored variants of a book in the current session."""
+    BookImageVariant.query.filter_by(book_id=book_id).delete()
+
+
+def _write_results() -> None:
+    while True:
+        app, book_id, source_hash, future = _results.get()
+        try:
+            variants = future.result()
+            with app.app_context():
+                try:
+                    if store_variants(book_id, source_hash, variants):
+                        db.session.commit()
+                        logger.info(
+                            f"Stored {len(variants)} image variants for book {book_id}"
+                        )
+                except Exception:
+                    db.session.rollback()
+                    raise
+        except Exception:
+            logger.exception(f"Failed to build image variants for book {book_id}")
+        finally:
+            _results.task_done()
+
+
+def _ensure_writer() -> None:
+    global _writer
+    with _executor_lock:
+        # Threads do not survive a fork: a worker starts its own.
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(
+                target=_write_results, name="image-variant-writer", daemon=True
+            )
+            _writer.start()
+
+
+def schedule_variants(
+    app: Flask, book_id: int, image_data: bytes, source_hash: str
+) -> Future:
+    """
+    Render the variants of a freshly stored cover off the request thread.
+
+    Call after the book is committed. The pool's callback only queues the
+    result; a writer thread of this process stores it, so no database work
+    runs on the pool's management thread.
+    """
+    _ensure_writer()
+    future = submit_variants(app, image_data)
+    future.add_done_callback(
+        lambda done: _results.put((app, book_id, source_hash, done))
+    )
+    return future
+
+
+def backfill_variants(app: Flask, batch_size: int = 50) -> int:
+    """
+    Render variants for every cover that is missing some or has stale ones.
+
+    Works through the books in keyset batches; each batch is rendered in
+    parallel by the process pool and committed together.
+    """
+    # Up to date means one current variant for every configured width, so
+    # widths added to IMAGE_VARIANT_WIDTHS later get rendered too.
+    widths = set(app.config["IMAGE_VARIANT_WIDTHS"])
+    current_variants = (
+        db.session.query(func.count(BookImageVariant.width))
+        .filter(
+            BookImageVariant.book_id == Book.id,
+            BookImageVariant.source_hash == Book.image_hash,
+            BookImageVariant.width.in_(widths),
+        )
+        .correlate(Book)
+        .scalar_subquery()
+    )
+    rendered = 0
+    last_id = 0
+    while True:
+        candidates = (
+            db.session.query(Book.id, Book.image_hash)
+            .filter(
+                Book.id > last_id,
+                Book.has_image.is_(True),
+                current_variants < len(widths),
+            )
+            .order_by(Book.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not candidates:
+            break
+        last_id = candidates[-1][0]
+
+        futures = {
+            book_id: (source_hash, submit_variants(app, Book.read_image(book_id)))
+            for book_id, source_hash in candidates
+        }
+        for book_id, (source_hash, future) in futures.items():
+            try:
+                if store_variants(book_id, source_hash, future.result()):
+                    rendered += 1
+            except Exception as e:
+                logger.error(f"Failed to build image variants for book {book_id}: {e}")
+        db.session.commit()
+        logger.info(f"Rendered image variants for {rendered} books")
+
+    return rendered
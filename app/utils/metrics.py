@@ -0,0 +1,317 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import partial
+import hmac
+from http import HTTPStatus
+import threading
+import time
+from typing import Iterator, Optional
+
+from flask import Flask, Response, current_app, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config.metrics import METRICS_LATENCY_BUCKETS
+from app.utils.credential_cache import basic_credential_cache
+from app.utils.http_cache import compressed_body_cache
+from app.utils.response_cache import catalog_response_cache
+from app.utils.token_versions import token_version_cache
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = tuple[tuple[str, str], ...]
+
+# name: (type, help)
+#
+# Every process records and serves only its own metrics. Under `flask serve`
+# the gunicorn workers share one listening socket, so a scrape of /metrics is
+# answered by whichever worker accepts it: successive scrapes see different
+# workers' counters, and no scrape sees the total. Scrape per worker by
+# running one worker per instance (SERVER_WORKERS=1, scaled out by instances)
+# and pointing the scraper at every instance; there is no aggregation across
+# the processes of one instance.
+METRICS = {
+    "http_requests_total": (
+        "counter",
+        "Requests handled, by resource, method and status code.",
+    ),
+    "http_request_duration_seconds": (
+        "histogram",
+        "Time to produce a response, by resource and method.",
+    ),
+    "http_request_sql_statements_total": (
+        "counter",
+        "SQL statements executed while handling requests.",
+    ),
+    "http_request_sql_seconds_total": (
+        "counter",
+        "Time spent executing SQL while handling requests.",
+    ),
+    "http_request_auth_total": (
+        "counter",
+        "Requests by the authentication scheme they presented (basic, jwt, none).",
+    ),
+    "password_hash_seconds": (
+        "histogram",
+        "Time spent hashing (hash) or checking (verify) passwords.",
+    ),
+    "auth_rate_limited_total": (
+        "counter",
+        "Password checks refused by the rate limiter, by bucket (ip, user).",
+    ),
+}
+
+CACHES = {
+    "catalog_response": catalog_response_cache,
+    "basic_credentials": basic_credential_cache,
+    "token_version": token_version_cache,
+    "compressed_body": compressed_body_cache,
+}
+
+
+class _Shard:
+    """The metrics recorded by one thread; only that thread writes to it."""
+
+    __slots__ = ("counters", "histograms")
+
+    def __init__(self) -> None:
+        self.counters: dict[tuple[str, Labels], float] = {}
+        # Per-bucket (not cumulative) counts, the +Inf count, then the sum.
+        self.histograms: dict[tuple[str, Labels], list] = {}
+
+
+class _RequestStats:
+    __slots__ = ("started", "statements", "sql_seconds", "auth")
+
+    def __init__(self, started: float) -> None:
+        self.started = started
+        self.statements = 0
+        self.sql_seconds = 0.0
+        self.auth = "none"
+
+
+_buckets = tuple(sorted(METRICS_LATENCY_BUCKETS))
+_local = threading.local()
+_shards_lock = threading.Lock()
+_shards: list[tuple[threading.Thread, _Shard]] = []
+# Shards of finished threads, folded together at scrape time.
+_retired = _Shard()
+
+
+def _shard() -> _Shard:
+    shard = getattr(_local, "shard", None)
+    if shard is None:
+        shard = _local.shard = _Shard()
+        with _shards_lock:
+            _shards.append((threading.current_thread(), shard))
+    return shard
+
+
+def inc(name: str, labels: Labels, amount: float = 1) -> None:
+    counters = _shard().counters
+    key = (name, labels)
+    counters[key] = counters.get(key, 0) + amount
+
+
+def observe(name: str, labels: Labels, value: float) -> None:
+    histograms = _shard().histograms
+    key = (name, labels)
+    values = histograms.get(key)
+    if values is None:
+        values = histograms[key] = [0] * (len(_buckets) + 1) + [0.0]
+    values[bisect_left(_buckets, value)] += 1
+    values[-1] += value
+
+
+@contextmanager
+def timed(name: str, **labels: str) -> Iterator[None]:
+    """Observe how long the block takes in histogram `name`."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, tuple(sorted(labels.items())), time.perf_counter() - started)
+
+
+def set_auth_scheme(scheme: str) -> None:
+    """Record the authentication scheme presented by the current request."""
+    stats = getattr(_local, "request", None)
+    if stats is not None:
+        stats.auth = scheme
+
+
+def _merge(into: _Shard, shard: _Shard) -> None:
+    # Copying a dict is atomic under the GIL, so a live shard can be read while
+    # its thread keeps recording; at worst a histogram is one sample torn.
+    for key, value in shard.counters.copy().items():
+        into.counters[key] = into.counters.get(key, 0) + value
+    for key, values in shard.histograms.copy().items():
+        total = into.histograms.setdefault(key, [0] * (len(values) - 1) + [0.0])
+        for index, value in enumerate(list(values)):
+            total[index] += value
+
+
+def _collect() -> _Shard:
+    totals = _Shard()
+    with _shards_lock:
+        live = []
+        for thread, shard in _shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                _merge(_retired, shard)
+        _shards[:] = live
+        _merge(totals, _retired)
+        for _, shard in live:
+            _merge(totals, shard)
+    return totals
+
+
+def _format_labels(labels: Labels, extra: Optional[tuple[str, str]] = None) -> str:
+    if extra:
+        labels = labels + (extra,)
+    if not labels:
+        return ""
+    escaped = (
+        (key, value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n"))
+        for key, value in labels
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render() -> str:
+    """All metrics of this process in the Prometheus text exposition format."""
+    totals = _collect()
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == "counter":
+            for (metric, labels), value in sorted(totals.counters.items()):
+                if metric == name:
+                    lines.append(
+                        f"{name}{_format_labels(labels)} {_format_value(value)}"
+                    )
+            continue
+        for (metric, labels), values in sorted(totals.histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(_buckets + (float("inf"),), values):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                lines.append(
+                    f"{name}_bucket{_format_labels(labels, ('le', le))} {cumulative}"
+                )
+            lines.append(f"{name}_sum{_format_labels(labels)} {values[-1]!r}")
+            lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+
+    stats = {name: cache.stats() for name, cache in CACHES.items()}
+    for metric, key, kind, help_text in (
+        ("cache_entries", "size", "gauge", "Entries held by an in-process cache."),
+        ("cache_hits_total", "hits", "counter", "Cache lookups that found an entry."),
+        ("cache_misses_total", "misses", "counter", "Cache lookups that missed."),
+        ("cache_evictions_total", "evictions", "counter", "Entries evicted for room."),
+    ):
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for name, values in stats.items():
+            lines.append(f'{metric}{{cache="{name}"}} {values[key]}')
+    return "\n".join(lines) + "\n"
+
+
+def _resource_name() -> str:
+    view = (
+        current_app.view_functions.get(request.endpoint) if request.endpoint else None
+    )
+    view_class = getattr(view, "view_class", None)
+    if view_class is not None:
+        return view_class.__name__
+    return request.endpoint or "unmatched"
+
+
+def _before_request() -> None:
+    _local.request = _RequestStats(time.perf_counter())
+
+
+def _record_request(stats: _RequestStats, labels: Labels, status: int) -> None:
+    observe(
+        "http_request_duration_seconds", labels, time.perf_counter() - stats.started
+    )
+    inc("http_requests_total", labels + (("status", str(status)),))
+    inc("http_request_sql_statements_total", labels, stats.statements)
+    inc("http_request_sql_seconds_total", labels, stats.sql_seconds)
+    inc("http_request_auth_total", labels + (("scheme", stats.auth),))
+
+
+def _after_request(response: Response) -> Response:
+    stats = getattr(_local, "request", None)
+    if stats is None:
+        return response
+
+    labels = (("method", request.method), ("resource", _resource_name()))
+    if response.is_streamed:
+        # A streamed body (e.g. the catalog export) runs its queries while it
+        # is sent, after this hook: keep counting until the response closes.
+        response.call_on_close(
+            partial(_record_request, stats, labels, response.status_code)
+        )
+        return response
+    _local.request = None
+    _record_request(stats, labels, response.status_code)
+    return response
+
+
+def _teardown_request(exception: Optional[BaseException]) -> None:
+    _local.request = None
+
+
+def _before_cursor_execute(
+    connection, cursor, statement, parameters, context, executemany
+) -> None:
+    if getattr(_local, "request", None) is not None:
+        connection.info["metrics_started"] = time.perf_counter()
+
+
+def _after_cursor_execute(
+    connection, cursor, statement, parameters, context, executemany
+) -> None:
+    stats = getattr(_local, "request", None)
+    started = connection.info.pop("metrics_started", None)
+    if stats is not None and started is not None:
+        stats.statements += 1
+        stats.sql_seconds += time.perf_counter() - started
+
+
+def metrics_view() -> Response:
+    token = current_app.config["METRICS_TOKEN"]
+    if not token:
+        return Response(status=HTTPStatus.NOT_FOUND)
+    presented = request.headers.get("Authorization", "")
+    if not hmac.compare_digest(presented.encode(), f"Bearer {token}".encode()):
+        return Response(
+            status=HTTPStatus.UNAUTHORIZED, headers={"WWW-Authenticate": "Bearer"}
+        )
+    return Response(render(), content_type=CONTENT_TYPE)
+
+
+def init_metrics(app: Flask) -> None:
+    """Record request, SQL and auth metrics and serve them at /metrics."""
+    global _buckets
+    if not app.config["METRICS_ENABLED"]:
+        return
+    _buckets = tuple(sorted(app.config["METRICS_LATENCY_BUCKETS"]))
+
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    app.add_url_rule("/metrics", "metrics", metrics_view)
+
+    # Listening on the Engine class covers the primary and every replica.
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
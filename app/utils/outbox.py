@@ -0,0 +1,213 @@
+from datetime import datetime, timedelta
+import logging
+import random
+import secrets
+import smtplib
+import threading
+from typing import Callable, Optional
+
+from flask import Flask
+from sqlalchemy import func, update
+
+from app.config.email import SMTP_SERVER
+from app.models import db
+from app.models.outbox import EmailOutbox, EmailStatus
+from app.utils.emai import build_email_message, open_smtp_connection
+
+# Correct the logging level
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MAX_RETRY_DELAY = 6 * 60 * 60
+
+# Set whenever new mail is committed so idle workers do not wait for the poll.
+_wakeup = threading.Event()
+
+
+def wake_outbox_workers() -> None:
+    _wakeup.set()
+
+
+class SmtpSender:
+    """
+    One SMTP connection, opened on first use and reused for every message
+    until closed; a connection dropped by the server is reopened once.
+    """
+
+    def __init__(self, connect: Callable[[], smtplib.SMTP] = open_smtp_connection):
+        self._connect = connect
+        self._connection: Optional[smtplib.SMTP] = None
+
+    def send(self, to_email: str, subject: str, body: str) -> None:
+        message = build_email_message(to_email, subject, body)
+        if self._connection is None:
+            self._connection = self._connect()
+        try:
+            self._connection.send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            self._connection = self._connect()
+            self._connection.send_message(message)
+
+    def close(self) -> None:
+        if self._connection is not None:
+            try:
+                self._connection.quit()
+            except (smtplib.SMTPException, OSError):
+                self._connection.close()
+            self._connection = None
+
+
+def retry_delay(attempts: int, base_delay: float) -> float:
+    """Exponential backoff with jitter, capped at MAX_RETRY_DELAY seconds."""
+    delay = min(base_delay * 2 ** max(attempts - 1, 0), MAX_RETRY_DELAY)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def claim_batch(batch_size: int, lease: float) -> list[EmailOutbox]:
+    """
+    Claim up to `batch_size` due messages for this worker and commit the claim.
+
+    A claim pushes `next_attempt_at` `lease` seconds ahead, so other workers
+    skip the messages, and a worker that dies mid-batch only delays them.
+    """
+    now = datetime.utcnow()
+    due_ids = [
+        message_id
+        for (message_id,) in db.session.query(EmailOutbox.id)
+        .filter(
+            EmailOutbox.status == EmailStatus.PENDING,
+            EmailOutbox.next_attempt_at <= now,
+        )
+        .order_by(EmailOutbox.next_attempt_at)
+        .limit(batch_size)
+    ]
+    if not due_ids:
+        db.session.rollback()
+        return []
+
+    token = secrets.token_hex(16)
+    # Re-checking the due date makes the claim a compare-and-set: rows another
+    # worker claimed in the meantime are no longer due and stay theirs.
+    db.session.execute(
+        update(EmailOutbox)
+        .where(
+            EmailOutbox.id.in_(due_ids),
+            EmailOutbox.status == EmailStatus.PENDING,
+            EmailOutbox.next_attempt_at <= now,
+        )
+        .values(claimed_by=token, next_attempt_at=now + timedelta(seconds=lease))
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return EmailOutbox.query.filter_by(claimed_by=token).all()
+
+
+def process_outbox(
+    sender: SmtpSender,
+    batch_size: int = 50,
+    lease: float = 300,
+    max_attempts: int = 8,
+    base_delay: float = 30,
+) -> tuple[int, int]:
+    """
+    Deliver one batch of due messages over `sender`'s connection.
+
+    Returns the number of messages sent and the number that failed (and were
+    rescheduled or given up on). Outcomes are written in a single commit.
+    """
+    messages = claim_batch(batch_size, lease)
+    sent = failed = 0
+    for message in messages:
+        now = datetime.utcnow()
+        try:
+            sender.send(message.to_email, message.subject, message.body)
+        except Exception as e:
+            failed += 1
+            message.attempts += 1
+            message.last_error = str(e)
+            message.claimed_by = None
+            permanent = isinstance(e, smtplib.SMTPRecipientsRefused)
+            if permanent or message.attempts >= max_attempts:
+                message.status = EmailStatus.FAILED
+                # Nothing will send it any more, and it may carry credentials.
+                message.body = None
+                logger.error(f"Giving up on email {message.id}: {str(e)}")
+            else:
+                delay = retry_delay(message.attempts, base_delay)
+                message.next_attempt_at = now + timedelta(seconds=delay)
+            if isinstance(e, (smtplib.SMTPServerDisconnected, OSError)):
+                sender.close()
+            continue
+
+        sent += 1
+        message.attempts += 1
+        message.status = EmailStatus.SENT
+        message.sent_at = now
+        message.claimed_by = None
+        message.body = None
+
+    if messages:
+        db.session.commit()
+        logger.info(f"Outbox batch: {sent} sent, {failed} failed")
+    return sent, failed
+
+
+def outbox_settings(app: Flask) -> dict:
+    return {
+        "batch_size": app.config["OUTBOX_BATCH_SIZE"],
+        "lease": app.config["OUTBOX_LEASE"],
+        "max_attempts": app.config["OUTBOX_MAX_ATTEMPTS"],
+        "base_delay": app.config["OUTBOX_RETRY_DELAY"],
+    }
+
+
+def outbox_counts() -> dict[str, int]:
+    counts = dict(
+        db.session.query(EmailOutbox.status, func.count(EmailOutbox.id))
+        .group_by(EmailOutbox.status)
+        .all()
+    )
+    return {status.value: counts.get(status, 0) for status in EmailStatus}
+
+
+def start_outbox_workers(app: Flask) -> Optional[threading.Event]:
+    """
+    Start `OUTBOX_WORKERS` daemon threads delivering the outbox. Returns an
+    event that stops them when set, or None when no workers were started.
+
+    Each worker holds its own SMTP connection while there is mail to send and
+    closes it when the outbox runs dry.
+    """
+    workers = app.config["OUTBOX_WORKERS"]
+    if workers <= 0:
+        return None
+    if not SMTP_SERVER:
+        logger.warning("SMTP_SERVER is not set; queued emails will not be sent")
+        return None
+
+    stop = threading.Event()
+    settings = outbox_settings(app)
+
+    def run() -> None:
+        sender = SmtpSender()
+        while not stop.is_set():
+            # Cleared before the claim, so mail committed while the batch runs
+            # ends the wait below at once instead of being lost.
+            _wakeup.clear()
+            with app.app_context():
+                try:
+                    sent, failed = process_outbox(sender, **settings)
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Outbox worker failed: {str(e)}")
+                    sent = failed = 0
+            if not sent and not failed:
+                sender.close()
+                _wakeup.wait(app.config["OUTBOX_POLL_INTERVAL"])
+        sender.close()
+
+    for number in range(workers):
+        threading.Thread(
+            target=run, name=f"outbox-worker-{number}", daemon=True
+        ).start()
+    return stop
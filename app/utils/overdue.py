@@ -0,0 +1,192 @@
+from dataclasses import dataclass
+from datetime import datetime
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+from flask import Flask
+from sqlalchemy import and_, or_, update
+
+from app.models import db
+from app.models.books import Book
+from app.models.user import User
+from app.utils.db_lock import LockTimeoutError, advisory_lock
+from app.utils.emai import queue_overdue_digest_email
+
+# Correct the logging level
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+OVERDUE_SWEEP_LOCK = "book_library_overdue_sweep"
+
+# (to_email, full_name, books) -> queued?
+DigestSender = Callable[[str, str, list[dict]], bool]
+
+
+@dataclass
+class SweepReport:
+    batches: int = 0
+    scanned: int = 0
+    users_notified: int = 0
+    books_notified: int = 0
+    users_failed: int = 0
+
+    def summary(self) -> str:
+        return (
+            f"Swept {self.scanned} overdue loans in {self.batches} batches: "
+            f"notified {self.users_notified} users about {self.books_notified} "
+            f"books, {self.users_failed} digests failed"
+        )
+
+
+def _unnotified_overdue(now: datetime) -> tuple:
+    # `available` + `borrowed_until` match ix_books_available_borrowed_until, so
+    # this is a range scan over lent books that are past due. `= false`, not
+    # `IS false`: MySQL only uses the index for an equality on `available`.
+    return (
+        Book.available == False,  # noqa: E712
+        Book.borrowed_until < now,
+        Book.overdue_notified_at.is_(None),
+    )
+
+
+def _notify_users(
+    user_ids: set[int],
+    now: datetime,
+    report: SweepReport,
+    send: DigestSender,
+    dry_run: bool,
+) -> None:
+    """
+    Send each user one digest of all their unnotified overdue books and mark
+    those books notified. The caller commits.
+    """
+    users = (
+        db.session.query(User.id, User.email, User.full_name)
+        .filter(User.id.in_(user_ids))
+        .all()
+    )
+    loans: dict[int, list] = {}
+    for book_id, title, borrowed_until, borrowed_by in (
+        db.session.query(Book.id, Book.title, Book.borrowed_until, Book.borrowed_by)
+        .filter(*_unnotified_overdue(now), Book.borrowed_by.in_(user_ids))
+        .order_by(Book.borrowed_until)
+    ):
+        loans.setdefault(borrowed_by, []).append((book_id, title, borrowed_until))
+
+    notified_ids = []
+    for user_id, email, full_name in users:
+        books = loans.get(user_id)
+        if not books:
+            continue
+        digest = [
+            {"title": title, "borrowed_until": borrowed_until.strftime("%Y-%m-%d")}
+            for _, title, borrowed_until in books
+        ]
+        if dry_run or send(email, full_name, digest):
+            report.users_notified += 1
+            notified_ids.extend(book_id for book_id, _, _ in books)
+        else:
+            # Left unmarked, so the next sweep retries this user.
+            report.users_failed += 1
+
+    report.books_notified += len(notified_ids)
+    if notified_ids and not dry_run:
+        db.session.execute(
+            update(Book)
+            .where(Book.id.in_(notified_ids), Book.overdue_notified_at.is_(None))
+            .values(overdue_notified_at=now)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def sweep_overdue(
+    batch_size: int = 500,
+    pause: float = 0.2,
+    now: Optional[datetime] = None,
+    dry_run: bool = False,
+    send: DigestSender = queue_overdue_digest_email,
+) -> SweepReport:
+    """
+    Notify the borrowers of all overdue loans, one digest email per user.
+
+    Loans are walked in keyset order on `(borrowed_until, id)`, `batch_size` at
+    a time, committing and sleeping `pause` seconds after every batch. Digests
+    go to the email outbox in the same transaction that marks their loans
+    notified, so an interrupted sweep simply resumes with the rest on its next
+    run and nobody is told twice about the same loan.
+    """
+    now = now or datetime.utcnow()
+    report = SweepReport()
+    # A digest covers all of a user's overdue books, so each user is handled at
+    # most once per sweep, even if a digest failed or this is a dry run.
+    handled: set[int] = set()
+    last_due, last_id = None, None
+    while True:
+        query = db.session.query(Book.id, Book.borrowed_until, Book.borrowed_by).filter(
+            *_unnotified_overdue(now)
+        )
+        if last_due is not None:
+            query = query.filter(
+                or_(
+                    Book.borrowed_until > last_due,
+                    and_(Book.borrowed_until == last_due, Book.id > last_id),
+                )
+            )
+        batch = query.order_by(Book.borrowed_until, Book.id).limit(batch_size).all()
+        if not batch:
+            break
+        last_id, last_due, _ = batch[-1]
+        report.batches += 1
+        report.scanned += len(batch)
+
+        user_ids = {borrowed_by for _, _, borrowed_by in batch if borrowed_by}
+        user_ids -= handled
+        handled |= user_ids
+        if user_ids:
+            _notify_users(user_ids, now, report, send, dry_run)
+        db.session.commit()
+        logger.info(report.summary())
+
+        if len(batch) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+
+    return report
+
+
+def start_overdue_scheduler(app: Flask) -> Optional[threading.Event]:
+    """
+    Run `sweep_overdue` every `OVERDUE_SWEEP_INTERVAL` seconds in a daemon
+    thread. Returns an event that stops the thread when set, or None when the
+    scheduler is disabled.
+
+    Every worker process may run a scheduler; the advisory lock makes sure only
+    one of them sweeps at a time and the others skip that round.
+    """
+    interval = app.config["OVERDUE_SWEEP_INTERVAL"]
+    if interval <= 0:
+        return None
+
+    stop = threading.Event()
+
+    def run() -> None:
+        while not stop.wait(interval):
+            with app.app_context():
+                try:
+                    with advisory_lock(OVERDUE_SWEEP_LOCK, timeout=0):
+                        report = sweep_overdue(
+                            batch_size=app.config["OVERDUE_SWEEP_BATCH_SIZE"],
+                            pause=app.config["OVERDUE_SWEEP_PAUSE"],
+                        )
+                    logger.info(report.summary())
+                except LockTimeoutError:
+                    logger.info("Overdue sweep already running elsewhere, skipping")
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Overdue sweep failed: {str(e)}")
+
+    threading.Thread(target=run, name="overdue-sweeper", daemon=True).start()
+    return stop
@@ -0,0 +1,115 @@
+from functools import wraps
+import logging
+import os
+import threading
+import traceback
+from typing import Any, Callable, Optional
+
+from flask import Flask, Response, current_app, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Correct the logging level
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+QUERY_BUDGET_MODES = ("off", "warn", "raise")
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Statements of the current request, with the app frames that issued them, or
+# None when budgets are off.
+_local = threading.local()
+
+
+class QueryBudgetExceeded(Exception):
+    def __init__(self, endpoint: str, budget: int, statements: list) -> None:
+        self.endpoint = endpoint
+        self.budget = budget
+        self.statements = statements
+        super().__init__(
+            f"{endpoint} ran {len(statements)} SQL statements, budget {budget}"
+        )
+
+    def report(self) -> str:
+        lines = [str(self)]
+        for number, (statement, stack) in enumerate(self.statements, 1):
+            lines.append(f"  {number}. {' '.join(statement.split())}")
+            lines.extend(
+                f"       {frame.filename}:{frame.lineno} in {frame.name}"
+                for frame in stack
+            )
+        return "\n".join(lines)
+
+
+def query_budget(max_statements: int) -> Callable:
+    """
+    Declare how many SQL statements a request to this handler may run in
+    total, authentication included.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs) -> Any:
+            g.query_budget = max_statements
+            return func(*args, **kwargs)
+
+        wrapper.query_budget = max_statements
+        return wrapper
+
+    return decorator
+
+
+def _app_frames() -> list[traceback.FrameSummary]:
+    return [
+        frame
+        for frame in traceback.extract_stack()[:-2]
+        if frame.filename.startswith(APP_ROOT) and frame.filename != __file__
+    ]
+
+
+def _before_cursor_execute(
+    connection, cursor, statement, parameters, context, executemany
+) -> None:
+    statements = getattr(_local, "statements", None)
+    if statements is not None:
+        statements.append((statement, _app_frames()))
+
+
+def _before_request() -> None:
+    if current_app.config["QUERY_BUDGET_MODE"] != "off":
+        _local.statements = []
+
+
+def _after_request(response: Response) -> Response:
+    statements = getattr(_local, "statements", None)
+    _local.statements = None
+    budget: Optional[int] = g.get("query_budget")
+    if statements is None or budget is None or len(statements) <= budget:
+        return response
+
+    exceeded = QueryBudgetExceeded(
+        f"{request.method} {request.path}", budget, statements
+    )
+    if current_app.config["QUERY_BUDGET_MODE"] == "raise":
+        raise exceeded
+    logger.warning(exceeded.report())
+    return response
+
+
+def _teardown_request(exception: Optional[BaseException]) -> None:
+    _local.statements = None
+
+
+def init_query_budget(app: Flask) -> None:
+    mode = app.config["QUERY_BUDGET_MODE"]
+    if mode not in QUERY_BUDGET_MODES:
+        raise ValueError(
+            f"QUERY_BUDGET_MODE must be one of {', '.join(QUERY_BUDGET_MODES)}"
+        )
+    # The hooks stay registered when off, so a test can turn budgets on at run
+    # time by changing the config.
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
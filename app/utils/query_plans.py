@@ -0,0 +1,61 @@
+from contextlib import contextmanager
+import re
+from typing import Any, Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+
+EXPLAINABLE = ("SELECT", "UPDATE", "DELETE")
+SQLITE_FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+
+@contextmanager
+def capture_statements() -> Iterator[list[tuple[Engine, str, Any]]]:
+    """
+    Record `(engine, statement, parameters)` for every SELECT, UPDATE and DELETE
+    any engine (primary or replica) executes inside the block.
+    """
+    statements = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(EXPLAINABLE):
+            statements.append((connection.engine, statement, parameters))
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+
+
+def explain(connection: Connection, statement: str, parameters: Any) -> list[dict]:
+    """Return the plan rows of `statement` as dicts, in the dialect's own format."""
+    if connection.dialect.name == "sqlite":
+        statement = f"EXPLAIN QUERY PLAN {statement}"
+    else:
+        statement = f"EXPLAIN {statement}"
+    result = connection.exec_driver_sql(statement, parameters)
+    return [dict(row) for row in result.mappings()]
+
+
+def full_scans(dialect: str, plan: list[dict]) -> list[str]:
+    """
+    Return the tables `plan` reads without any usable index.
+
+    On MySQL that is an `ALL`/`index` access with no `possible_keys`: a table the
+    optimizer merely chose to scan because it is small still has an index for
+    when it is not. SQLite reports a bare `SCAN <table>`.
+    """
+    tables = []
+    for row in plan:
+        if dialect == "sqlite":
+            match = SQLITE_FULL_SCAN.match(row["detail"])
+            if match:
+                tables.append(match.group(1))
+        elif (
+            row.get("type") in ("ALL", "index")
+            and not row.get("possible_keys")
+            and not (row.get("table") or "<").startswith("<")
+        ):
+            tables.append(row["table"])
+    return tables
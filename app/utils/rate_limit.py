@@ -0,0 +1,180 @@
+from collections import OrderedDict
+import logging
+import math
+import threading
+import time
+
+from flask import current_app, request
+
+from app.config.auth import (
+    AUTH_RATE_LIMIT_IP_BURST,
+    AUTH_RATE_LIMIT_IP_PER_MINUTE,
+    AUTH_RATE_LIMIT_MAX_KEYS,
+    AUTH_RATE_LIMIT_PROXY_HOPS,
+    AUTH_RATE_LIMIT_STORAGE_URL,
+    AUTH_RATE_LIMIT_USER_BURST,
+    AUTH_RATE_LIMIT_USER_PER_MINUTE,
+)
+from app.utils.metrics import inc
+
+try:
+    import redis
+except ImportError:  # optional: per-process buckets only
+    redis = None
+
+# Correct the logging level
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, scope: str, retry_after: float) -> None:
+        self.scope = scope
+        self.retry_after = retry_after
+        super().__init__(f"Too many attempts for this {scope}")
+
+    def retry_after_header(self) -> str:
+        return str(max(math.ceil(self.retry_after), 1))
+
+
+class TokenBuckets:
+    """
+    Thread-safe token buckets of this process, one per key: `capacity` tokens
+    at most, refilled at `rate` tokens per second. The least recently used
+    buckets beyond `max_keys` are dropped, which only ever forgives.
+    """
+
+    def __init__(self, capacity: int, rate: float, max_keys: int) -> None:
+        self.capacity = capacity
+        self.rate = rate
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, cost: float = 1) -> float:
+        """
+        Take `cost` tokens (a negative cost gives them back). Returns 0 when
+        they were taken, else the seconds until enough have refilled.
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated_at) * self.rate)
+            wait = 0.0
+            if tokens >= cost:
+                tokens = min(self.capacity, tokens - cost)
+            else:
+                wait = (cost - tokens) / self.rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+
+# Same algorithm as TokenBuckets, run atomically in Redis on its own clock.
+_REDIS_TAKE = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(state[1]) or capacity
+local updated_at = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(now - updated_at, 0) * rate)
+local wait = 0
+if tokens >= cost then
+    tokens = math.min(capacity, tokens - cost)
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return tostring(wait)
+"""
+
+
+class RedisTokenBuckets:
+    """
+    Token buckets shared by every worker through Redis. When Redis cannot be
+    reached the per-process `fallback` buckets are used, so an outage never
+    locks anyone out.
+    """
+
+    def __init__(
+        self, client, prefix: str, capacity: int, rate: float, fallback: TokenBuckets
+    ) -> None:
+        self.prefix = prefix
+        self.capacity = capacity
+        self.rate = rate
+        self.fallback = fallback
+        self._take = client.register_script(_REDIS_TAKE)
+
+    def take(self, key: str, cost: float = 1) -> float:
+        try:
+            return float(
+                self._take(
+                    keys=[self.prefix + key], args=[self.capacity, self.rate, cost]
+                )
+            )
+        except redis.RedisError as e:
+            logger.warning(f"Rate limit storage unavailable: {str(e)}")
+            return self.fallback.take(key, cost)
+
+
+def _buckets(scope: str, capacity: int, per_minute: float):
+    local = TokenBuckets(capacity, per_minute / 60, AUTH_RATE_LIMIT_MAX_KEYS)
+    if not AUTH_RATE_LIMIT_STORAGE_URL:
+        return local
+    if redis is None:
+        raise ValueError("AUTH_RATE_LIMIT_STORAGE_URL needs the `redis` package")
+    client = redis.Redis.from_url(AUTH_RATE_LIMIT_STORAGE_URL)
+    return RedisTokenBuckets(
+        client, f"auth_rate_limit:{scope}:", capacity, per_minute / 60, local
+    )
+
+
+ip_buckets = _buckets("ip", AUTH_RATE_LIMIT_IP_BURST, AUTH_RATE_LIMIT_IP_PER_MINUTE)
+user_buckets = _buckets(
+    "user", AUTH_RATE_LIMIT_USER_BURST, AUTH_RATE_LIMIT_USER_PER_MINUTE
+)
+
+
+def client_ip() -> str:
+    if AUTH_RATE_LIMIT_PROXY_HOPS > 0:
+        forwarded = [
+            address.strip()
+            for address in request.headers.get("X-Forwarded-For", "").split(",")
+            if address.strip()
+        ]
+        if len(forwarded) >= AUTH_RATE_LIMIT_PROXY_HOPS:
+            return forwarded[-AUTH_RATE_LIMIT_PROXY_HOPS]
+    return request.remote_addr or ""
+
+
+def charge_password_check(username: str) -> None:
+    """
+    Take a token from the client IP's and from `username`'s bucket before a
+    password is checked; raise RateLimitExceeded when either is empty. The
+    IP is charged first, so one address cannot drain a user's bucket faster
+    than its own allows.
+    """
+    if not current_app.config["AUTH_RATE_LIMIT_ENABLED"]:
+        return
+    for scope, buckets, key in (
+        ("ip", ip_buckets, client_ip()),
+        ("user", user_buckets, username),
+    ):
+        wait = buckets.take(key)
+        if wait > 0:
+            inc("auth_rate_limited_total", (("scope", scope),))
+            raise RateLimitExceeded(scope, wait)
+
+
+def refund_password_check(username: str) -> None:
+    """Give back the tokens of a password check that succeeded."""
+    if not current_app.config["AUTH_RATE_LIMIT_ENABLED"]:
+        return
+    ip_buckets.take(client_ip(), -1)
+    user_buckets.take(username, -1)
@@ -0,0 +1,32 @@
+from typing import Any, Optional, TypeVar
+
+from flask import g, has_request_context
+
+from app.models import db
+
+Model = TypeVar("Model")
+
+
+def get_for_request(model: type[Model], ident: Any) -> Optional[Model]:
+    """
+    `db.session.get(model, ident)`, remembered until the end of the request.
+
+    The session's identity map already answers repeated lookups of a loaded
+    row; the memo also remembers rows that do not exist, and keeps handing
+    out the instance authentication loaded. Outside a request this is a
+    plain `session.get`.
+    """
+    if not has_request_context():
+        return db.session.get(model, ident)
+    memo = g.setdefault("request_memo", {})
+    key = (model, ident)
+    if key not in memo:
+        memo[key] = db.session.get(model, ident)
+    return memo[key]
+
+
+def remember_for_request(instance: Any) -> None:
+    """Make `instance` the answer to later lookups of its primary key."""
+    if has_request_context():
+        memo = g.setdefault("request_memo", {})
+        memo[(type(instance), instance.id)] = instance
@@ -0,0 +1,41 @@
+from typing import Hashable, Optional
+
+from app.config.cache import CATALOG_CACHE_SIZE, CATALOG_CACHE_TTL
+from app.utils.cache import TTLCache
+from app.utils.versions import CATALOG, get_version
+
+catalog_response_cache = TTLCache(CATALOG_CACHE_SIZE, CATALOG_CACHE_TTL)
+
+
+def _normalize(value: Optional[str]) -> Optional[str]:
+    # An empty filter is no filter at all.
+    return value or None
+
+
+def catalog_cache_key(
+    page: int,
+    per_page: int,
+    title: Optional[str],
+    author: Optional[str],
+    description: Optional[str],
+    match: str,
+    after: Optional[str],
+) -> Hashable:
+    """
+    Key of a GET /books/ response: the current catalog version plus the
+    normalized query arguments.
+    """
+    return (
+        get_version(CATALOG),
+        page,
+        per_page,
+        _normalize(title),
+        _normalize(author),
+        _normalize(description),
+        match,
+        after,
+    )
+
+
+def catalog_cache_stats() -> dict[str, int]:
+    return catalog_response_cache.stats()
@@ -0,0 +1,240 @@
+import logging
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+from typing import Iterable, Optional
+
+from sqlalchemy import case, delete, func, insert, select
+
+from app.models import db
+from app.models.books import Book
+from app.models.search import BookSearchDocument, BookSearchPosting
+
+# Correct the logging level
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+MAX_TERM_LENGTH = 64
+STOP_WORDS = frozenset(
+    {
+        "a", "about", "an", "and", "are", "as", "at", "be", "by", "for", "from",
+        "in", "into", "is", "it", "its", "of", "on", "or", "that", "the", "their",
+        "this", "to", "was", "with",
+    }
+)  # fmt: skip
+
+# A match in the title counts more than one in the author, which counts more
+# than one in the description.
+FIELD_WEIGHTS = (("title", 3.0), ("author", 2.0), ("description", 1.0))
+
+# Okapi BM25 parameters.
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Document count and average length only feed the IDF/length normalisation, so
+# they may be slightly stale; caching them keeps aggregates off the query path.
+CORPUS_STATS_TTL = 60.0
+
+_corpus_stats_lock = threading.Lock()
+_corpus_stats: Optional[tuple[float, int, float]] = None  # (fetched_at, N, avgdl)
+
+
+def tokenize(text: Optional[str]) -> list[str]:
+    """
+    Split text into case-folded, accent-stripped index terms without stop words.
+    """
+    if not text:
+        return []
+    folded = unicodedata.normalize("NFKD", text.casefold())
+    folded = "".join(char for char in folded if not unicodedata.combining(char))
+    return [
+        token[:MAX_TERM_LENGTH]
+        for token in TOKEN_PATTERN.findall(folded)
+        if token not in STOP_WORDS and (len(token) > 1 or token.isdigit())
+    ]
+
+
+def build_postings(
+    title: Optional[str], author: Optional[str], description: Optional[str]
+) -> tuple[dict[str, float], float]:
+    """
+    Return the weighted term frequencies and weighted length of one book.
+    """
+    fields = {"title": title, "author": author, "description": description}
+    frequencies: Counter = Counter()
+    for field, weight in FIELD_WEIGHTS:
+        for token in tokenize(fields[field]):
+            frequencies[token] += weight
+    return dict(frequencies), float(sum(frequencies.values()))
+
+
+def _invalidate_corpus_stats() -> None:
+    global _corpus_stats
+    with _corpus_stats_lock:
+        _corpus_stats = None
+
+
+def _get_corpus_stats() -> tuple[int, float]:
+    global _corpus_stats
+    with _corpus_stats_lock:
+        cached = _corpus_stats
+    if cached and time.monotonic() - cached[0] < CORPUS_STATS_TTL:
+        return cached[1], cached[2]
+
+    count, average = db.session.query(
+        func.count(BookSearchDocument.book_id), func.avg(BookSearchDocument.length)
+    ).one()
+    stats = (time.monotonic(), int(count or 0), float(average or 0.0))
+    with _corpus_stats_lock:
+        _corpus_stats = stats
+    return stats[1], stats[2]
+
+
+def index_books(rows: Iterable[tuple[int, str, str, str]]) -> int:
+    """
+    (Re)index `(book_id, title, author, description)` rows in the current session.
+
+    Existing entries of those books are replaced; the caller commits.
+    """
+    documents = []
+    postings = []
+    for book_id, title, author, description in rows:
+        frequencies, length = build_postings(title, author, description)
+        documents.append({"book_id": book_id, "length": length})
+        postings.extend(
+            {"term": term, "book_id": book_id, "frequency": frequency}
+            for term, frequency in frequencies.items()
+        )
+    if not documents:
+        return 0
+
+    book_ids = [document["book_id"] for document in documents]
+    remove_books(book_ids)
+    db.session.execute(insert(BookSearchDocument), documents)
+    if postings:
+        db.session.execute(insert(BookSearchPosting), postings)
+    _invalidate_corpus_stats()
+    return len(documents)
+
+
+def index_book(book: Book) -> None:
+    """
+    Update the index entries of one book; it must already have an id (flushed).
+    """
+    index_books([(book.id, book.title, book.author, book.description)])
+
+
+def remove_books(book_ids: list[int]) -> None:
+    """
+    Drop the index entries of the given books in the current session.
+    """
+    db.session.execute(
+        delete(BookSearchPosting).where(BookSearchPosting.book_id.in_(book_ids))
+    )
+    db.session.execute(
+        delete(BookSearchDocument).where(BookSearchDocument.book_id.in_(book_ids))
+    )
+    _invalidate_corpus_stats()
+
+
+def remove_book(book_id: int) -> None:
+    remove_books([book_id])
+
+
+def rebuild_index(batch_size: int = 500) -> int:
+    """
+    Rebuild the whole index from the books table, one committed batch at a time.
+    """
+    db.session.execute(delete(BookSearchPosting))
+    db.session.execute(delete(BookSearchDocument))
+    db.session.commit()
+
+    indexed = 0
+    last_id = 0
+    while True:
+        # Project the text columns only: no ORM objects and no image blobs.
+        rows = (
+            db.session.query(Book.id, Book.title, Book.author, Book.description)
+            .filter(Book.id > last_id)
+            .order_by(Book.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        indexed += index_books(rows)
+        db.session.commit()
+        last_id = rows[-1][0]
+        logger.info(f"Indexed {indexed} books")
+
+    _invalidate_corpus_stats()
+    return indexed
+
+
+def search_books(query: str, limit: int = 10) -> tuple[list[tuple[Book, float]], int]:
+    """
+    Rank books against `query` with BM25 and return the top `limit` books with
+    their scores, together with the total number of matching books.
+
+    Only the postings of the query terms are read, and they are scored in SQL,
+    so no more than `limit` books ever leave the database.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms or limit < 1:
+        return [], 0
+
+    document_frequencies = dict(
+        db.session.query(BookSearchPosting.term, func.count())
+        .filter(BookSearchPosting.term.in_(terms))
+        .group_by(BookSearchPosting.term)
+        .all()
+    )
+    if not document_frequencies:
+        return [], 0
+
+    document_count, average_length = _get_corpus_stats()
+    document_count = max(document_count, 1)
+    average_length = average_length or 1.0
+
+    idfs = {
+        term: math.log(
+            1 + (document_count - document_frequency + 0.5) / (document_frequency + 0.5)
+        )
+        for term, document_frequency in document_frequencies.items()
+    }
+    frequency = BookSearchPosting.frequency
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * BookSearchDocument.length / average_length)
+    score = func.sum(
+        case(idfs, value=BookSearchPosting.term, else_=0.0)
+        * (frequency * (BM25_K1 + 1))
+        / (frequency + norm)
+    ).label("score")
+    top = (
+        select(
+            BookSearchPosting.book_id,
+            score,
+            func.count().over().label("total"),
+        )
+        .join(
+            BookSearchDocument,
+            BookSearchDocument.book_id == BookSearchPosting.book_id,
+        )
+        .where(BookSearchPosting.term.in_(list(idfs)))
+        .group_by(BookSearchPosting.book_id)
+        .order_by(score.desc(), BookSearchPosting.book_id)
+        .limit(limit)
+        .subquery()
+    )
+    rows = (
+        db.session.query(Book, top.c.score, top.c.total)
+        .join(top, Book.id == top.c.book_id)
+        .order_by(top.c.score.desc(), Book.id)
+        .all()
+    )
+    if not rows:
+        return [], 0
+    return [(book, float(score)) for book, score, _ in rows], rows[0][2]
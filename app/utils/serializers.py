@@ -0,0 +1,76 @@
+from http import HTTPStatus
+from typing import Iterable, Optional
+
+from flask import Response, current_app
+from flask_restx.representations import dumps
+
+from app.models.books import Book
+from app.models.user import User
+
+# Same fields, order and names as `Book.to_dict()`; never the image blob.
+BOOK_FIELDS = (
+    "id",
+    "title",
+    "description",
+    "author",
+    "isbn",
+    "available",
+    "borrowed_by",
+    "borrowed_unilt",
+)
+BOOK_COLUMNS = (
+    Book.id,
+    Book.title,
+    Book.description,
+    Book.author,
+    Book.isbn,
+    Book.available,
+    Book.borrowed_by,
+    Book.borrowed_until,
+)
+
+# Same fields, order and names as `User.to_dict()`.
+USER_FIELDS = ("id", "full_name", "username", "role")
+USER_COLUMNS = (User.id, User.full_name, User.username, User.role)
+
+
+def book_dicts(rows: Iterable[tuple]) -> list[dict]:
+    """`Book.to_dict()` of every `BOOK_COLUMNS` row, without loading any Book."""
+    fields = BOOK_FIELDS
+    return [
+        dict(zip(fields, (*row[:-1], row[-1].isoformat() if row[-1] else "")))
+        for row in rows
+    ]
+
+
+def user_dicts(rows: Iterable[tuple]) -> list[dict]:
+    """`User.to_dict()` of every `USER_COLUMNS` row, without loading any User."""
+    fields = USER_FIELDS
+    return [dict(zip(fields, (*row[:-1], row[-1].value))) for row in rows]
+
+
+def encode_json(payload: dict) -> str:
+    """
+    Encode `payload` exactly as flask-restx would encode a handler's return
+    value: with its JSON backend (ujson when installed, else the C-accelerated
+    stdlib encoder), the RESTX_JSON settings and a trailing newline.
+    """
+    settings = current_app.config.get("RESTX_JSON", {})
+    if current_app.debug:
+        settings = {"indent": 4, **settings}
+    return dumps(payload, **settings) + "\n"
+
+
+def json_response(
+    body: str, status: int = HTTPStatus.OK, etag: Optional[str] = None
+) -> Response:
+    """
+    A response for a body from `encode_json`, as flask-restx would send it,
+    with `etag` as its weak ETag if given.
+    """
+    response = current_app.response_class(
+        body, status=status, content_type="application/json"
+    )
+    if etag is not None:
+        response.set_etag(etag, weak=True)
+    return response
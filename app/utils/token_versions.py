@@ -0,0 +1,9 @@
+from app.config.auth import JWT_TOKEN_VERSION_CACHE_SIZE, JWT_TOKEN_VERSION_TTL
+from app.utils.cache import TTLCache
+
+# user id -> current token version, or None for a deactivated/deleted user
+token_version_cache = TTLCache(JWT_TOKEN_VERSION_CACHE_SIZE, JWT_TOKEN_VERSION_TTL)
+
+
+def invalidate_token_version(user_id: int) -> None:
+    token_version_cache.pop(user_id)
@@ -0,0 +1,46 @@
+from flask import g, has_request_context
+from sqlalchemy import insert, select, update
+
+from app.models import db
+from app.models.versions import DataVersion
+
+# Data versions ("catalog", ...), kept in the database so that every worker
+# sees the same ones. Every write path bumps the version of the data it
+# changed, which makes all cached views of the old data unreachable at once
+# without tracking individual keys.
+CATALOG = "catalog"
+USERS = "users"
+
+
+def get_version(name: str) -> int:
+    """
+    Current version of `name`. Within a request it is read once, so the
+    cache key and the ETag of a response agree.
+    """
+    memo = g.setdefault("data_versions", {}) if has_request_context() else {}
+    if name not in memo:
+        memo[name] = (
+            db.session.execute(
+                select(DataVersion.version).where(DataVersion.name == name)
+            ).scalar()
+            or 0
+        )
+    return memo[name]
+
+
+def bump_version(name: str) -> None:
+    """
+    Advance the version of `name` in the current transaction; the caller
+    commits. Call it right before the commit, so the row stays locked for as
+    short as possible.
+    """
+    result = db.session.execute(
+        update(DataVersion)
+        .where(DataVersion.name == name)
+        .values(version=DataVersion.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        db.session.execute(insert(DataVersion).values(name=name, version=1))
+    if has_request_context():
+        g.pop("data_versions", None)
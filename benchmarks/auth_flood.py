@@ -0,0 +1,194 @@
+"""
+Credential-stuffing benchmark.
+
+Runs legitimate traffic (logins, book lists and details over JWT) against the
+app three times: alone, during a flood of wrong-password logins with the
+auth rate limiter off, and during the same flood with it on. It reports the
+legitimate latency of each phase and how the flood was answered.
+
+    python benchmarks/auth_flood.py
+    python benchmarks/auth_flood.py --attackers 16 --attacker-ips 4 --duration 20
+
+The flood runs at a fixed `--attack-rate`, so both flood phases face the
+same attempts no matter how fast they are answered. It comes from
+`--attacker-ips` addresses, sent in X-Forwarded-For
+(the app trusts one proxy hop for this run). Each attacker tries random
+passwords for the seeded usernames. Legitimate clients connect from
+127.0.0.1 without the header. The app is served in-process over real HTTP
+from a throwaway SQLite database, as in benchmarks/load_test.py.
+"""
+
+import argparse
+from collections import Counter
+import json
+import multiprocessing
+import os
+import random
+import secrets
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import load_test  # noqa: E402
+
+LEGITIMATE_MIX = {
+    **{name: 0 for name in load_test.DEFAULT_MIX},
+    "login": 5,
+    "books.list": 20,
+    "books.detail": 20,
+}
+TARGET_USERNAMES = ["admin", "bobsmith", "dianal", "alice", "root", "test"]
+
+
+def flood(
+    base_url: str,
+    attackers: int,
+    attacker_ips: int,
+    rate: float,
+    timeout: float,
+    stop: multiprocessing.Event,
+    results: multiprocessing.Queue,
+) -> None:
+    """
+    Send `rate` wrong-password logins per second, spread over `attackers`
+    threads, until `stop` is set, then put the counts of their response statuses on `results`. Runs in its
+    own process, so the flood's client side does not compete for the app's
+    GIL the way remote attackers would not.
+    """
+    statuses: Counter = Counter()
+    lock = threading.Lock()
+
+    def attacker(number: int) -> None:
+        client = load_test.Client(base_url, timeout)
+        rng = random.Random(number)
+        address = f"10.0.0.{number % attacker_ips + 1}"
+        seen: Counter = Counter()
+        interval = attackers / rate
+        next_at = time.perf_counter() + rng.uniform(0, interval)
+        while not stop.wait(max(next_at - time.perf_counter(), 0)):
+            # Fixed pace, no catching up: the flood's rate does not depend
+            # on how fast it is answered.
+            next_at = max(next_at + interval, time.perf_counter())
+            body = {
+                "username": rng.choice(TARGET_USERNAMES),
+                "password": secrets.token_urlsafe(12),
+            }
+            connection = client.connection_class(
+                client.host, client.port, timeout=timeout
+            )
+            try:
+                connection.request(
+                    "POST",
+                    client.prefix + "/auth/login",
+                    json.dumps(body),
+                    {"Content-Type": "application/json", "X-Forwarded-For": address},
+                )
+                response = connection.getresponse()
+                response.read()
+                seen[response.status] += 1
+            except OSError:
+                seen["error"] += 1
+            finally:
+                connection.close()
+        with lock:
+            statuses.update(seen)
+
+    threads = [threading.Thread(target=attacker, args=(n,)) for n in range(attackers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put(dict(statuses))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--attackers", type=int, default=8)
+    parser.add_argument("--attacker-ips", type=int, default=2)
+    parser.add_argument(
+        "--attack-rate", type=float, default=100.0, help="Flood attempts per second."
+    )
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    # Read when the app is imported.
+    os.environ["AUTH_RATE_LIMIT_PROXY_HOPS"] = "1"
+    from app import create_app
+
+    path = os.path.join(tempfile.mkdtemp(), "auth-flood.db")
+    app = create_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}",
+            "SQLALCHEMY_ENGINE_OPTIONS": {"connect_args": {"timeout": 30}},
+            "SECRET_KEY": secrets.token_hex(32),
+            "OUTBOX_WORKERS": 0,
+            "OVERDUE_SWEEP_INTERVAL": 0,
+        }
+    )
+    logins = load_test.seed(app, args.concurrency)
+    base_url, shutdown = load_test.serve(app)
+
+    phases = (
+        ("no flood", None),
+        ("flood, limiter off", False),
+        ("flood, limiter on", True),
+    )
+    try:
+        for name, limiter in phases:
+            stop = multiprocessing.Event()
+            results = multiprocessing.Queue()
+            attackers = None
+            if limiter is not None:
+                app.config["AUTH_RATE_LIMIT_ENABLED"] = limiter
+                attackers = multiprocessing.Process(
+                    target=flood,
+                    args=(
+                        base_url,
+                        args.attackers,
+                        args.attacker_ips,
+                        args.attack_rate,
+                        args.timeout,
+                        stop,
+                        results,
+                    ),
+                )
+                attackers.start()
+            started = time.perf_counter()
+            result = load_test.run(
+                base_url,
+                logins,
+                LEGITIMATE_MIX,
+                args.concurrency,
+                args.duration,
+                args.warmup,
+                args.timeout,
+            )
+            stop.set()
+            statuses = Counter(results.get() if attackers else {})
+            if attackers:
+                attackers.join()
+            elapsed = time.perf_counter() - started
+
+            print(f"\n{name}")
+            load_test.print_report(result, None)
+            if limiter is not None:
+                attempts = sum(statuses.values())
+                print(
+                    f"flood: {attempts / elapsed:.1f} attempts/s, "
+                    + ", ".join(
+                        f"{status}: {count}" for status, count in statuses.most_common()
+                    )
+                )
+    finally:
+        shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
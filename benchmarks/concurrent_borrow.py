@@ -0,0 +1,218 @@
+"""
+Concurrent borrow/return benchmark.
+
+Many threads borrow and return books as fast as they can, either all fighting
+over the same few books (`--books 1`) or spread over many. Every successful
+borrow is checked against an in-process ledger, so a book lent to two
+borrowers at once is reported as a violation, and a borrow silently
+overwritten by another borrower shows up as a lost update when its owner
+tries to return the book.
+
+    python benchmarks/concurrent_borrow.py --threads 16 --books 1
+    python benchmarks/concurrent_borrow.py --threads 16 --books 200
+    python benchmarks/concurrent_borrow.py --strategy read-modify-write
+
+`--strategy read-modify-write` runs the previous implementation (load the
+book, check it in Python, commit) for comparison. Point `--database-uri` at a
+MySQL database to measure the real thing; by default a throwaway SQLite file
+is used.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from app.models import db  # noqa: E402
+from app.models.books import Book  # noqa: E402
+from app.models.user import User, UserRole  # noqa: E402
+
+
+def borrow_conditional(book_id: int, user_id: int, until: datetime) -> bool:
+    borrowed = Book.borrow(book_id, user_id, until)
+    db.session.commit()
+    return borrowed
+
+
+def give_back_conditional(book_id: int, user_id: int) -> bool:
+    returned = Book.give_back(book_id, user_id)
+    db.session.commit()
+    return returned
+
+
+def borrow_read_modify_write(book_id: int, user_id: int, until: datetime) -> bool:
+    book = db.session.get(Book, book_id)
+    if not book.available:
+        db.session.rollback()
+        return False
+    book.available = False
+    book.borrowed_by = user_id
+    book.borrowed_until = until
+    db.session.commit()
+    return True
+
+
+def give_back_read_modify_write(book_id: int, user_id: int) -> bool:
+    book = db.session.get(Book, book_id)
+    if book.borrowed_by != user_id:
+        db.session.rollback()
+        return False
+    book.available = True
+    book.borrowed_by = None
+    book.borrowed_until = None
+    db.session.commit()
+    return True
+
+
+STRATEGIES = {
+    "conditional": (borrow_conditional, give_back_conditional),
+    "read-modify-write": (borrow_read_modify_write, give_back_read_modify_write),
+}
+
+
+def setup(app, books: int, threads: int) -> tuple[list[int], list[int]]:
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        users = [
+            User(
+                full_name=f"Borrower {i}",
+                username=f"borrower{i}",
+                email=f"borrower{i}@example.com",
+                password="x",
+                role=UserRole.USER,
+            )
+            for i in range(threads)
+        ]
+        db.session.add_all(users)
+        db.session.add_all(
+            Book(
+                title=f"Book {i}",
+                author="Benchmark",
+                description="Benchmark book",
+                isbn=f"{9780000000000 + i}",
+                available=True,
+            )
+            for i in range(books)
+        )
+        db.session.commit()
+        return [user.id for user in users], [
+            book_id for (book_id,) in db.session.query(Book.id)
+        ]
+
+
+def run(app, strategy: str, user_ids, book_ids, duration: float) -> dict:
+    borrow, give_back = STRATEGIES[strategy]
+    until = datetime.now() + timedelta(days=14)
+    ledger: dict[int, int] = {}
+    ledger_lock = threading.Lock()
+    counts: Counter = Counter()
+    counts_lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+    start = threading.Barrier(len(user_ids))
+
+    def worker(user_id: int) -> None:
+        local: Counter = Counter()
+        with app.app_context():
+            start.wait()
+            while time.perf_counter() < deadline:
+                book_id = random.choice(book_ids)
+                try:
+                    if not borrow(book_id, user_id, until):
+                        local["conflicts"] += 1
+                        continue
+                except Exception:
+                    db.session.rollback()
+                    local["errors"] += 1
+                    continue
+
+                local["borrowed"] += 1
+                with ledger_lock:
+                    if ledger.get(book_id) is not None:
+                        local["violations"] += 1
+                    ledger[book_id] = user_id
+
+                with ledger_lock:
+                    if ledger.get(book_id) == user_id:
+                        del ledger[book_id]
+                try:
+                    if give_back(book_id, user_id):
+                        local["returned"] += 1
+                    else:
+                        local["lost_updates"] += 1
+                except Exception:
+                    db.session.rollback()
+                    local["errors"] += 1
+            db.session.remove()
+        with counts_lock:
+            counts.update(local)
+
+    threads = [threading.Thread(target=worker, args=(uid,)) for uid in user_ids]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        still_lent = db.session.query(Book).filter(Book.available.is_(False)).count()
+
+    operations = counts["borrowed"] + counts["returned"] + counts["conflicts"]
+    return {
+        **{key: counts[key] for key in ("borrowed", "returned", "conflicts")},
+        "errors": counts["errors"],
+        "violations": counts["violations"],
+        "lost_updates": counts["lost_updates"],
+        "still_lent": still_lent,
+        "ops_per_second": operations / elapsed,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--database-uri")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--books", type=int, default=1)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), default="conditional")
+    args = parser.parse_args()
+
+    database_uri = args.database_uri
+    config = {}
+    if not database_uri:
+        path = os.path.join(tempfile.mkdtemp(), "borrow-benchmark.db")
+        database_uri = f"sqlite:///{path}"
+        config["SQLALCHEMY_ENGINE_OPTIONS"] = {"connect_args": {"timeout": 30}}
+    app = create_app({"SQLALCHEMY_DATABASE_URI": database_uri, **config})
+
+    user_ids, book_ids = setup(app, args.books, args.threads)
+    result = run(app, args.strategy, user_ids, book_ids, args.duration)
+
+    print(
+        f"{args.strategy}: {args.threads} threads, {args.books} books, "
+        f"{args.duration:.0f}s"
+    )
+    for key, value in result.items():
+        print(
+            f"  {key:>15}: {value:.1f}"
+            if isinstance(value, float)
+            else f"  {key:>15}: {value}"
+        )
+
+    correct = not result["violations"] and not result["lost_updates"]
+    correct = correct and not result["still_lent"]
+    print("  result: " + ("OK" if correct else "INCONSISTENT"))
+    return 0 if correct else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,561 @@
+"""
+Endpoint load test.
+
+Drives a weighted mix of requests over every namespace (auth, books, users)
+from `--concurrency` client threads for `--duration` seconds and reports
+throughput and p50/p95/p99 latency per endpoint.
+
+    python benchmarks/load_test.py --concurrency 16 --duration 30
+    python benchmarks/load_test.py --output before.json
+    python benchmarks/load_test.py --baseline before.json --output after.json
+
+By default the app is built with `create_app` against a throwaway SQLite file,
+seeded with `flask bootstrap --offline` plus one user per client thread, and
+served in-process over real HTTP. `--database-uri` seeds and serves another
+database instead; `--url` skips both and loads an already running deployment,
+logging in with the `--login user:password` accounts (bootstrap's regular
+users by default).
+
+`--output` writes the results as JSON. Given a `--baseline` from an earlier
+run, every endpoint whose p95/p99 latency grew, or whose throughput or
+success rate dropped, by more than `--tolerance` is reported as a regression
+and the exit status is 1.
+"""
+
+import argparse
+import base64
+import http.client
+import json
+import math
+import os
+import platform
+import random
+import secrets
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional
+from urllib.parse import urlencode, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+LOAD_USER_PASSWORD = "LoadTest1!"
+DEFAULT_LOGINS = ["bobsmith:BobStrongPwd2@", "dianal:DianaUser4$"]
+
+# Relative weights of the operations. `loan` borrows a book and, when that
+# worked, returns it, so it produces one request for each endpoint.
+DEFAULT_MIX = {
+    "login": 5,
+    "books.list": 30,
+    "books.detail": 20,
+    "books.image": 10,
+    "loan": 10,
+    "users.list": 10,
+    "users.update": 5,
+    # Authenticates with HTTP Basic instead of the JWT; off in the default mix.
+    "books.detail.basic": 0,
+}
+
+# Statuses that are a normal outcome under load rather than an error.
+EXPECTED_STATUSES = {
+    "PUT /books/<id>/barrow": {201, 409},
+    "GET /books/<id>/image": {200, 304},
+}
+
+BOOK_LIST_QUERIES = [
+    {},
+    {"page": 2},
+    {"per_page": 25},
+    {"after": ""},
+    {"title": "The"},
+    {"author": "J"},
+    {"description": "novel"},
+]
+USER_LIST_QUERIES = [{}, {"after": ""}, {"role": "user"}, {"username": "load"}]
+
+
+class Client:
+    """A minimal HTTP client; one per thread, one connection per request."""
+
+    def __init__(self, base_url: str, timeout: float):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.prefix = parts.path.rstrip("/")
+        self.connection_class = (
+            http.client.HTTPSConnection
+            if parts.scheme == "https"
+            else http.client.HTTPConnection
+        )
+        self.timeout = timeout
+        self.token: Optional[str] = None
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[dict] = None,
+        body: Any = None,
+        authorization: Optional[str] = None,
+    ) -> tuple[int, bytes]:
+        headers = {"Accept": "application/json"}
+        if authorization or self.token:
+            headers["Authorization"] = authorization or self.token
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        if params:
+            path = f"{path}?{urlencode(params)}"
+        connection = self.connection_class(self.host, self.port, timeout=self.timeout)
+        try:
+            connection.request(method, self.prefix + path, payload, headers)
+            response = connection.getresponse()
+            return response.status, response.read()
+        finally:
+            connection.close()
+
+    def login(self, username: str, password: str) -> int:
+        status, body = self.request(
+            "POST", "/auth/login", body={"username": username, "password": password}
+        )
+        if status == 200:
+            self.token = json.loads(body)["token"]
+        return status
+
+
+class Recorder:
+    """Latencies and statuses per endpoint, for requests started after warm-up."""
+
+    def __init__(self, measure_from: float):
+        self.measure_from = measure_from
+        self.lock = threading.Lock()
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, Counter] = defaultdict(Counter)
+
+    def timed(self, endpoint: str, call: Callable[[], tuple[int, bytes]]) -> int:
+        started = time.perf_counter()
+        try:
+            status = call()[0]
+        except (OSError, http.client.HTTPException):
+            status = 0  # connection error or timeout
+        elapsed = time.perf_counter() - started
+        if started >= self.measure_from:
+            with self.lock:
+                self.latencies[endpoint].append(elapsed)
+                self.statuses[endpoint][status] += 1
+        return status
+
+
+def percentile(ordered: list[float], percent: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(recorder: Recorder, elapsed: float) -> dict[str, dict]:
+    endpoints = {}
+    for endpoint in sorted(recorder.latencies):
+        latencies = sorted(recorder.latencies[endpoint])
+        statuses = recorder.statuses[endpoint]
+        expected = EXPECTED_STATUSES.get(endpoint)
+        errors = sum(
+            count
+            for status, count in statuses.items()
+            if not (expected and status in expected or 200 <= status < 300)
+        )
+        endpoints[endpoint] = {
+            "requests": len(latencies),
+            "errors": errors,
+            "success_rate": 1 - errors / len(latencies),
+            "throughput": len(latencies) / elapsed,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "max_ms": latencies[-1] * 1000,
+            "statuses": {str(status): count for status, count in statuses.items()},
+        }
+    return endpoints
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    """`books.list=30,login=5` -> weights, overriding the default mix."""
+    mix = dict(DEFAULT_MIX)
+    for item in filter(None, value.split(",")):
+        name, _, weight = item.partition("=")
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(
+                f"Unknown operation {name!r}; choose from {', '.join(DEFAULT_MIX)}"
+            )
+        mix[name] = int(weight)
+    return mix
+
+
+def seed(app, users: int) -> list[str]:
+    """Bootstrap the database and add `users` load users; return their logins."""
+    from werkzeug.security import generate_password_hash
+
+    from app.models import db
+    from app.models.user import User, UserRole
+
+    result = app.test_cli_runner().invoke(args=["bootstrap", "--offline"])
+    if result.exit_code:
+        raise SystemExit(f"Bootstrap failed:\n{result.output}")
+
+    with app.app_context():
+        password = generate_password_hash(LOAD_USER_PASSWORD)
+        existing = {
+            username
+            for (username,) in db.session.query(User.username).filter(
+                User.username.like("load%")
+            )
+        }
+        db.session.add_all(
+            User(
+                full_name=f"Load User {number}",
+                username=f"load{number}",
+                email=f"load{number}@example.com",
+                password=password,
+                role=UserRole.USER,
+            )
+            for number in range(users)
+            if f"load{number}" not in existing
+        )
+        db.session.commit()
+    return [f"load{number}:{LOAD_USER_PASSWORD}" for number in range(users)]
+
+
+def serve(app) -> tuple[str, Callable[[], None]]:
+    """Serve `app` on a free local port; return its URL and a shutdown function."""
+    from werkzeug.serving import make_server
+
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", server.shutdown
+
+
+def discover_books(base_url: str, login: str, timeout: float) -> tuple[list, list]:
+    """Return the catalog's book ids and the ids of those that have an image."""
+    client = Client(base_url, timeout)
+    client.login(*login.split(":", 1))
+    book_ids, params = [], {"after": "", "per_page": 100}
+    while True:
+        status, body = client.request("GET", "/books/", params)
+        if status != 200:
+            raise SystemExit(f"Listing books failed with HTTP {status}")
+        page = json.loads(body)
+        book_ids.extend(book["id"] for book in page["data"])
+        if not page.get("next_cursor"):
+            break
+        params["after"] = page["next_cursor"]
+    image_ids = [
+        book_id
+        for book_id in book_ids
+        if client.request("GET", f"/books/{book_id}/image")[0] == 200
+    ]
+    return book_ids, image_ids
+
+
+def run(
+    base_url: str,
+    logins: list[str],
+    mix: dict[str, int],
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    timeout: float,
+) -> dict:
+    book_ids, image_ids = discover_books(base_url, logins[0], timeout)
+    if not book_ids:
+        raise SystemExit("The catalog is empty; nothing to load test.")
+    if not image_ids:
+        mix = {**mix, "books.image": 0}
+
+    operations, weights = zip(*((name, w) for name, w in mix.items() if w > 0))
+    due_date = (datetime.now() + timedelta(days=14)).strftime("%Y-%m-%d")
+    ready = threading.Barrier(concurrency)
+
+    clients = []
+    for number in range(concurrency):
+        username, password = logins[number % len(logins)].split(":", 1)
+        client = Client(base_url, timeout)
+        if client.login(username, password) != 200:
+            raise SystemExit(f"Could not log in as {username}")
+        clients.append((client, username, password))
+
+    started = time.perf_counter()
+    recorder = Recorder(measure_from=started + warmup)
+    deadline = started + warmup + duration
+
+    def worker(number: int) -> None:
+        client, username, password = clients[number]
+        rng = random.Random(number)
+        updates = 0
+        credentials = f"{username}:{password}".encode("utf-8")
+        basic = "Basic " + base64.b64encode(credentials).decode("ascii")
+        ready.wait()
+        while time.perf_counter() < deadline:
+            operation = rng.choices(operations, weights)[0]
+            if operation == "login":
+                recorder.timed(
+                    "POST /auth/login",
+                    lambda: (client.login(username, password), b""),
+                )
+            elif operation == "books.list":
+                params = rng.choice(BOOK_LIST_QUERIES)
+                recorder.timed(
+                    "GET /books/", lambda: client.request("GET", "/books/", params)
+                )
+            elif operation == "books.detail":
+                book_id = rng.choice(book_ids)
+                recorder.timed(
+                    "GET /books/<id>",
+                    lambda: client.request("GET", f"/books/{book_id}"),
+                )
+            elif operation == "books.detail.basic":
+                book_id = rng.choice(book_ids)
+                recorder.timed(
+                    "GET /books/<id> (basic)",
+                    lambda: client.request(
+                        "GET", f"/books/{book_id}", authorization=basic
+                    ),
+                )
+            elif operation == "books.image":
+                book_id = rng.choice(image_ids)
+                recorder.timed(
+                    "GET /books/<id>/image",
+                    lambda: client.request("GET", f"/books/{book_id}/image"),
+                )
+            elif operation == "loan":
+                book_id = rng.choice(book_ids)
+                status = recorder.timed(
+                    "PUT /books/<id>/barrow",
+                    lambda: client.request(
+                        "PUT",
+                        f"/books/{book_id}/barrow",
+                        body={"borrowed_until": due_date},
+                    ),
+                )
+                if status == 201:
+                    recorder.timed(
+                        "PUT /books/<id>/return",
+                        lambda: client.request("PUT", f"/books/{book_id}/return"),
+                    )
+            elif operation == "users.list":
+                params = rng.choice(USER_LIST_QUERIES)
+                recorder.timed(
+                    "GET /users/", lambda: client.request("GET", "/users/", params)
+                )
+            elif operation == "users.update":
+                updates += 1
+                full_name = f"{username} {updates}"
+                recorder.timed(
+                    "PUT /users/me",
+                    lambda: client.request(
+                        "PUT", "/users/me", body={"full_name": full_name}
+                    ),
+                )
+
+    threads = [
+        threading.Thread(target=worker, args=(number,), daemon=True)
+        for number in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - recorder.measure_from
+
+    endpoints = summarize(recorder, elapsed)
+    requests = sum(stats["requests"] for stats in endpoints.values())
+    errors = sum(stats["errors"] for stats in endpoints.values())
+    return {
+        "mix": mix,
+        "endpoints": endpoints,
+        "total": {
+            "requests": requests,
+            "errors": errors,
+            "throughput": requests / elapsed,
+        },
+    }
+
+
+def compare(baseline: dict, current: dict, tolerance: float, floor_ms: float) -> list:
+    """
+    Return the regressions of `current` against `baseline`.
+
+    Latency changes smaller than `floor_ms` are ignored, so sub-millisecond
+    endpoints do not flap on scheduler noise.
+    """
+    regressions = []
+    for endpoint, now in current["endpoints"].items():
+        before = baseline["endpoints"].get(endpoint)
+        if before is None:
+            continue
+        for key in ("p95_ms", "p99_ms"):
+            if (
+                now[key] > before[key] * (1 + tolerance)
+                and now[key] - before[key] > floor_ms
+            ):
+                regressions.append(
+                    f"{endpoint}: {key} {before[key]:.1f} -> {now[key]:.1f}"
+                )
+        for key in ("throughput", "success_rate"):
+            if now[key] < before[key] * (1 - tolerance):
+                regressions.append(
+                    f"{endpoint}: {key} {before[key]:.2f} -> {now[key]:.2f}"
+                )
+    return regressions
+
+
+def print_report(result: dict, baseline: Optional[dict]) -> None:
+    print(
+        f"{'endpoint':<24} {'reqs':>7} {'err':>5} {'req/s':>8} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    )
+    for endpoint, stats in result["endpoints"].items():
+        line = (
+            f"{endpoint:<24} {stats['requests']:>7} {stats['errors']:>5} "
+            f"{stats['throughput']:>8.1f} {stats['p50_ms']:>8.1f} "
+            f"{stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f}"
+        )
+        before = baseline and baseline["endpoints"].get(endpoint)
+        if before:
+            change = (stats["p95_ms"] / before["p95_ms"] - 1) * 100
+            line += f"   p95 {change:+.0f}%"
+        print(line)
+    total = result["total"]
+    print(
+        f"{'total':<24} {total['requests']:>7} {total['errors']:>5} "
+        f"{total['throughput']:>8.1f}"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", help="Load an already running deployment.")
+    parser.add_argument("--database-uri")
+    parser.add_argument(
+        "--login",
+        action="append",
+        help="user:password to log in with when using --url (repeatable).",
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=dict(DEFAULT_MIX),
+        help=f"Operation weights, e.g. 'login=0,books.list=50' ({', '.join(DEFAULT_MIX)}).",
+    )
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", help="Results JSON of an earlier run.")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.15,
+        help="Relative change reported as a regression.",
+    )
+    parser.add_argument(
+        "--floor-ms",
+        type=float,
+        default=2.0,
+        help="Ignore latency changes smaller than this.",
+    )
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    shutdown = None
+    if args.url:
+        base_url, target = args.url, args.url
+        logins = args.login or DEFAULT_LOGINS
+    else:
+        from app import create_app
+
+        database_uri = args.database_uri
+        config = {
+            "SECRET_KEY": secrets.token_hex(32),
+            "OUTBOX_WORKERS": 0,
+            "OVERDUE_SWEEP_INTERVAL": 0,
+        }
+        if not database_uri:
+            path = os.path.join(tempfile.mkdtemp(), "load-test.db")
+            database_uri = f"sqlite:///{path}"
+            config["SQLALCHEMY_ENGINE_OPTIONS"] = {"connect_args": {"timeout": 30}}
+        app = create_app({"SQLALCHEMY_DATABASE_URI": database_uri, **config})
+        logins = seed(app, args.concurrency)
+        base_url, shutdown = serve(app)
+        target = database_uri.split("://", 1)[0]
+
+    try:
+        result = run(
+            base_url,
+            logins,
+            args.mix,
+            args.concurrency,
+            args.duration,
+            args.warmup,
+            args.timeout,
+        )
+    finally:
+        if shutdown:
+            shutdown()
+
+    result["meta"] = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "git_revision": git_revision(),
+        "target": target,
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "warmup": args.warmup,
+        "mix": result.pop("mix"),
+        "python": platform.python_version(),
+    }
+    print(
+        f"{target}: {args.concurrency} clients, {args.duration:.0f}s "
+        f"after {args.warmup:.0f}s warm-up"
+    )
+    print_report(result, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if baseline is None:
+        return 0
+    for key in ("target", "concurrency", "mix"):
+        if baseline["meta"].get(key) != result["meta"][key]:
+            print(f"  WARNING the baseline ran with a different {key}")
+    regressions = compare(baseline, result, args.tolerance, args.floor_ms)
+    for regression in regressions:
+        print(f"  REGRESSION {regression}")
+    print("  result: " + ("REGRESSED" if regressions else "OK"))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
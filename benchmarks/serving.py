@@ -0,0 +1,207 @@
+"""
+Serving benchmark.
+
+Measures throughput and latency of two routes under the Werkzeug development
+server and under `flask serve` (gunicorn) with several worker x thread
+layouts:
+
+- `GET /books/<id>/image`, I/O bound: a cover read from the database.
+- `GET /books/<id>` with HTTP Basic, CPU bound: the credential cache is
+  turned off, so every request runs the password KDF.
+
+    python benchmarks/serving.py
+    python benchmarks/serving.py --servers dev,1x8,4x1,4x4 --concurrency 16
+
+A throwaway SQLite database is bootstrapped, every book gets a cover of
+`--image-kb` KiB, and each server is started as its own process group, loaded
+with benchmarks/load_test.py for each route in turn, and stopped. The
+proportional memory (PSS) of the server processes is reported on Linux. See
+benchmarks/serving.md for results and how to read them.
+"""
+
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from typing import Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import load_test  # noqa: E402
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ROUTES = {
+    "image (I/O)": "books.image",
+    "basic auth (CPU)": "books.detail.basic",
+}
+
+
+def seed(database_uri: str, users: int, image_kb: int) -> list[str]:
+    """Bootstrap the database, add load users and give every book a cover."""
+    from app import create_app
+    from app.models import db
+    from app.models.books import Book
+
+    app = create_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": database_uri,
+            "SECRET_KEY": "serving-benchmark",
+            "OUTBOX_WORKERS": 0,
+            "OVERDUE_SWEEP_INTERVAL": 0,
+        }
+    )
+    logins = load_test.seed(app, users)
+    # A PNG signature in front of incompressible bytes: sniffed as an image.
+    image = b"\x89PNG\r\n\x1a\n" + os.urandom(image_kb * 1024 - 8)
+    with app.app_context():
+        for book in Book.query.filter(Book.has_image.is_(False)):
+            book.set_image(image)
+        db.session.commit()
+    return logins
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(layout: str, port: int, env: dict) -> subprocess.Popen:
+    flask = [sys.executable, "-m", "flask", "--app", "app:create_app"]
+    if layout == "dev":
+        command = flask + ["run", "--port", str(port), "--no-reload", "--with-threads"]
+    else:
+        workers, threads = layout.split("x")
+        command = flask + [
+            "serve",
+            "--bind",
+            f"127.0.0.1:{port}",
+            "--workers",
+            workers,
+            "--threads",
+            threads,
+        ]
+    return subprocess.Popen(
+        command,
+        cwd=PROJECT_ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def wait_ready(base_url: str, process: subprocess.Popen, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"The server exited with status {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"{base_url}/books/?per_page=1", timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit(f"The server did not answer within {timeout:.0f}s")
+
+
+def process_tree(pid: int) -> list[int]:
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            children = [int(child) for child in f.read().split()]
+    except OSError:
+        return pids
+    for child in children:
+        pids.extend(process_tree(child))
+    return pids
+
+
+def pss_mib(pid: int) -> Optional[float]:
+    """Proportional set size of `pid` and its descendants (Linux only)."""
+    total = 0
+    for member in process_tree(pid):
+        try:
+            with open(f"/proc/{member}/smaps_rollup") as f:
+                for line in f:
+                    if line.startswith("Pss:"):
+                        total += int(line.split()[1])
+        except OSError:
+            return None
+    return total / 1024
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--servers",
+        default="dev,1x1,1x8,4x1,4x4",
+        help="Comma-separated layouts: `dev` or `<workers>x<threads>`.",
+    )
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--image-kb", type=int, default=256)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "serving.db")
+    database_uri = f"sqlite:///{path}"
+    logins = seed(database_uri, args.concurrency, args.image_kb)
+    env = {
+        **os.environ,
+        "DATABASE_URI": database_uri,
+        "SECRET_KEY": "serving-benchmark",
+        "BASIC_AUTH_CACHE_SIZE": "0",
+        "OUTBOX_WORKERS": "0",
+        "OVERDUE_SWEEP_INTERVAL": "0",
+        "SQLALCHEMY_POOL_SIZE": str(args.concurrency),
+    }
+
+    print(
+        f"{args.concurrency} clients, {args.duration:.0f}s per route, "
+        f"{os.cpu_count()} CPUs, {args.image_kb} KiB covers"
+    )
+    print(
+        f"{'server':<8} {'route':<18} {'req/s':>8} {'p50 ms':>8} "
+        f"{'p95 ms':>8} {'p99 ms':>8} {'err':>5} {'PSS MiB':>8}"
+    )
+    for layout in filter(None, args.servers.split(",")):
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        process = start_server(layout, port, env)
+        try:
+            wait_ready(base_url, process, args.timeout)
+            for label, operation in ROUTES.items():
+                mix = {name: 0 for name in load_test.DEFAULT_MIX}
+                mix[operation] = 1
+                result = load_test.run(
+                    base_url,
+                    logins,
+                    mix,
+                    args.concurrency,
+                    args.duration,
+                    args.warmup,
+                    args.timeout,
+                )
+                stats = next(iter(result["endpoints"].values()))
+                memory = pss_mib(process.pid)
+                print(
+                    f"{layout:<8} {label:<18} {stats['throughput']:>8.1f} "
+                    f"{stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} "
+                    f"{stats['p99_ms']:>8.1f} {stats['errors']:>5} "
+                    + (f"{memory:>8.1f}" if memory is not None else f"{'n/a':>8}")
+                )
+        finally:
+            os.killpg(process.pid, signal.SIGTERM)
+            process.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+"""
+gunicorn settings and hooks used by `flask serve`.
+
+The app is created once in the master and the workers are forked from it, so
+they share its memory pages until they write to them. Bind address, worker
+and thread counts, timeouts and recycling are passed on the command line by
+`flask serve` (see app/config/server.py).
+
+Signals to the master: HUP replaces the workers gracefully (in-flight
+requests finish first), TTIN/TTOU add or remove a worker, USR2 followed by
+QUIT to the old master deploys new code without dropping connections.
+"""
+
+import gc
+
+from app import start_background_workers
+from app.config.server import BACKGROUND_WORKERS
+from app.models import db
+
+preload_app = True
+worker_class = "gthread"
+
+
+def when_ready(server):
+    # What is left after booting lives as long as the process: collect the
+    # garbage once and freeze the rest, so that collections in the workers
+    # never write to (and so copy) the shared pages.
+    gc.collect()
+    gc.freeze()
+
+
+def pre_fork(server, worker):
+    # Freeze whatever the master allocated since, e.g. before recycling a worker.
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    app = server.app.wsgi()
+    with app.app_context():
+        # create_app opens no connections, but a pooled socket must never be
+        # shared between processes.
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    # Threads do not survive a fork: each worker starts its own.
+    if BACKGROUND_WORKERS and not app.config["BACKGROUND_WORKERS"]:
+        start_background_workers(app)
@@ -0,0 +1,50 @@
+"""create users and books
+
+Revision ID: 0d4c6f8a2e31
+Revises:
+Create Date: 2026-10-18 09:05:17.402113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = '0d4c6f8a2e31'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The schema `db.create_all()` used to build before there were migrations.
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('full_name', sa.String(length=255), nullable=False),
+    sa.Column('email', sa.String(length=255), nullable=False),
+    sa.Column('username', sa.String(length=80), nullable=False),
+    sa.Column('password', sa.String(length=255), nullable=False),
+    sa.Column('role', sa.Enum('ADMIN', 'USER', 'GUEST', name='userrole'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('username')
+    )
+    op.create_table('books',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=120), nullable=False),
+    sa.Column('author', sa.String(length=80), nullable=False),
+    sa.Column('description', sa.Text(), nullable=False),
+    sa.Column('image', sa.LargeBinary().with_variant(mysql.LONGBLOB(), 'mysql'), nullable=True),
+    sa.Column('isbn', sa.String(length=13), nullable=False),
+    sa.Column('available', sa.Boolean(), nullable=True),
+    sa.Column('borrowed_by', sa.Integer(), nullable=True),
+    sa.Column('borrowed_until', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['borrowed_by'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('isbn')
+    )
+
+
+def downgrade():
+    op.drop_table('books')
+    op.drop_table('users')
@@ -0,0 +1,32 @@
+"""add user is_active and token_version
+
+Revision ID: 1a6f4c2e9d53
+Revises: e7d3b8a60f14
+Create Date: 2026-10-18 16:48:13.551092
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1a6f4c2e9d53'
+down_revision = 'e7d3b8a60f14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column('is_active', sa.Boolean(), nullable=False, server_default=sa.true())
+        )
+        batch_op.add_column(
+            sa.Column('token_version', sa.Integer(), nullable=False, server_default='0')
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('token_version')
+        batch_op.drop_column('is_active')
@@ -0,0 +1,78 @@
+"""add book image metadata
+
+Revision ID: 3f2a9c1d7b10
+Revises: 0d4c6f8a2e31
+Create Date: 2026-10-18 09:12:41.318204
+
+"""
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.files import sniff_image_mime_type
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2a9c1d7b10'
+down_revision = '0d4c6f8a2e31'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 100
+
+
+def upgrade():
+    with op.batch_alter_table('books', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('image_size', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('image_mime_type', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('image_hash', sa.String(length=64), nullable=True))
+        batch_op.add_column(
+            sa.Column('has_image', sa.Boolean(), nullable=False, server_default=sa.false())
+        )
+
+    # Backfill the metadata from the existing blobs, one small batch of rows at
+    # a time so the migration never holds more than a few covers in memory.
+    connection = op.get_bind()
+    books = sa.table(
+        'books',
+        sa.column('id', sa.Integer),
+        sa.column('image', sa.LargeBinary),
+        sa.column('image_size', sa.Integer),
+        sa.column('image_mime_type', sa.String),
+        sa.column('image_hash', sa.String),
+        sa.column('has_image', sa.Boolean),
+    )
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(books.c.id, books.c.image)
+            .where(books.c.id > last_id, books.c.image.isnot(None))
+            .order_by(books.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        for book_id, image in rows:
+            if not image:
+                continue
+            connection.execute(
+                books.update()
+                .where(books.c.id == book_id)
+                .values(
+                    image_size=len(image),
+                    image_mime_type=sniff_image_mime_type(image)
+                    or 'application/octet-stream',
+                    image_hash=hashlib.sha256(image).hexdigest(),
+                    has_image=True,
+                )
+            )
+        last_id = rows[-1][0]
+
+
+def downgrade():
+    with op.batch_alter_table('books', schema=None) as batch_op:
+        batch_op.drop_column('has_image')
+        batch_op.drop_column('image_hash')
+        batch_op.drop_column('image_mime_type')
+        batch_op.drop_column('image_size')
@@ -0,0 +1,28 @@
+"""add book overdue_notified_at and due-date index
+
+Revision ID: 4d8e2b7f1c36
+Revises: 5b9e2d4a7c10
+Create Date: 2026-10-18 17:32:40.218734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4d8e2b7f1c36'
+down_revision = '5b9e2d4a7c10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('books', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('overdue_notified_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_books_available_borrowed_until', ['available', 'borrowed_until'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('books', schema=None) as batch_op:
+        batch_op.drop_index('ix_books_available_borrowed_until')
+        batch_op.drop_column('overdue_notified_at')
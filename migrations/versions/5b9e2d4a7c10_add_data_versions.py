@@ -0,0 +1,28 @@
+"""add data versions
+
+Revision ID: 5b9e2d4a7c10
+Revises: 1a6f4c2e9d53
+Create Date: 2026-10-18 17:05:26.914830
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b9e2d4a7c10'
+down_revision = '1a6f4c2e9d53'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('data_versions',
+    sa.Column('name', sa.String(length=32), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('data_versions')
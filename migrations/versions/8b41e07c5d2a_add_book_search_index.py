@@ -0,0 +1,44 @@
+"""add book search index
+
+Revision ID: 8b41e07c5d2a
+Revises: 3f2a9c1d7b10
+Create Date: 2026-10-18 11:40:05.902113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b41e07c5d2a'
+down_revision = '3f2a9c1d7b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('book_search_documents',
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('length', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['book_id'], ['books.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('book_id')
+    )
+    op.create_table('book_search_postings',
+    sa.Column('term', sa.String(length=64), nullable=False),
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('frequency', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['book_id'], ['books.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('term', 'book_id')
+    )
+    with op.batch_alter_table('book_search_postings', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_book_search_postings_book_id'), ['book_id'], unique=False)
+
+    # Populate the new tables afterwards with `flask search rebuild`.
+
+
+def downgrade():
+    with op.batch_alter_table('book_search_postings', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_book_search_postings_book_id'))
+
+    op.drop_table('book_search_postings')
+    op.drop_table('book_search_documents')
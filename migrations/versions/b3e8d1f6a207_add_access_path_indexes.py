@@ -0,0 +1,65 @@
+"""add indexes for the list, filter and login access paths
+
+Revision ID: b3e8d1f6a207
+Revises: 9c27f5e1a4b8
+Create Date: 2026-10-18 19:05:52.870341
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e8d1f6a207'
+down_revision = '9c27f5e1a4b8'
+branch_labels = None
+depends_on = None
+
+
+# SQLite only uses an index for LIKE 'x%' on a NOCASE column.
+PREFIX_COLUMNS = {
+    'books': [('title', 120), ('author', 80)],
+    'users': [('full_name', 255), ('email', 255), ('username', 80)],
+}
+
+
+def _set_prefix_collation(collation):
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for table, columns in PREFIX_COLUMNS.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name, length in columns:
+                batch_op.alter_column(
+                    name,
+                    existing_type=sa.String(length),
+                    type_=sa.String(length, collation=collation),
+                    existing_nullable=False,
+                )
+
+
+def upgrade():
+    _set_prefix_collation('NOCASE')
+
+    with op.batch_alter_table('books', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_books_title'), ['title'], unique=False)
+        batch_op.create_index(batch_op.f('ix_books_author'), ['author'], unique=False)
+        batch_op.create_index(batch_op.f('ix_books_borrowed_by'), ['borrowed_by'], unique=False)
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_users_email'), ['email'], unique=False)
+        batch_op.create_index(batch_op.f('ix_users_role'), ['role'], unique=False)
+        batch_op.create_index(batch_op.f('ix_users_full_name'), ['full_name'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_full_name'))
+        batch_op.drop_index(batch_op.f('ix_users_role'))
+        batch_op.drop_index(batch_op.f('ix_users_email'))
+
+    with op.batch_alter_table('books', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_books_borrowed_by'))
+        batch_op.drop_index(batch_op.f('ix_books_author'))
+        batch_op.drop_index(batch_op.f('ix_books_title'))
+
+    _set_prefix_collation(None)
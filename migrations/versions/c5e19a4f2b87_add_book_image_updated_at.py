@@ -0,0 +1,38 @@
+"""add book image updated at
+
+Revision ID: c5e19a4f2b87
+Revises: 8b41e07c5d2a
+Create Date: 2026-10-18 13:05:27.640518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e19a4f2b87'
+down_revision = '8b41e07c5d2a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('books', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('image_updated_at', sa.DateTime(), nullable=True))
+
+    # Existing covers get the migration time as their Last-Modified date.
+    books = sa.table(
+        'books',
+        sa.column('has_image', sa.Boolean),
+        sa.column('image_updated_at', sa.DateTime),
+    )
+    op.execute(
+        books.update()
+        .where(books.c.has_image == sa.true())
+        .values(image_updated_at=sa.func.now())
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('books', schema=None) as batch_op:
+        batch_op.drop_column('image_updated_at')
@@ -0,0 +1,38 @@
+"""add book image variants
+
+Revision ID: e7d3b8a60f14
+Revises: c5e19a4f2b87
+Create Date: 2026-10-18 14:22:51.077930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7d3b8a60f14'
+down_revision = 'c5e19a4f2b87'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('book_image_variants',
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('width', sa.Integer(), nullable=False),
+    sa.Column('image', sa.LargeBinary().with_variant(mysql.LONGBLOB(), 'mysql'), nullable=False),
+    sa.Column('image_size', sa.Integer(), nullable=False),
+    sa.Column('image_mime_type', sa.String(length=64), nullable=False),
+    sa.Column('image_hash', sa.String(length=64), nullable=False),
+    sa.Column('source_hash', sa.String(length=64), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['book_id'], ['books.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('book_id', 'width')
+    )
+
+    # Render the variants of existing covers with `flask images backfill`.
+
+
+def downgrade():
+    op.drop_table('book_image_variants')
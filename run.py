@@ -4,9 +4,18 @@ from app import create_app
 app = create_app()
 
 if __name__ == "__main__":
-    app.run(debug=True, port=5000)
+    # Development server only; FLASK_DEBUG=1 turns on the debugger and the
+    # reloader. Production runs `flask serve` (below).
+    app.run(port=5000)
 
 
+# first run and after every deploy: migrate the schema and seed data once
+# (safe to repeat)
+# flask bootstrap
+
+# production: pre-forked gunicorn workers (see `flask serve --help`)
+# flask serve --workers 4 --threads 4
+
 # migration steps
 # flask db init
 # flask db migrate -m "update user"
@@ -0,0 +1,11 @@
+import json
+from http import HTTPStatus
+
+
+def test_export_is_public_like_the_list(client):
+    response = client.get("/books/export")
+    assert response.status_code == HTTPStatus.OK
+    lines = response.get_data(as_text=True).splitlines()
+    exported = [json.loads(line)["id"] for line in lines]
+    listed = client.get("/books/", query_string={"per_page": 100}).json["data"]
+    assert exported == [book["id"] for book in listed]
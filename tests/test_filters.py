@@ -0,0 +1,29 @@
+from http import HTTPStatus
+
+
+def _authors(client, **query_string) -> set[str]:
+    response = client.get("/books/", query_string={"per_page": 100, **query_string})
+    assert response.status_code == HTTPStatus.OK
+    return {book["author"] for book in response.json["data"]}
+
+
+def test_book_filters_match_anywhere_by_default(client):
+    assert _authors(client, author="orwell") == {"George Orwell"}
+
+
+def test_book_filters_match_the_start_on_request(client):
+    assert _authors(client, author="orwell", match="prefix") == set()
+    assert _authors(client, author="george", match="prefix") == {"George Orwell"}
+
+
+def test_book_filters_reject_an_unknown_match_mode(client):
+    response = client.get("/books/", query_string={"author": "x", "match": "fuzzy"})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_user_filters_match_anywhere_by_default(client, auth_header):
+    response = client.get(
+        "/users/", query_string={"email": "example.com"}, headers=auth_header("admin")
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.json["data"]) == 10
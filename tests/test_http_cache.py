@@ -0,0 +1,42 @@
+from http import HTTPStatus
+from pathlib import Path
+
+import pytest
+from werkzeug.test import Client
+
+from app import create_app
+
+
+@pytest.fixture
+def database_uri(tmp_path: Path) -> str:
+    # A file, so that a second app (another worker) sees the same database.
+    return f"sqlite:///{tmp_path / 'library.db'}"
+
+
+def test_workers_agree_on_list_etags(app, app_config, client, auth_header):
+    other_worker = Client(create_app(app_config))
+    etag = client.get("/books/").headers["ETag"]
+    assert other_worker.get("/books/").headers["ETag"] == etag
+
+    revalidate = {"If-None-Match": etag}
+    response = other_worker.get("/books/", headers=revalidate)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    book_id = client.get("/books/").json["data"][0]["id"]
+    response = client.put(
+        f"/books/{book_id}/barrow",
+        json={"borrowed_until": "2099-12-31"},
+        headers=auth_header("bobsmith"),
+    )
+    assert response.status_code == HTTPStatus.CREATED
+    response = other_worker.get("/books/", headers=revalidate)
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_empty_filters_share_the_etag_of_no_filters(client, auth_header):
+    headers = auth_header("admin")
+    etag = client.get("/users/", headers=headers).headers["ETag"]
+    response = client.get(
+        "/users/", query_string={"email": "", "role": ""}, headers=headers
+    )
+    assert response.headers["ETag"] == etag
@@ -0,0 +1,69 @@
+import threading
+from collections import Counter
+from http import HTTPStatus
+from pathlib import Path
+
+import pytest
+from werkzeug.test import Client
+
+from app.models.books import Book
+
+BORROWERS = [
+    "bobsmith",
+    "dianal",
+    "georgem",
+    "ianclark",
+    "kevinh",
+    "michaely",
+    "oscara",
+    "rachelt",
+]
+DUE_DATE = {"borrowed_until": "2099-12-31"}
+
+
+@pytest.fixture
+def database_uri(tmp_path: Path) -> str:
+    # A file rather than ":memory:", so that every thread gets a connection of
+    # its own and the borrows really race.
+    return f"sqlite:///{tmp_path / 'library.db'}"
+
+
+def _available_book_id() -> int:
+    return Book.query.filter(Book.available == True).first().id  # noqa: E712
+
+
+def test_concurrent_borrows_lend_the_book_once(app, auth_header):
+    book_id = _available_book_id()
+    headers = [auth_header(username) for username in BORROWERS]
+    start = threading.Barrier(len(BORROWERS))
+    statuses = []
+
+    def borrow(header: dict) -> None:
+        client = Client(app)
+        start.wait()
+        response = client.put(f"/books/{book_id}/barrow", json=DUE_DATE, headers=header)
+        statuses.append(response.status_code)
+
+    threads = [threading.Thread(target=borrow, args=(header,)) for header in headers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert Counter(statuses) == {
+        HTTPStatus.CREATED: 1,
+        HTTPStatus.CONFLICT: len(BORROWERS) - 1,
+    }
+
+
+def test_only_the_borrower_returns_a_book(client, auth_header):
+    book_id = _available_book_id()
+    borrower, other = auth_header("bobsmith"), auth_header("dianal")
+    response = client.put(f"/books/{book_id}/barrow", json=DUE_DATE, headers=borrower)
+    assert response.status_code == HTTPStatus.CREATED
+
+    response = client.put(f"/books/{book_id}/return", headers=other)
+    assert response.status_code == HTTPStatus.CONFLICT
+
+    response = client.put(f"/books/{book_id}/return", headers=borrower)
+    assert response.status_code == HTTPStatus.CREATED
@@ -0,0 +1,45 @@
+import re
+from http import HTTPStatus
+
+import pytest
+
+TOKEN = "scrape-token"
+EXPORT_STATEMENTS = re.compile(
+    r'^http_request_sql_statements_total\{method="GET",resource="BooksExport"\} (\d+)$',
+    re.MULTILINE,
+)
+
+
+@pytest.fixture
+def scrape(app, client):
+    app.config["METRICS_TOKEN"] = TOKEN
+
+    def scrape() -> str:
+        response = client.get("/metrics", headers={"Authorization": f"Bearer {TOKEN}"})
+        assert response.status_code == HTTPStatus.OK
+        return response.get_data(as_text=True)
+
+    return scrape
+
+
+def test_metrics_are_not_served_without_a_token(client):
+    assert client.get("/metrics").status_code == HTTPStatus.NOT_FOUND
+
+
+def test_metrics_require_the_token(scrape, client):
+    assert client.get("/metrics").status_code == HTTPStatus.UNAUTHORIZED
+    response = client.get("/metrics", headers={"Authorization": "Bearer wrong"})
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    assert "http_requests_total" in scrape()
+
+
+def test_streamed_export_statements_are_counted(scrape, client):
+    def export_statements() -> int:
+        match = EXPORT_STATEMENTS.search(scrape())
+        return int(match.group(1)) if match else 0
+
+    before = export_statements()
+    response = client.get("/books/export")
+    assert response.status_code == HTTPStatus.OK
+    response.close()
+    assert export_statements() > before
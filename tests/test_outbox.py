@@ -0,0 +1,27 @@
+import smtplib
+
+from app.models import db
+from app.models.outbox import EmailOutbox, EmailStatus
+from app.utils.emai import queue_registration_email
+from app.utils.outbox import process_outbox
+
+
+class RefusingSender:
+    def send(self, to_email: str, subject: str, body: str) -> None:
+        raise smtplib.SMTPRecipientsRefused({to_email: (550, b"No such user")})
+
+    def close(self) -> None:
+        pass
+
+
+def test_given_up_email_drops_its_body(app):
+    assert queue_registration_email(
+        "new.user@example.com", "New User", "newuser", "InitialPassword1!"
+    )
+    db.session.commit()
+
+    assert process_outbox(RefusingSender()) == (0, 1)
+
+    message = EmailOutbox.query.filter_by(to_email="new.user@example.com").one()
+    assert message.status == EmailStatus.FAILED
+    assert message.body is None
@@ -0,0 +1,155 @@
+import base64
+import io
+from typing import Callable, Optional
+
+import pytest
+from flask import Flask
+from PIL import Image
+from werkzeug.test import Client, TestResponse
+
+from app.models import db
+from app.models.books import Book
+from app.utils.query_budget import QueryBudgetExceeded
+
+USERNAME, PASSWORD = "bobsmith", "BobStrongPwd2@"
+DUE_DATE = {"borrowed_until": "2099-12-31"}
+
+
+@pytest.fixture
+def budgets(app: Flask) -> Flask:
+    """Fail a request that runs more statements than its handler declares."""
+    app.config["QUERY_BUDGET_MODE"] = "raise"
+    # Let QueryBudgetExceeded reach the test instead of becoming a 500.
+    app.config["PROPAGATE_EXCEPTIONS"] = True
+    return app
+
+
+@pytest.fixture
+def book_id(app: Flask) -> int:
+    return Book.query.filter(Book.available == True).first().id  # noqa: E712
+
+
+def _basic_header() -> dict:
+    credentials = base64.b64encode(f"{USERNAME}:{PASSWORD}".encode()).decode()
+    return {"Authorization": f"Basic {credentials}"}
+
+
+def _budgeted_request(
+    app: Flask,
+    client: Client,
+    method: str,
+    path: str,
+    headers: Optional[dict] = None,
+    **kwargs,
+) -> TestResponse:
+    """Send a request to a handler that declares a budget, within that budget."""
+    endpoint, _ = app.url_map.bind("localhost").match(path, method)
+    handler = getattr(app.view_functions[endpoint].view_class, method.lower())
+    assert getattr(handler, "query_budget", None) is not None, f"{method} {path}"
+    try:
+        response = client.open(path, method=method, headers=headers, **kwargs)
+    except QueryBudgetExceeded as e:
+        pytest.fail(e.report())
+    assert response.status_code < 400, response.get_data(as_text=True)
+    return response
+
+
+def test_login_stays_within_budget(budgets: Flask, client: Client):
+    _budgeted_request(
+        budgets,
+        client,
+        "POST",
+        "/auth/login",
+        json={"username": USERNAME, "password": PASSWORD},
+    )
+
+
+@pytest.mark.parametrize(
+    "query_string",
+    [{}, {"after": ""}, {"author": "orwell"}, {"description": "novel"}],
+    ids=["page", "cursor", "author", "description"],
+)
+def test_book_list_stays_within_budget(
+    budgets: Flask, client: Client, query_string: dict
+):
+    _budgeted_request(budgets, client, "GET", "/books/", query_string=query_string)
+
+
+def test_book_search_stays_within_budget(budgets: Flask, client: Client):
+    _budgeted_request(
+        budgets, client, "GET", "/books/search", query_string={"q": "novel"}
+    )
+
+
+@pytest.mark.parametrize("auth", ["basic", "jwt"])
+def test_book_detail_stays_within_budget(
+    budgets: Flask, client: Client, auth_header: Callable, book_id: int, auth: str
+):
+    headers = _basic_header() if auth == "basic" else auth_header(USERNAME)
+    _budgeted_request(budgets, client, "GET", f"/books/{book_id}", headers=headers)
+
+
+def test_book_image_stays_within_budget(budgets: Flask, client: Client, book_id: int):
+    image = io.BytesIO()
+    Image.new("RGB", (4, 4)).save(image, format="PNG")
+    db.session.get(Book, book_id).set_image(image.getvalue())
+    db.session.commit()
+
+    _budgeted_request(budgets, client, "GET", f"/books/{book_id}/image")
+
+
+def test_loans_stay_within_budget(
+    budgets: Flask, client: Client, auth_header: Callable, book_id: int
+):
+    headers = auth_header(USERNAME)
+    _budgeted_request(
+        budgets,
+        client,
+        "PUT",
+        f"/books/{book_id}/barrow",
+        headers=headers,
+        json=DUE_DATE,
+    )
+    _budgeted_request(
+        budgets, client, "PUT", f"/books/{book_id}/return", headers=headers
+    )
+
+
+@pytest.mark.parametrize(
+    "auth, query_string",
+    [("jwt", {}), ("basic", {"after": ""})],
+    ids=["page", "cursor"],
+)
+def test_user_list_stays_within_budget(
+    budgets: Flask,
+    client: Client,
+    auth_header: Callable,
+    auth: str,
+    query_string: dict,
+):
+    headers = _basic_header() if auth == "basic" else auth_header(USERNAME)
+    _budgeted_request(
+        budgets, client, "GET", "/users/", headers=headers, query_string=query_string
+    )
+
+
+def test_own_account_stays_within_budget(
+    budgets: Flask, client: Client, auth_header: Callable
+):
+    headers = auth_header(USERNAME)
+    user_id = client.get(
+        "/users/", headers=headers, query_string={"username": USERNAME}
+    )
+    user_id = user_id.json["data"][0]["id"]
+
+    _budgeted_request(budgets, client, "GET", f"/users/{user_id}", headers=headers)
+    _budgeted_request(
+        budgets,
+        client,
+        "PUT",
+        "/users/me",
+        headers=headers,
+        json={"full_name": "Robert Smith"},
+    )
+    # Deactivates the account, so it goes last.
+    _budgeted_request(budgets, client, "DELETE", "/users/me", headers=headers)
@@ -0,0 +1,124 @@
+import base64
+from typing import Callable
+
+import pytest
+from werkzeug.test import Client
+
+from app.models import db
+from app.utils.overdue import sweep_overdue
+from app.utils.query_plans import capture_statements, explain, full_scans
+from app.utils.response_cache import catalog_response_cache
+
+DUE_DATE = {"borrowed_until": "2099-12-31"}
+UNKNOWN_USER = "Basic " + base64.b64encode(b"plans-nobody:not-a-password").decode()
+
+# Every filtered path of the list endpoints; the login, loan and sweep paths
+# have tests of their own. Each of their statements must use an index.
+PATHS = {
+    "books: title": ("GET", "/books/", {"title": "The", "match": "prefix"}),
+    "books: author": ("GET", "/books/", {"author": "George", "match": "prefix"}),
+    "books: description": ("GET", "/books/", {"description": "novel"}),
+    "books: title, cursor": (
+        "GET",
+        "/books/",
+        {"title": "The", "match": "prefix", "after": ""},
+    ),
+    "books: description, cursor": (
+        "GET",
+        "/books/",
+        {"description": "novel", "after": ""},
+    ),
+    "users: username": ("GET", "/users/", {"username": "bob", "match": "prefix"}),
+    "users: email": ("GET", "/users/", {"email": "bob", "match": "prefix"}),
+    "users: full_name": ("GET", "/users/", {"full_name": "Bob", "match": "prefix"}),
+    "users: role": ("GET", "/users/", {"role": "admin"}),
+    "users: role, cursor": ("GET", "/users/", {"role": "admin", "after": ""}),
+}
+
+# Unfiltered pages have no predicate for an index to serve: they read the
+# table from its start and stop after the page.
+UNFILTERED_PATHS = {
+    "books: page": ("GET", "/books/", {}),
+    "books: cursor": ("GET", "/books/", {"after": ""}),
+    "users: page": ("GET", "/users/", {}),
+    "users: cursor": ("GET", "/users/", {"after": ""}),
+}
+
+
+def _plans(statements: list) -> list[tuple[str, str, list[dict]]]:
+    plans = []
+    for engine, statement, parameters in statements:
+        with engine.connect() as connection:
+            plan = explain(connection, statement, parameters)
+        plans.append((engine.dialect.name, " ".join(statement.split()), plan))
+    return plans
+
+
+def _assert_indexed(statements: list) -> None:
+    assert statements
+    for dialect, statement, plan in _plans(statements):
+        assert full_scans(dialect, plan) == [], (statement, plan)
+
+
+def _list(client: Client, auth_header: Callable, path: tuple) -> list:
+    method, url, query_string = path
+    headers = auth_header("admin") if url.startswith("/users/") else {}
+    catalog_response_cache.clear()
+    with capture_statements() as statements:
+        response = client.open(
+            url, method=method, query_string=query_string, headers=headers
+        )
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return statements
+
+
+@pytest.mark.parametrize("path", PATHS.values(), ids=PATHS.keys())
+def test_filtered_lists_use_indexes(client: Client, auth_header: Callable, path):
+    _assert_indexed(_list(client, auth_header, path))
+
+
+@pytest.mark.parametrize("path", UNFILTERED_PATHS.values(), ids=UNFILTERED_PATHS.keys())
+def test_unfiltered_lists_stop_after_the_page(
+    client: Client, auth_header: Callable, path
+):
+    walks = 0
+    for dialect, statement, plan in _plans(_list(client, auth_header, path)):
+        if not full_scans(dialect, plan):
+            continue
+        # The one scan is the page itself: unfiltered, unsorted or sorted by
+        # the primary key the table is stored in, and cut off by its LIMIT.
+        assert " WHERE " not in statement and " LIMIT " in statement, statement
+        assert not any("TEMP B-TREE" in row["detail"] for row in plan), plan
+        walks += 1
+    assert walks == 1
+
+
+def test_basic_login_uses_indexes(client: Client):
+    with capture_statements() as statements:
+        response = client.get("/users/", headers={"Authorization": UNKNOWN_USER})
+    assert response.status_code == 401
+    _assert_indexed(statements)
+
+
+def test_loan_paths_use_indexes(client: Client, auth_header: Callable):
+    book_id = client.get("/books/", query_string={"per_page": 1}).json["data"][0]["id"]
+    headers = auth_header("bobsmith")
+
+    with capture_statements() as statements:
+        response = client.put(
+            f"/books/{book_id}/barrow", json=DUE_DATE, headers=headers
+        )
+    assert response.status_code == 201
+    _assert_indexed(statements)
+
+    with capture_statements() as statements:
+        response = client.put(f"/books/{book_id}/return", headers=headers)
+    assert response.status_code == 201
+    _assert_indexed(statements)
+
+
+def test_overdue_sweep_uses_indexes(app):
+    with capture_statements() as statements:
+        sweep_overdue(pause=0, dry_run=True)
+    db.session.rollback()
+    _assert_indexed(statements)